@@ -6,60 +6,60 @@ from __future__ import print_function, division, unicode_literals
 import os
 import collections
 
-from monty.os.path import which
-from pymatgen.core.units import *
-from pymatgen.io.abinit.eos import EOS
-from pymatgen.io.abinit.pseudos import Pseudo, PseudoTable
-from pymatgen.io.abinit.wrappers import Mrgscr, Mrgddb, Mrggkk
-from pymatgen.io.abinit.tasks import *
-from pymatgen.io.abinit.works import *
-from pymatgen.io.abinit.flows import (Flow, G0W0WithQptdmFlow, bandstructure_flow,
-    g0w0_flow, phonon_flow, phonon_conv_flow)
-# Need new version of pymatgen.
-try:
-    from pymatgen.io.abinit.flows import PhononFlow
-except ImportError:
-    pass
-
-from pymatgen.io.abinit.launcher import PyFlowScheduler, BatchLauncher
-
 from abipy.core.release import __version__, min_abinit_version
-from abipy.core.structure import Lattice, Structure, StructureModifier, frames_from_structures
-from abipy.core.mixins import AbinitLogFile, AbinitOutputFile, OutNcFile
-from abipy.core.kpoints import set_atol_kdiff
-from abipy.htc.input import AbiInput, LdauParams, LexxParams, input_gen
-from abipy.iotools import Visualizer
-from abipy.iotools.cube import CubeFile
-from abipy.abio.timer import AbinitTimerParser
-from abipy.abio.robots import Robot, GsrRobot, SigresRobot, MdfRobot, DdbRobot, abirobot
-from abipy.abio.inputs import AbinitInput, MultiDataset, AnaddbInput, OpticInput
-from abipy.abio.abivars import AbinitInputFile
-from abipy.abio.factories import *
-from abipy.electrons.ebands import ElectronBands, ElectronDosPlotter, ElectronBandsPlotter, frame_from_ebands
-from abipy.electrons.gsr import GsrFile
-from abipy.electrons.psps import PspsFile
-from abipy.electrons.gw import SigresFile, SigresPlotter
-from abipy.electrons.bse import MdfFile
-from abipy.electrons.scissors import ScissorsBuilder
-from abipy.electrons.scr import ScrFile
-from abipy.electrons.fatbands import FatBandsFile
-from abipy.dfpt.phonons import (PhbstFile, PhononBands, PhdosFile, PhdosReader,
-                                phbands_gridplot)
-from abipy.dfpt.ddb import DdbFile
-from abipy.dfpt.anaddbnc import AnaddbNcFile
-from abipy.dynamics.hist import HistFile
-from abipy.waves import WfkFile
-
-# Tools for unit conversion
-import pymatgen.core.units as units
-FloatWithUnit = units.FloatWithUnit
-ArrayWithUnit = units.ArrayWithUnit
-
-# Documentation.
-from abipy.abio.abivars_db import get_abinit_variables, abinit_help, docvar
-
-# Utils for notebooks.
-from abipy.tools.notebooks import mpld3_enable_notebook
+from abipy.tools.lazyimport import install_lazy_attributes, import_object
+
+# The objects exported by abilab are imported on first access (PEP 562) to reduce the startup time.
+# Registry: name --> module where the object is defined.
+_LAZY_ATTRS = {}
+for _modname, _names in [
+    ("monty.os.path", ["which"]),
+    ("pymatgen.io.abinit.eos", ["EOS"]),
+    ("pymatgen.io.abinit.pseudos", ["Pseudo", "PseudoTable"]),
+    ("pymatgen.io.abinit.wrappers", ["Mrgscr", "Mrgddb", "Mrggkk"]),
+    ("pymatgen.io.abinit.flows", ["Flow", "G0W0WithQptdmFlow", "bandstructure_flow",
+                                  "g0w0_flow", "phonon_flow", "phonon_conv_flow", "PhononFlow"]),
+    ("pymatgen.io.abinit.launcher", ["PyFlowScheduler", "BatchLauncher"]),
+    ("pymatgen.core.units", ["FloatWithUnit", "ArrayWithUnit"]),
+    ("abipy.core.structure", ["Lattice", "Structure", "StructureModifier", "frames_from_structures"]),
+    ("abipy.core.mixins", ["AbinitLogFile", "AbinitOutputFile", "OutNcFile"]),
+    ("abipy.core.kpoints", ["set_atol_kdiff"]),
+    ("abipy.htc.input", ["AbiInput", "LdauParams", "LexxParams", "input_gen"]),
+    ("abipy.iotools", ["Visualizer"]),
+    ("abipy.iotools.cube", ["CubeFile"]),
+    ("abipy.abio.timer", ["AbinitTimerParser"]),
+    ("abipy.abio.robots", ["Robot", "GsrRobot", "SigresRobot", "MdfRobot", "DdbRobot", "abirobot"]),
+    ("abipy.abio.inputs", ["AbinitInput", "MultiDataset", "AnaddbInput", "OpticInput"]),
+    ("abipy.abio.abivars", ["AbinitInputFile"]),
+    ("abipy.electrons.ebands", ["ElectronBands", "ElectronDosPlotter", "ElectronBandsPlotter", "frame_from_ebands"]),
+    ("abipy.electrons.gsr", ["GsrFile"]),
+    ("abipy.electrons.psps", ["PspsFile"]),
+    ("abipy.electrons.gw", ["SigresFile", "SigresPlotter"]),
+    ("abipy.electrons.bse", ["MdfFile"]),
+    ("abipy.electrons.scissors", ["ScissorsBuilder"]),
+    ("abipy.electrons.scr", ["ScrFile"]),
+    ("abipy.electrons.fatbands", ["FatBandsFile"]),
+    ("abipy.dfpt.phonons", ["PhbstFile", "PhononBands", "PhdosFile", "PhdosReader", "phbands_gridplot"]),
+    ("abipy.dfpt.ddb", ["DdbFile"]),
+    ("abipy.dfpt.anaddbnc", ["AnaddbNcFile"]),
+    ("abipy.dynamics.hist", ["HistFile"]),
+    ("abipy.waves", ["WfkFile"]),
+    # Documentation.
+    ("abipy.abio.abivars_db", ["get_abinit_variables", "abinit_help", "docvar"]),
+    # Utils for notebooks.
+    ("abipy.tools.notebooks", ["mpld3_enable_notebook"]),
+    ]:
+    _LAZY_ATTRS.update((_name, _modname) for _name in _names)
+del _modname, _names
+
+install_lazy_attributes(globals(), attrs=_LAZY_ATTRS,
+    # Tools for unit conversion
+    modules={"units": "pymatgen.core.units"},
+    # Modules exported with `from module import *`
+    star_modules=["pymatgen.core.units", "pymatgen.io.abinit.tasks", "pymatgen.io.abinit.works",
+                  "abipy.abio.factories"],
+    # Need new version of pymatgen.
+    optional=["PhononFlow"])
 
 
 def _straceback():
@@ -67,34 +67,36 @@ def _straceback():
     import traceback
     return traceback.format_exc()
 
+# Registry of the files supported by abiopen: extension --> "module:class".
+# The classes are imported only when a file is opened.
 # Abinit text files. Use OrderedDict for nice output in show_abiopen_exc2class.
 ext2file = collections.OrderedDict([
-    (".abi", AbinitInputFile),
-    (".in", AbinitInputFile),
-    (".abo", AbinitOutputFile),
-    (".out", AbinitOutputFile),
-    (".log", AbinitLogFile),
-    (".cif", Structure),
-    ("POSCAR", Structure),
-    ("cssr", Structure),
-    (".cube", CubeFile),
-    ("anaddb.nc", AnaddbNcFile),
+    (".abi", "abipy.abio.abivars:AbinitInputFile"),
+    (".in", "abipy.abio.abivars:AbinitInputFile"),
+    (".abo", "abipy.core.mixins:AbinitOutputFile"),
+    (".out", "abipy.core.mixins:AbinitOutputFile"),
+    (".log", "abipy.core.mixins:AbinitLogFile"),
+    (".cif", "abipy.core.structure:Structure"),
+    ("POSCAR", "abipy.core.structure:Structure"),
+    ("cssr", "abipy.core.structure:Structure"),
+    (".cube", "abipy.iotools.cube:CubeFile"),
+    ("anaddb.nc", "abipy.dfpt.anaddbnc:AnaddbNcFile"),
 ])
 
 # Abinit files require a special treatment.
 abiext2ncfile = collections.OrderedDict([
-    ("GSR.nc", GsrFile),
-    ("OUT.nc", OutNcFile),
-    ("WFK.nc", WfkFile),
-    ("HIST.nc", HistFile),
-    ("PSPS.nc", PspsFile),
-    ("DDB", DdbFile),
-    ("PHBST.nc", PhbstFile),
-    ("PHDOS.nc", PhdosFile),
-    ("SCR.nc", ScrFile),
-    ("SIGRES.nc", SigresFile),
-    ("MDF.nc", MdfFile),
-    ("FATBANDS.nc", FatBandsFile),
+    ("GSR.nc", "abipy.electrons.gsr:GsrFile"),
+    ("OUT.nc", "abipy.core.mixins:OutNcFile"),
+    ("WFK.nc", "abipy.waves:WfkFile"),
+    ("HIST.nc", "abipy.dynamics.hist:HistFile"),
+    ("PSPS.nc", "abipy.electrons.psps:PspsFile"),
+    ("DDB", "abipy.dfpt.ddb:DdbFile"),
+    ("PHBST.nc", "abipy.dfpt.phonons:PhbstFile"),
+    ("PHDOS.nc", "abipy.dfpt.phonons:PhdosFile"),
+    ("SCR.nc", "abipy.electrons.scr:ScrFile"),
+    ("SIGRES.nc", "abipy.electrons.gw:SigresFile"),
+    ("MDF.nc", "abipy.electrons.bse:MdfFile"),
+    ("FATBANDS.nc", "abipy.electrons.fatbands:FatBandsFile"),
 ])
 
 
@@ -106,49 +108,65 @@ def abiopen_ext2class_table():
     from tabulate import tabulate
     table = []
 
-    for ext, cls in chain(ext2file.items(), abiext2ncfile.items()):
-        table.append((ext, str(cls)))
+    for ext, spec in chain(ext2file.items(), abiext2ncfile.items()):
+        table.append((ext, spec))
 
     return tabulate(table, headers=["Extension", "Class"])
 
 
-def abifile_subclass_from_filename(filename):
-    """Returns the appropriate class associated to the given filename."""
-    for ext, cls in ext2file.items():
-        if filename.endswith(ext): return cls
+_ABIFILE_MATCHERS = None
+
+
+def abifile_ext(filename):
+    """
+    Return the extension (key of `ext2file` or `abiext2ncfile`) associated to filename.
+    None if the file is not supported. The extensions are matched with precompiled lookup tables.
+    """
+    global _ABIFILE_MATCHERS
+    # Rebuild the lookup tables if the extensions have been changed.
+    keys = (tuple(ext2file.keys()), tuple(abiext2ncfile.keys()))
+    if _ABIFILE_MATCHERS is None or _ABIFILE_MATCHERS[0] != keys:
+        from abipy.tools.dirindex import SuffixMatcher
+        _ABIFILE_MATCHERS = (keys, SuffixMatcher(keys[0]), SuffixMatcher(keys[1]))
+
+    ext = _ABIFILE_MATCHERS[1](filename)
+    if ext is not None: return ext
 
     ext = filename.split("_")[-1]
-    try:
-        return abiext2ncfile[ext]
-    except KeyError:
-        for ext, cls in abiext2ncfile.items():
-            if filename.endswith(ext): return cls
+    if ext in abiext2ncfile: return ext
+
+    return _ABIFILE_MATCHERS[2](filename)
+
+
+def abifile_subclass_from_filename(filename):
+    """Returns the appropriate class associated to the given filename."""
+    ext = abifile_ext(filename)
+    if ext in ext2file: return import_object(ext2file[ext])
+    if ext in abiext2ncfile: return import_object(abiext2ncfile[ext])
 
     msg = ("No class has been registered for file:\n\t%s\n\nFile extensions supported:\n%s" %
         (filename, abiopen_ext2class_table()))
     raise ValueError(msg)
 
 
-def dir2abifiles(top, recurse=True):
+def dir2abifiles(top, recurse=True, nthreads=None, manifest=None):
     """
     Analyze the filesystem starting from directory `top` and
     return an ordered dictionary mapping the directory name to the list
     of files supported by `abiopen` contained within that directory.
     If not `recurse`, children directories are not analyzed.
+
+    The directories are scanned in parallel with `nthreads` threads (default: 4 times the number of CPUs).
+    `manifest` is the path of a file used to save the index: the next call will list only
+    the directories that have been modified. See :func:`abipy.tools.dirindex.index_tree`.
     """
+    from abipy.tools.dirindex import index_tree
     dl = collections.defaultdict(list)
-
-    if recurse:
-        for dirpath, dirnames, filenames in os.walk(top):
-            for f in filenames:
-                path = os.path.join(dirpath, f)
-                if not isabifile(path): continue
-                dl[dirpath].append(path)
-    else:
-        for f in os.listdir(top):
-            path = os.path.join(top, f)
-            if not isabifile(path): continue
-            dl[dirpath].append(path)
+    abstop = os.path.abspath(top)
+    for entry in index_tree(top, abifile_ext, recurse=recurse, nthreads=nthreads, manifest=manifest):
+        # Paths are relative to top as in os.walk.
+        path = os.path.join(top, os.path.relpath(entry.path, abstop))
+        dl[os.path.dirname(path)].append(path)
 
     return collections.OrderedDict([(k, dl[k]) for k in sorted(dl.keys())])
 
@@ -157,11 +175,7 @@ def isabifile(filepath):
     """
     Return True if `filepath` can be opened with `abiopen`.
     """
-    try:
-        abifile_subclass_from_filename(filepath)
-        return True
-    except ValueError:
-        return False
+    return abifile_ext(filepath) is not None
 
 
 def abiopen(filepath):
@@ -173,6 +187,7 @@ def abiopen(filepath):
         filepath: string with the filename.
     """
     if os.path.basename(filepath) == "__AbinitFlow__.pickle":
+        from pymatgen.io.abinit.flows import Flow
         return Flow.pickle_load(filepath)
 
     # Handle old output files produced by Abinit.
@@ -180,6 +195,7 @@ def abiopen(filepath):
     outnum = re.compile(".+\.out[\d]+")
     abonum = re.compile(".+\.abo[\d]+")
     if outnum.match(filepath) or abonum.match(filepath):
+        from abipy.core.mixins import AbinitOutputFile
         return AbinitOutputFile.from_file(filepath)
 
     cls = abifile_subclass_from_filename(filepath)
@@ -221,6 +237,7 @@ def display_structure(obj, **kwargs):
                           "See also https://github.com/gmatteo/nbjsmol.")
 
     # Cast to structure, get string with cif data and pass it to nbjsmol.
+    from abipy.core.structure import Structure
     structure = Structure.as_structure(obj)
     return nbjsmol_display(structure.to(fmt="cif"), ext=".cif", **kwargs)
 
@@ -259,6 +276,7 @@ def abicheck(verbose=0):
     at run-time can be imported. Return string with error messages, empty if success.
     """
     from monty.termcolor import cprint
+    from pymatgen.io.abinit.tasks import TaskManager, AbinitBuild
     err_lines = []
     app = err_lines.append
 
@@ -352,6 +370,7 @@ def flow_main(main):
         logging.basicConfig(level=numeric_level)
 
         # Istantiate the manager.
+        from pymatgen.io.abinit.tasks import TaskManager
         options.manager = TaskManager.as_manager(options.manager)
 
         def execute():
@@ -4,15 +4,23 @@ from __future__ import print_function, division, unicode_literals, absolute_impo
 
 import sys
 import os
+import functools
+import traceback
+import time
+import pickle
+import hashlib
+import types
 import numpy as np
 
 from collections import OrderedDict, deque
 from monty.string import is_string, list_strings
 from monty.functools import lazy_property
+from monty.dev import get_ncpus
 from pymatgen.util.plotting_utils import add_fig_kwargs, get_ax_fig_plt
 from pymatgen.analysis.eos import EOS
 from pymatgen.io.abinit.flows import Flow
 from abipy.core.mixins import NotebookWriter
+from abipy.core.kpoints import kpoints_intkeys
 
 
 #__all__ = [
@@ -57,18 +65,32 @@ class Robot(object):
 
         with Robot([("label1", "file1"), (label2, "file2")]) as robot:
             # Do something with robot. files are automatically closed when we exit.
+
+    A lazy robot (lazy=True) stores only the paths of the files. The files are opened
+    on demand when we iterate over the robot and closed immediately afterwards so that
+    thousands of files can be analyzed without exhausting the file handles.
+    The methods returning a DataFrame extract the data from lazy robots with a pool of processes.
     """
     # TODO
     # 1) Abstract interface from collections
     # 2) should __iter__  return (label, ncfile) or ncfile (not __getitem__ returns ncfiles.__getitem__ !!!
     # 3) replace ncfiles with files just to be consistent since we have DdbRobot!
 
-    def __init__(self, *args):
+    def __init__(self, *args, **kwargs):
         """
         args is a list of tuples (label, filepath)
+        kwargs:
+            lazy: True if only the paths of the files should be stored. Default: False
+            cache: Path of the database used to cache the rows of the DataFrames (see :class:`RobotCache`).
+                None if the results should not be cached. Default: None
         """
         self._ncfiles, self._do_close = OrderedDict(), OrderedDict()
-        self._exceptions = deque(maxlen=100)
+        self.lazy = kwargs.pop("lazy", False)
+        # Lazy robots are used for large campaigns: all the failures are kept.
+        self._exceptions = [] if self.lazy else deque(maxlen=100)
+        self.set_cache(kwargs.pop("cache", None))
+        if kwargs:
+            raise ValueError("Unknown keyword arguments: %s" % list(kwargs.keys()))
 
         for label, ncfile in args:
             self.add_file(label, ncfile)
@@ -90,8 +112,17 @@ class Robot(object):
     # Deprecated. Use class_for_ext
     for_ext = class_for_ext
 
+    def set_cache(self, cache):
+        """
+        Activate the on-disk cache used for the rows of the DataFrames.
+        cache is the path of the database, a :class:`RobotCache` or None to deactivate the cache.
+        """
+        if cache is not None and not isinstance(cache, RobotCache):
+            cache = RobotCache(cache)
+        self.cache = cache
+
     @classmethod
-    def from_dir(cls, top, walk=True):
+    def from_dir(cls, top, walk=True, lazy=False, cache=None):
         """
         This classmethod builds a robot by scanning all files located within directory `top`.
         Note that if walk is True, directories inside `top` are included as well.
@@ -101,33 +132,41 @@ class Robot(object):
 
         Args:
             top (str): Root directory
+            lazy: True if the files should not be opened (see :class:`Robot`).
+            cache: Path of the database used to cache the DataFrames. True to use
+                :attr:`RobotCache.BASENAME` in `top`. None to disable the cache.
         """
         top = os.path.abspath(top)
+        if cache is True: cache = os.path.join(top, RobotCache.BASENAME)
+
+        # Scan the directories in parallel.
+        from abipy.tools.dirindex import SuffixMatcher, index_tree
+        paths = [e.path for e in index_tree(top, SuffixMatcher([cls.EXT + ".nc", cls.EXT]), recurse=walk)]
 
         from abipy.abilab import abiopen
         items = []
-        if walk:
-            for dirpath, dirnames, filenames in os.walk(top):
-                filenames = [f for f in filenames if f.endswith(cls.EXT + ".nc") or f.endswith(cls.EXT)]
-                for f in filenames:
-                    ncfile = abiopen(os.path.join(dirpath, f))
-                    if ncfile is not None: items.append((ncfile.filepath, ncfile))
-        else:
-            filenames = [f for f in os.listdir(top) if f.endswith(cls.EXT + ".nc") or f.endswith(cls.EXT)]
-            for f in filenames:
-                ncfile = abiopen(os.path.join(top, f))
-                if ncfile is not None: items.append((ncfile.filepath, ncfile))
+        for path in paths:
+            if lazy:
+                items.append((path, path))
+                continue
+            ncfile = abiopen(path)
+            if ncfile is not None: items.append((ncfile.filepath, ncfile))
 
-        return cls(*items)
+        return cls(*items, lazy=lazy, cache=cache)
 
     @classmethod
-    def from_files(cls, filenames):
+    def from_files(cls, filenames, lazy=False, cache=None):
         """
         Build a Robot from a list of files.
+        If lazy is True, the files are not opened (see :class:`Robot`).
+        cache is the path of the database used to cache the DataFrames (see :meth:`set_cache`).
         """
         # Refactor this. cls should be automatically detecteed from the extension in filenames[0]
         from abipy.abilab import abiopen
         filenames = [f for f in filenames if f.endswith(cls.EXT + ".nc") or f.endswith(cls.EXT)]
+        if lazy:
+            return cls(*[(os.path.abspath(f), os.path.abspath(f)) for f in filenames], lazy=True, cache=cache)
+
         items = []
         for f in filenames:
             try:
@@ -135,7 +174,7 @@ class Robot(object):
             except Exception:
                 ncfile = None
             if ncfile is not None: items.append((ncfile.filepath, ncfile))
-        return cls(*items)
+        return cls(*items, cache=cache)
 
     @classmethod
     def from_flow(cls, flow, outdirs="all", nids=None):
@@ -209,8 +248,9 @@ class Robot(object):
             label: String used to identify the file (must be unique, ax exceptions is
                 raised if label is already present.
             ncfile: Specify the file to be added. Accepts strings (filepath) or abipy file-like objects.
+                Strings are not opened if the robot is lazy.
         """
-        if is_string(ncfile):
+        if is_string(ncfile) and not self.lazy:
             from abipy.abilab import abiopen
             ncfile = abiopen(ncfile)
             self._do_close[ncfile.filepath] = True
@@ -231,10 +271,43 @@ class Robot(object):
         return len(self._ncfiles)
 
     def __iter__(self):
-        return iter(self._ncfiles.items())
+        if not self.lazy:
+            return iter(self._ncfiles.items())
+        return self._iter_lazy()
+
+    def _iter_lazy(self):
+        """
+        Generator used to iterate over a lazy robot. The files that are not in memory
+        are opened on demand and closed when the next file is requested.
+        """
+        from abipy.abilab import abiopen
+        for label, ncfile in list(self._ncfiles.items()):
+            if not is_string(ncfile):
+                yield label, ncfile
+                continue
+            ncfile = abiopen(ncfile)
+            try:
+                yield label, ncfile
+            finally:
+                ncfile.close()
 
     def __getitem__(self, key):
-        return self.ncfiles.__getitem__(key)
+        if not self.lazy:
+            return self.ncfiles.__getitem__(key)
+        labels = list(self._ncfiles.keys())
+        if isinstance(key, slice):
+            return [self._open_label(label) for label in labels[key]]
+        return self._open_label(labels[key])
+
+    def _open_label(self, label):
+        """Open the file associated to label (lazy robots), keep it in memory and return it."""
+        ncfile = self._ncfiles[label]
+        if is_string(ncfile):
+            from abipy.abilab import abiopen
+            ncfile = abiopen(ncfile)
+            self._do_close[ncfile.filepath] = True
+            self._ncfiles[label] = ncfile
+        return ncfile
 
     def __enter__(self):
         return self
@@ -247,13 +320,17 @@ class Robot(object):
         return self._ncfiles.items()
 
     def show_files(self, stream=sys.stdout):
-        s = "\n".join(["%s --> %s" % (label, ncfile.filepath) for label, ncfile in self])
+        s = "\n".join(["%s --> %s" % (label, path) for label, path in zip(self._ncfiles.keys(), self.filepaths)])
         stream.write(s)
 
     def __repr__(self):
-        lines = ["%s with %d files in memory" % (self.__class__.__name__, len(self.ncfiles))]
-        for i, f in enumerate(self.ncfiles):
-            path = f.relpath if len(f.relpath) < len(f.filepath) else f.filepath
+        if self.lazy:
+            lines = ["Lazy %s with %d files" % (self.__class__.__name__, len(self))]
+        else:
+            lines = ["%s with %d files in memory" % (self.__class__.__name__, len(self))]
+        for i, filepath in enumerate(self.filepaths):
+            relpath = os.path.relpath(filepath)
+            path = relpath if len(relpath) < len(filepath) else filepath
             lines.append("  [%d] %s" % (i, path))
         return "\n".join(lines)
 
@@ -261,14 +338,25 @@ class Robot(object):
 
     @property
     def ncfiles(self):
-        """List of netcdf files."""
+        """
+        List of netcdf files. Note that all the files of a lazy robot are opened
+        (and kept in memory until close is called).
+        """
+        if self.lazy:
+            return [self._open_label(label) for label in list(self._ncfiles.keys())]
         return list(self._ncfiles.values())
 
+    @property
+    def filepaths(self):
+        """List with the absolute paths of the files. Files are not opened."""
+        return [os.path.abspath(f) if is_string(f) else f.filepath for f in self._ncfiles.values()]
+
     def close(self):
         """
         Close all files that have been opened by the Robot
         """
-        for ncfile in self.ncfiles:
+        for ncfile in self._ncfiles.values():
+            if is_string(ncfile): continue
             if self._do_close.pop(ncfile.filepath, False):
                 try:
                     ncfile.close()
@@ -276,10 +364,13 @@ class Robot(object):
                     pass
 
     @classmethod
-    def open(cls, obj, nids=None, **kwargs):
+    def open(cls, obj, nids=None, lazy=False, cache=None, **kwargs):
         """
         Flexible constructor. obj can be a :class:`Flow` or a string with the directory containing the Flow.
         nids is an optional list of :class:`Node` identifiers used to filter the set of :class:`Task` in the Flow.
+        If lazy is True, the files are not opened (see :class:`Robot`).
+        cache is the path of the database used to cache the DataFrames. True to use
+        :attr:`RobotCache.BASENAME` in the directory of the flow. None to disable the cache.
         """
         has_dirpath = False
         if is_string(obj):
@@ -290,34 +381,126 @@ class Robot(object):
 
         if not has_dirpath:
             # We have a Flow. smeth is the name of the Task method used to open the file.
+            if cache is True: cache = os.path.join(obj.workdir, RobotCache.BASENAME)
             items = []
+            if lazy:
+                for task in obj.iflat_tasks(nids=nids):
+                    filepath = task.outdir.has_abiext(cls.EXT)
+                    if filepath: items.append((task.pos_str, filepath))
+                return cls(*items, lazy=True, cache=cache)
+
             smeth = "open_" + cls.EXT.lower()
             for task in obj.iflat_tasks(nids=nids): #, status=obj.S_OK):
                 open_method = getattr(task, smeth, None)
                 if open_method is None: continue
                 ncfile = open_method()
                 if ncfile is not None: items.append((task.pos_str, ncfile))
-            return cls(*items)
+            return cls(*items, cache=cache)
 
         else:
             # directory --> search for files with the appropriate extension and open it with abiopen.
             if nids is not None: raise ValueError("nids cannot be used when obj is a directory.")
-            return cls.from_dir(obj)
+            return cls.from_dir(obj, lazy=lazy, cache=cache)
 
     def _exec_funcs(self, funcs, arg):
         """
         Execute list of callables funcs. Each func receives arg as argument.
         """
-        if not isinstance(funcs, (list, tuple)): funcs = [funcs]
-        d = {}
-        for func in funcs:
-            try:
-                key, value = func(arg)
-                d[key] = value
-            except Exception as exc:
-                self._exceptions.append(str(exc))
+        d, errors = _exec_funcs(funcs, arg)
+        self._exceptions.extend(errors)
         return d
 
+    def _get_rows(self, extractor, nprocs=None, chunksize=None):
+        """
+        Apply extractor to all the files of the robot.
+
+        extractor is a callable that receives a file and returns the tuple (row, errors)
+        where row is a dictionary and errors is a list of strings. extractor must be picklable
+        (e.g. instance of a class defined at module level) as lazy robots send it to a pool of processes.
+        In-memory robots process the files sequentially.
+        Exceptions raised while opening or analyzing a file are stored in `self.exceptions`
+        (prefixed by the label of the file) and the file is not included in the output.
+
+        If the robot has a cache and extractor defines a `spec` string, the rows of the files
+        that have not been modified are taken from the cache and only the other files are analyzed.
+        Files modified less than :attr:`RobotCache.MIN_AGE` seconds before the extraction are not cached
+        since a subsequent change may not modify their size and mtime.
+
+        Args:
+            nprocs: Number of processes used by lazy robots. Default: number of CPUs.
+            chunksize: Number of files sent to a process in a single task. Automatically computed if None.
+
+        Return:
+            (row_names, rows)
+        """
+        labels, paths = list(self._ncfiles.keys()), self.filepaths
+        results = [None] * len(labels)
+
+        spec = getattr(extractor, "spec", None)
+        use_cache = self.cache is not None and spec is not None
+        if use_cache:
+            start_ns = int(time.time() * 1e9)
+            stats = [_stat_file(path) for path in paths]
+            for i, row in enumerate(self.cache.get_rows(paths, stats, spec)):
+                if row is not None: results[i] = (row, [])
+
+        todo = [i for i, res in enumerate(results) if res is None]
+        if not self.lazy:
+            ncfiles = list(self._ncfiles.values())
+            for i in todo:
+                try:
+                    results[i] = extractor(ncfiles[i])
+                except Exception:
+                    results[i] = (None, [traceback.format_exc()])
+                self._exceptions.extend("%s: %s" % (labels[i], e) for e in results[i][1])
+        else:
+            for i, res in zip(todo, self._map_paths(extractor, [paths[i] for i in todo], nprocs, chunksize)):
+                results[i] = res
+                self._exceptions.extend("%s: %s" % (labels[i], e) for e in res[1])
+
+        if use_cache:
+            # Rows produced with errors are not cached so that the errors are reported again.
+            max_mtime = start_ns - int(RobotCache.MIN_AGE * 1e9)
+            self.cache.put_rows([(paths[i], stats[i], results[i][0]) for i in todo
+                                 if results[i][0] is not None and not results[i][1] and
+                                 stats[i] is not None and stats[i][1] < max_mtime], spec)
+
+        row_names, rows = [], []
+        for label, (row, errors) in zip(labels, results):
+            if row is None: continue
+            row_names.append(label)
+            rows.append(row)
+
+        return row_names, rows
+
+    @staticmethod
+    def _map_paths(extractor, paths, nprocs, chunksize):
+        """
+        Open the files in paths, apply extractor and close the files with a pool of nprocs processes.
+        Return list of tuples (row, errors).
+        """
+        if nprocs is None: nprocs = get_ncpus()
+        nprocs = max(1, min(nprocs, len(paths)))
+        func = functools.partial(_extract_from_path, extractor=extractor)
+
+        if nprocs == 1:
+            return [func(path) for path in paths]
+
+        if chunksize is None: chunksize = max(1, min(100, len(paths) // (4 * nprocs)))
+        import multiprocessing
+        pool = multiprocessing.Pool(processes=nprocs)
+        try:
+            # Each worker opens one file at a time. imap preserves the order.
+            results = list(pool.imap(func, paths, chunksize=chunksize))
+            pool.close()
+        except Exception:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+
+        return results
+
     def pairplot(self, data=None, getter="get_dataframe", map_kws=None, show=True, **kwargs):
         # TODO: Remove
         import matplotlib.pyplot as plt
@@ -338,6 +521,285 @@ class Robot(object):
         return grid
 
 
+def _exec_funcs(funcs, arg):
+    """
+    Execute list of callables funcs. Each func receives arg as argument.
+    Return dictionary {key: value} and list of strings with the exceptions.
+    """
+    if not isinstance(funcs, (list, tuple)): funcs = [funcs]
+    d, errors = {}, []
+    for func in funcs:
+        try:
+            key, value = func(arg)
+            d[key] = value
+        except Exception as exc:
+            errors.append(str(exc))
+    return d, errors
+
+
+def _stat_file(filepath):
+    """Return (size, mtime in nanoseconds) of filepath or None if the file does not exist."""
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+    # st_mtime_ns is not available in py2.
+    mtime_ns = getattr(stat, "st_mtime_ns", None)
+    if mtime_ns is None: mtime_ns = int(stat.st_mtime * 1e9)
+    return stat.st_size, mtime_ns
+
+
+def _code_digest(code, md5=None):
+    """md5 digest of the bytecode, constants and names of the code object (nested code objects included)."""
+    if md5 is None: md5 = hashlib.md5()
+    md5.update(code.co_code)
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _code_digest(const, md5)
+        else:
+            # Sort frozensets so that the digest does not depend on the hash seed.
+            if isinstance(const, frozenset): const = sorted(const, key=repr)
+            md5.update(repr(const).encode("utf-8"))
+    md5.update(" ".join(code.co_names).encode("utf-8"))
+    return md5.hexdigest()
+
+
+def _funcs_spec(funcs):
+    """
+    String identifying the list of callables funcs (module, name and digest of the bytecode)
+    so that the cached values are invalidated when the body of a function is changed.
+    Note that the functions called by funcs are not taken into account.
+    None if the callables cannot be identified e.g. lambda functions, closures, bound methods or callable objects.
+    """
+    if not isinstance(funcs, (list, tuple)): funcs = [funcs]
+    names = []
+    for func in funcs:
+        name = getattr(func, "__qualname__", getattr(func, "__name__", None))
+        if name is None or "<lambda>" in name or "<locals>" in name: return None
+        if isinstance(func, types.BuiltinFunctionType):
+            digest = "builtin"
+        else:
+            # Closures are detected with __closure__ (py2 does not have __qualname__).
+            code = getattr(func, "__code__", None)
+            if (code is None or getattr(func, "__closure__", None) is not None or
+                getattr(func, "__self__", None) is not None): return None
+            digest = _code_digest(code)
+        names.append("%s.%s:%s" % (getattr(func, "__module__", ""), name, digest))
+
+    return ",".join(names)
+
+
+class RobotCache(object):
+    """
+    On-disk cache (SQLite database) with the rows of the DataFrames produced by the robots.
+    The rows are stored with the path of the file and the specification of the extraction.
+    A row is returned only if the size and the modification time of the file are unchanged.
+
+    Usage example:
+
+    .. code-block:: python
+
+        robot = GsrRobot.from_dir(flow.workdir, lazy=True, cache=True)
+        frame = robot.get_dataframe()  # Only new or modified files are opened.
+    """
+    # Default basename of the database.
+    BASENAME = ".abipy_robots.db"
+
+    # Files modified less than MIN_AGE seconds before the extraction are not cached.
+    MIN_AGE = 2
+
+    def __init__(self, filepath):
+        self.filepath = os.path.abspath(filepath)
+        self._execute("CREATE TABLE IF NOT EXISTS rows (path TEXT, spec TEXT, size INTEGER, mtime INTEGER, "
+                      "row BLOB, PRIMARY KEY (path, spec))")
+
+    def __repr__(self):
+        return "<%s, %s>" % (self.__class__.__name__, self.filepath)
+
+    def _connect(self):
+        import sqlite3
+        return sqlite3.connect(self.filepath, timeout=60)
+
+    def _execute(self, sql, records=None):
+        """Execute sql in a transaction. Use executemany if records is not None."""
+        conn = self._connect()
+        try:
+            with conn:
+                if records is None:
+                    conn.execute(sql)
+                else:
+                    conn.executemany(sql, records)
+        finally:
+            conn.close()
+
+    def get_rows(self, paths, stats, spec):
+        """
+        Return list with the cached rows for the files in paths. stats is the list of (size, mtime)
+        returned by `_stat_file` (mtime in nanoseconds). None is used if the file is not in the cache or has been modified.
+        """
+        found = {}
+        conn = self._connect()
+        try:
+            # Query the database in chunks to avoid the limit on the number of SQL variables.
+            upaths = list(set(paths))
+            for start in range(0, len(upaths), 500):
+                chunk = upaths[start:start + 500]
+                query = "SELECT path, size, mtime, row FROM rows WHERE spec = ? AND path IN (%s)" % \
+                        ",".join("?" * len(chunk))
+                for path, size, mtime, row in conn.execute(query, [spec] + chunk):
+                    found[path] = (size, mtime, row)
+        finally:
+            conn.close()
+
+        rows = []
+        for path, stat in zip(paths, stats):
+            entry = found.get(path)
+            if stat is None or entry is None or (entry[0], entry[1]) != tuple(stat):
+                rows.append(None)
+            else:
+                rows.append(pickle.loads(bytes(entry[2])))
+
+        return rows
+
+    def put_rows(self, items, spec):
+        """
+        Store the rows in the cache. items is a list of tuples (path, (size, mtime), row).
+        Rows that cannot be pickled are ignored.
+        """
+        import sqlite3
+        records = []
+        for path, stat, row in items:
+            try:
+                records.append((path, spec, stat[0], stat[1], sqlite3.Binary(pickle.dumps(row, protocol=-1))))
+            except Exception:
+                pass
+        if not records: return
+
+        self._execute("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)", records)
+
+    def clear(self):
+        """Remove all the entries from the cache."""
+        self._execute("DELETE FROM rows")
+
+
+def _extract_from_path(filepath, extractor):
+    """
+    Open filepath, apply extractor and close the file. Used by the workers of lazy robots.
+    Return (row, errors). row is None if the file cannot be analyzed.
+    """
+    from abipy.abilab import abiopen
+    try:
+        ncfile = abiopen(filepath)
+    except Exception:
+        return None, [traceback.format_exc()]
+
+    try:
+        return extractor(ncfile)
+    except Exception:
+        return None, [traceback.format_exc()]
+    finally:
+        try:
+            ncfile.close()
+        except Exception:
+            pass
+
+
+class _RowExtractor(object):
+    """
+    Base class for the callables that extract the row of a robot DataFrame from a file.
+    Subclasses define PREFIX, the columns of the row in `_get_columns` and the additional
+    parameters of the extraction in `_spec_args`. The structural info and the output of funcs
+    are added by the base class.
+    """
+    PREFIX = None
+
+    def __init__(self, with_geo, funcs):
+        self.with_geo, self.funcs = with_geo, funcs
+
+    def _spec_args(self):
+        """List of strings with the parameters of the subclass used in the spec."""
+        return []
+
+    def _get_columns(self, ncfile):
+        """Return OrderedDict with the columns specific to the subclass."""
+        raise NotImplementedError("Subclass must define _get_columns")
+
+    @property
+    def spec(self):
+        """String with the specification used by the cache. None if the rows cannot be cached."""
+        fspec = _funcs_spec(self.funcs)
+        if fspec is None: return None
+        return ":".join([self.PREFIX] + self._spec_args() + [str(self.with_geo), fspec])
+
+    def __call__(self, ncfile):
+        d = self._get_columns(ncfile)
+
+        # Add info on structure.
+        if self.with_geo:
+            d.update(ncfile.structure.get_dict4frame(with_spglib=True))
+
+        # Execute funcs.
+        fd, errors = _exec_funcs(self.funcs, ncfile)
+        d.update(fd)
+        return d, errors
+
+
+class _GsrRowExtractor(_RowExtractor):
+    """Extract the row of the :class:`GsrRobot` DataFrame from a :class:`GsrFile`."""
+    PREFIX = "GSR"
+
+    def __init__(self, attrs, with_geo, funcs):
+        super(_GsrRowExtractor, self).__init__(with_geo, funcs)
+        self.attrs = attrs
+
+    def _spec_args(self):
+        return [",".join(self.attrs)]
+
+    def _get_columns(self, gsr):
+        d = OrderedDict()
+        for aname in self.attrs:
+            d[aname] = getattr(gsr, aname, None)
+        return d
+
+
+class _SigresRowExtractor(_RowExtractor):
+    """Extract the row of the :class:`SigresRobot` QP-gaps DataFrame from a :class:`SigresFile`."""
+    PREFIX = "SIGRES:qpgap"
+
+    def __init__(self, spin, kpoint, attrs, with_geo, funcs):
+        super(_SigresRowExtractor, self).__init__(with_geo, funcs)
+        self.spin, self.kpoint, self.attrs = spin, kpoint, attrs
+
+    def _spec_args(self):
+        return [str(self.spin), str(self.kpoint), ",".join(self.attrs)]
+
+    def _get_columns(self, sigr):
+        d = OrderedDict()
+        for aname in self.attrs:
+            d[aname] = getattr(sigr, aname, None)
+        d.update({"qpgap": sigr.get_qpgap(self.spin, self.kpoint)})
+
+        # Add convergence parameters
+        d.update(sigr.params)
+        return d
+
+
+class _MdfRowExtractor(_RowExtractor):
+    """Extract the row of the :class:`MdfRobot` DataFrame from a :class:`MdfFile`."""
+    PREFIX = "MDF"
+
+    def _get_columns(self, mdf):
+        d = OrderedDict([
+            ("exc_mdf", mdf.exc_mdf),
+            ("rpa_mdf", mdf.rpanlf_mdf),
+            ("gwrpa_mdf", mdf.gwnlf_mdf),
+        ])
+
+        # Add convergence parameters
+        d.update(mdf.params)
+        return d
+
+
 class GsrRobot(Robot, NotebookWriter):
     """
     This robot analyzes the results contained in multiple GSR files.
@@ -356,6 +818,9 @@ class GsrRobot(Robot, NotebookWriter):
                 Function or list of functions to execute to add more data to the DataFrame.
                 Each function receives a :class:`GsrFile` object and returns a tuple (key, value)
                 where key is a string with the name of column and value is the value to be inserted.
+                The functions must be picklable (no lambda) if the robot is lazy.
+            nprocs:
+                Number of processes used to read the files of a lazy robot. Default: number of CPUs.
         """
         # TODO add more columns
         # Add attributes specified by the users
@@ -366,23 +831,11 @@ class GsrRobot(Robot, NotebookWriter):
             "nsppol", "nspinor", "nspden",
         ] + kwargs.pop("attrs", [])
 
-        rows, row_names = [], []
-        for label, gsr in self:
-            row_names.append(label)
-            d = OrderedDict()
-            for aname in attrs:
-                d[aname] = getattr(gsr, aname, None)
-
-            # Add info on structure.
-            if kwargs.get("with_geo", True):
-                d.update(gsr.structure.get_dict4frame(with_spglib=True))
-
-            # Execute funcs.
-            d.update(self._exec_funcs(kwargs.get("funcs", []), gsr))
-            rows.append(d)
+        extractor = _GsrRowExtractor(attrs, kwargs.get("with_geo", True), kwargs.get("funcs", []))
+        row_names, rows = self._get_rows(extractor, nprocs=kwargs.get("nprocs", None))
 
         import pandas as pd
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()) if rows else None)
 
     def get_ebands_plotter(self):
         from abipy import abilab
@@ -426,7 +879,7 @@ class GsrRobot(Robot, NotebookWriter):
         """
         nbformat, nbv, nb = self.get_nbformat_nbv_nb(title=None)
 
-        args = [(l, f.filepath) for l, f in self.items()]
+        args = list(zip(self._ncfiles.keys(), self.filepaths))
         nb.cells.extend([
             #nbv.new_markdown_cell("# This is a markdown cell"),
             nbv.new_code_cell("robot = abilab.GsrRobot(*%s)\nprint(robot)" % str(args)),
@@ -468,27 +921,11 @@ class SigresRobot(Robot):
             #"tsmear", "nkibz",
         ] + kwargs.pop("attrs", [])
 
-        rows, row_names = [], []
-        for label, sigr in self:
-            row_names.append(label)
-            d = OrderedDict()
-            for aname in attrs:
-                d[aname] = getattr(sig, aname, None)
-            d.update({"qpgap": sigr.get_qpgap(spin, kpoint)})
-
-            # Add convergence parameters
-            d.update(sigr.params)
-
-            # Add info on structure.
-            if kwargs.get("with_geo", False):
-                d.update(sigr.structure.get_dict4frame(with_spglib=True))
-
-            # Execute funcs.
-            d.update(self._exec_funcs(kwargs.get("funcs", []), sigr))
-            rows.append(d)
+        extractor = _SigresRowExtractor(spin, kpoint, attrs, kwargs.get("with_geo", False), kwargs.get("funcs", []))
+        row_names, rows = self._get_rows(extractor, nprocs=kwargs.get("nprocs", None))
 
         import pandas as pd
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()) if rows else None)
 
     def plot_conv_qpgap(self, x_vars, **kwargs):
         """
@@ -519,30 +956,11 @@ class MdfRobot(Robot):
         return plotter
 
     def get_dataframe(self, **kwargs):
-        rows, row_names = [], []
-        for i, (label, mdf) in enumerate(self):
-            row_names.append(label)
-            d = OrderedDict([
-                ("exc_mdf", mdf.exc_mdf),
-                ("rpa_mdf", mdf.rpanlf_mdf),
-                ("gwrpa_mdf", mdf.gwnlf_mdf),
-            ])
-            #d = {aname: getattr(mdf, aname) for aname in attrs}
-            #d.update({"qpgap": mdf.get_qpgap(spin, kpoint)})
-
-            # Add convergence parameters
-            d.update(mdf.params)
-
-            # Add info on structure.
-            if kwargs.get("with_geo", False):
-                d.update(mdf.structure.get_dict4frame(with_spglib=True))
-
-            # Execute funcs.
-            d.update(self._exec_funcs(kwargs.get("funcs", []), mdf))
-            rows.append(d)
+        extractor = _MdfRowExtractor(kwargs.get("with_geo", False), kwargs.get("funcs", []))
+        row_names, rows = self._get_rows(extractor, nprocs=kwargs.get("nprocs", None))
 
         import pandas as pd
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()) if rows else None)
 
     @add_fig_kwargs
     def plot_conv_mdf(self, hue, mdf_type="exc_mdf", **kwargs):
@@ -563,6 +981,12 @@ class MdfRobot(Robot):
         return fig
 
 
+# Memoized results of DdbRobot.anaget_phmodes_at_qpoint:
+# (md5 of the DDB file, qpoint, asr, chneut, dipdip) --> PhononBands
+_ANADDB_MEMO = {}
+_ANADDB_MEMO_MAXSIZE = 1000
+
+
 class DdbRobot(Robot):
     """This robot analyzes the results contained in multiple DDB files."""
     EXT = "DDB"
@@ -572,11 +996,16 @@ class DdbRobot(Robot):
         """
         Return numpy array with the q-points in reduced coordinates found in the DDB files.
         """
-        qpoints = []
-        for (label, ddb) in enumerate(self):
-            qpoints.extend(q for q in ddb.qpoints if q not in qpoints)
+        # q-points that differ by a reciprocal lattice vector have the same integer key.
+        qpoints, seen = [], set()
+        for label, ddb in self:
+            frac_coords = ddb.qpoints.frac_coords
+            for qpt, key in zip(frac_coords, kpoints_intkeys(frac_coords)):
+                if key in seen: continue
+                seen.add(key)
+                qpoints.append(qpt)
 
-        return np.array(qpoints)
+        return np.reshape(qpoints, (-1, 3))
 
     #@property
     #def qpoints_intersection(self):
@@ -586,14 +1015,87 @@ class DdbRobot(Robot):
     #        qpoints.extend(q for q in ddb.qpoints if q not in qpoints)
     #    return np.array(qpoints)
 
+    def anaget_phmodes_at_qpoint(self, qpoint, asr=2, chneut=1, dipdip=1, num_cpus=None, manager=None):
+        """
+        Execute anaddb to compute the phonon modes at the given q-point for all the DDB files.
+        The anaddb runs are executed concurrently with at most num_cpus threads. The results are memoized
+        by (content of the DDB file, anaddb variables) so that identical DDB files and subsequent calls
+        with the same arguments do not execute anaddb again.
+
+        Args:
+            qpoint: Reduced coordinates of the qpoint where phonon modes are computed
+            asr, chneut, dipdp: Anaddb input variable. See official documentation.
+            num_cpus: Max number of anaddb processes executed at the same time. Autodetected if None.
+            manager: :class:`TaskManager` object. If None, the object is initialized from the configuration file
+
+        Return:
+            List of :class:`PhononBands` objects (one for each DDB file, in the same order).
+            None if anaddb failed, the exception is stored in `self.exceptions`.
+            Note that the objects are shared with the memoization cache and should not be changed.
+        """
+        labels, ddbs = list(self._ncfiles.keys()), self.ncfiles
+        qpoint = np.reshape(qpoint.frac_coords if hasattr(qpoint, "frac_coords") else qpoint, 3)
+        anaddb_vars = (tuple(np.round(qpoint, decimals=8)), asr, chneut, dipdip)
+
+        # Group the DDB files with the same content.
+        keys = [(ddb.md5,) + anaddb_vars for ddb in ddbs]
+        found, todo = {}, OrderedDict()
+        for i, key in enumerate(keys):
+            if key in _ANADDB_MEMO:
+                found[key] = _ANADDB_MEMO[key]
+            else:
+                todo.setdefault(key, i)
+
+        def do_work(key_index):
+            key, i = key_index
+            try:
+                return ddbs[i].anaget_phmodes_at_qpoint(qpoint=qpoint, asr=asr, chneut=chneut, dipdip=dipdip,
+                                                       manager=manager), None
+            except Exception:
+                return None, "%s: %s" % (labels[i], traceback.format_exc())
+
+        if todo:
+            if num_cpus is None: num_cpus = get_ncpus()
+            num_cpus = max(1, min(num_cpus, len(todo)))
+            if num_cpus == 1:
+                results = [do_work(item) for item in todo.items()]
+            else:
+                # anaddb is executed in a subprocess so threads are enough.
+                from multiprocessing.pool import ThreadPool
+                pool = ThreadPool(processes=num_cpus)
+                try:
+                    results = pool.map(do_work, list(todo.items()))
+                finally:
+                    pool.close()
+                    pool.join()
+
+            for key, (phbands, error) in zip(todo.keys(), results):
+                if error is not None:
+                    self._exceptions.append(error)
+                else:
+                    found[key] = phbands
+
+        # The results are taken from found so that clearing the memo does not affect this call.
+        # The entries used here are kept in the memo.
+        if len(_ANADDB_MEMO) + len(todo) > _ANADDB_MEMO_MAXSIZE: _ANADDB_MEMO.clear()
+        _ANADDB_MEMO.update(found)
+
+        return [found.get(key) for key in keys]
+
     def get_dataframe_at_qpoint(self, qpoint=None, asr=2, chneut=1, dipdip=1, **kwargs):
         """
         Return a pandas table with the phonon frequencies at the given q-point
         as computed from the different DDB files.
+        The anaddb calculations are executed concurrently (see :meth:`anaget_phmodes_at_qpoint`).
 
         Args:
             qpoint: Reduced coordinates of the qpoint where phonon modes are computed
             asr, chneut, dipdp: Anaddb input variable. See official documentation.
+
+        kwargs:
+            num_cpus: Max number of anaddb processes executed at the same time. Autodetected if None.
+            with_geo: True if structural info should be added to the DataFrame. Default: True
+            funcs: Function or list of functions to execute to add more data to the DataFrame.
         """
         # If qpoint is None, all the DDB must contain have the same q-point .
         if qpoint is None:
@@ -603,19 +1105,17 @@ class DdbRobot(Robot):
             if any(np.any(ddb.qpoints[0] != qpoint) for ddb in self.ncfiles):
                 raise ValueError("All the q-points in the DDB files must be equal")
 
+        phbands_list = self.anaget_phmodes_at_qpoint(qpoint, asr=asr, chneut=chneut, dipdip=dipdip,
+                                                     num_cpus=kwargs.get("num_cpus", None))
+
         rows, row_names = [], []
-        for i, (label, ddb) in enumerate(self):
+        for (label, ddb), phbands in zip(list(self._ncfiles.items()), phbands_list):
+            # Errors are stored in self.exceptions.
+            if phbands is None: continue
             row_names.append(label)
-            d = OrderedDict(
-            #    exc_mdf=mdf.exc_mdf,
-            )
-            #d = {aname: getattr(ddb, aname) for aname in attrs}
-            #d.update({"qpgap": mdf.get_qpgap(spin, kpoint)})
-
-            # Call anaddb to get the phonon frequencies.
-            phbands = ddb.anaget_phmodes_at_qpoint(qpoint=qpoint, asr=asr, chneut=chneut, dipdip=dipdip)
-            freqs = phbands.phfreqs[0, :] # (nq, nmodes)
+            d = OrderedDict()
 
+            freqs = phbands.phfreqs[0, :] # (nq, nmodes)
             d.update({"mode" + str(i): freqs[i] for i in range(len(freqs))})
 
             # Add convergence parameters
@@ -631,7 +1131,7 @@ class DdbRobot(Robot):
             rows.append(d)
 
         import pandas as pd
-        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()))
+        return pd.DataFrame(rows, index=row_names, columns=list(rows[0].keys()) if rows else None)
 
     def plot_conv_phfreqs_qpoint(self, x_vars, qpoint=None, **kwargs):
         """
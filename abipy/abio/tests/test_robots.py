@@ -2,6 +2,9 @@
 from __future__ import unicode_literals, division, print_function
 
 import sys
+import os
+import tempfile
+import numpy as np
 import abipy.data as abidata  
 import abipy.abilab as abilab
 
@@ -39,9 +42,166 @@ class RobotTest(AbipyTest):
         #eos = robot.eos_fit()
         #frame = robot.get_dataframe()
 
+    def test_lazy_gsr_robot(self):
+        """Testing lazy GSR robot"""
+        gsr_path = os.path.abspath(abidata.ref_file("si_scf_GSR.nc"))
+        robot = GsrRobot(("gsr0", gsr_path), ("gsr1", gsr_path), lazy=True)
+        robot.add_file("bad", gsr_path.replace("si_scf_GSR.nc", "nonexistent_GSR.nc"))
+        assert robot.lazy and len(robot) == 3 and not robot._do_close
+        print(robot)
+        assert robot.filepaths[0] == gsr_path
+
+        frame = robot.get_dataframe(nprocs=2)
+        assert list(frame.index) == ["gsr0", "gsr1"]
+        assert len(robot.exceptions) == 1 and robot.exceptions[0].startswith("bad:")
+        self.assert_equal(frame["energy"].values, frame["energy"].values[0])
+
+        # All the failures are recorded by lazy robots.
+        bad_robot = GsrRobot(*[("bad%d" % i, "nonexistent_%d_GSR.nc" % i) for i in range(150)], lazy=True)
+        assert len(bad_robot.get_dataframe(nprocs=1)) == 0
+        assert len(bad_robot.exceptions) == 150
+
+        # Exceptions raised by the extractor are recorded by in-memory robots.
+        with GsrRobot(("gsr0", gsr_path)) as mem_robot:
+            def extractor(gsr): raise RuntimeError("extractor failed")
+            assert mem_robot._get_rows(extractor) == ([], [])
+            assert len(mem_robot.exceptions) == 1 and mem_robot.exceptions[0].startswith("gsr0:")
+
+        with GsrRobot.from_files([gsr_path], lazy=True) as lazy_robot:
+            frame_serial = lazy_robot.get_dataframe(nprocs=1)
+            assert lazy_robot[0].filepath == gsr_path
+            assert [gsr.filepath for gsr in lazy_robot[:1]] == [gsr_path] and lazy_robot[1:] == []
+        self.assert_almost_equal(frame_serial["energy"].values, frame["energy"].values[:1])
+
+    def test_robot_cache(self):
+        """Testing on-disk cache of the robots"""
+        import shutil
+        from abipy.abio.robots import _stat_file
+        gsr_path = os.path.abspath(abidata.ref_file("si_scf_GSR.nc"))
+        cache_path = os.path.join(tempfile.mkdtemp(), RobotCache.BASENAME)
+
+        robot = GsrRobot(("gsr0", gsr_path), lazy=True, cache=cache_path)
+        frame = robot.get_dataframe(nprocs=1)
+        size, mtime = _stat_file(gsr_path)
+        assert isinstance(mtime, int)
+        spec = "GSR:%s:True:" % ",".join(frame.columns[:10])
+        rows = robot.cache.get_rows([gsr_path], [(size, mtime)], spec)
+        assert rows[0] is not None and rows[0]["energy"] == frame["energy"].values[0]
+        # Modified files are not taken from the cache.
+        assert robot.cache.get_rows([gsr_path], [(size + 1, mtime)], spec) == [None]
+        assert robot.cache.get_rows([gsr_path], [(size, mtime + 1)], spec) == [None]
+
+        # The second robot reads the rows from the cache.
+        robot = GsrRobot(("gsr0", gsr_path), lazy=True, cache=cache_path)
+        assert robot.get_dataframe(nprocs=1).equals(frame)
+        for lazy in (True, False):
+            with GsrRobot.from_files([gsr_path], lazy=lazy, cache=cache_path) as other:
+                assert other.cache.filepath == cache_path
+        robot.cache.clear()
+        assert robot.cache.get_rows([gsr_path], [(size, mtime)], spec) == [None]
+
+        # Files that have just been modified are not cached.
+        new_path = os.path.join(os.path.dirname(cache_path), "new_GSR.nc")
+        shutil.copy(gsr_path, new_path)
+        robot = GsrRobot(("new", new_path), lazy=True, cache=cache_path)
+        assert robot.get_dataframe(nprocs=1).equals(frame.rename(index={"gsr0": "new"}))
+        assert robot.cache.get_rows([new_path], [_stat_file(new_path)], spec) == [None]
+        old = os.stat(new_path).st_mtime - 10
+        os.utime(new_path, (old, old))
+        robot.get_dataframe(nprocs=1)
+        assert robot.cache.get_rows([new_path], [_stat_file(new_path)], spec)[0] is not None
+
+    def test_funcs_spec(self):
+        """Testing the identification of the functions used in the cache keys"""
+        from abipy.abio.robots import _funcs_spec
+        ns0, ns1 = {"__name__": "mymod"}, {"__name__": "mymod"}
+        exec("def func(gsr): return gsr.energy", ns0)
+        exec("def func(gsr): return 2 * gsr.energy", ns1)
+        spec0 = _funcs_spec([ns0["func"]])
+        assert spec0 is not None and spec0 == _funcs_spec(ns0["func"])
+        # Changing the body of the function invalidates the cache.
+        assert spec0 != _funcs_spec([ns1["func"]])
+        assert _funcs_spec([len]) is not None
+
+        # Lambdas, closures and bound methods cannot be cached.
+        x = 1
+        def closure(gsr): return x
+        assert _funcs_spec([lambda gsr: 1]) is None
+        assert _funcs_spec([ns0["func"], closure]) is None
+        assert _funcs_spec([self.test_funcs_spec]) is None
+
     #def test_sigres_robot(self):
     #def test_mdf_robot(self):
-    #def test_ddb_robot(self):
+
+    def test_ddb_robot(self):
+        """Testing DDB robot"""
+        test_dir = os.path.join(os.path.dirname(__file__), "..", "..", "test_files")
+        robot = DdbRobot.from_files([os.path.join(test_dir, "AlAs_1qpt_DDB"),
+                                     os.path.join(test_dir, "AlAs_444_nobecs_DDB")])
+        assert len(robot) == 2
+        ddb_1qpt, ddb_444 = robot.ncfiles
+        assert ddb_1qpt.md5 != ddb_444.md5 and len(ddb_1qpt.md5) == 32
+
+        # The q-point of AlAs_1qpt_DDB is also in AlAs_444_nobecs_DDB.
+        qpoints = robot.qpoints_union
+        assert len(qpoints) == len(ddb_444.qpoints)
+        self.assert_equal(qpoints[0], [0.25, 0, 0])
+        self.assert_equal(qpoints[1:], np.delete(ddb_444.qpoints.frac_coords, 1, axis=0))
+        robot.close()
+
+    def test_ddb_robot_anaget_phmodes(self):
+        """Testing concurrent and memoized anaddb runs in DdbRobot"""
+        import shutil
+        from abipy.abio import robots as robots_module
+        from abipy.dfpt.ddb import DdbFile
+        test_dir = os.path.join(os.path.dirname(__file__), "..", "..", "test_files")
+
+        # Two DDB files with the same content and one file for which anaddb fails.
+        copy_path = os.path.join(tempfile.mkdtemp(), "copy_DDB")
+        shutil.copy(os.path.join(test_dir, "AlAs_1qpt_DDB"), copy_path)
+        robot = DdbRobot(("orig", os.path.join(test_dir, "AlAs_1qpt_DDB")), ("copy", copy_path),
+                         ("fail", os.path.join(test_dir, "AlAs_444_nobecs_DDB")))
+
+        calls = []
+        def fake_anaget_phmodes_at_qpoint(ddb, **kwargs):
+            calls.append(os.path.basename(ddb.filepath))
+            if calls[-1] == "AlAs_444_nobecs_DDB": raise RuntimeError("anaddb failed")
+            return object()
+
+        anaget_phmodes_at_qpoint = DdbFile.anaget_phmodes_at_qpoint
+        DdbFile.anaget_phmodes_at_qpoint = fake_anaget_phmodes_at_qpoint
+        robots_module._ANADDB_MEMO.clear()
+        try:
+            # Thread pool: anaddb is executed once for the two files with the same content.
+            phbands = robot.anaget_phmodes_at_qpoint([0.25, 0, 0], num_cpus=2)
+            assert len(phbands) == 3 and phbands[0] is not None and phbands[0] is phbands[1]
+            assert phbands[2] is None
+            assert sorted(calls) == ["AlAs_1qpt_DDB", "AlAs_444_nobecs_DDB"]
+            assert len(robot.exceptions) == 1 and robot.exceptions[0].startswith("fail:")
+
+            # Memoized results are reused, failed runs are executed again.
+            again = robot.anaget_phmodes_at_qpoint([0.25, 0, 0], num_cpus=1)
+            assert again[0] is phbands[0] and again[2] is None
+            assert len(calls) == 3 and calls[-1] == "AlAs_444_nobecs_DDB"
+            assert len(robot.exceptions) == 2
+
+            # Different anaddb variables require new runs.
+            robot.anaget_phmodes_at_qpoint([0.25, 0, 0], asr=0, num_cpus=1)
+            assert len(calls) == 5
+
+            # The memo is full: the hits are returned even if the memo is cleared to store the new results.
+            memo = robots_module._ANADDB_MEMO
+            for i in range(robots_module._ANADDB_MEMO_MAXSIZE + 1):
+                memo[("fake", i)] = None
+            again = robot.anaget_phmodes_at_qpoint([0.25, 0, 0], num_cpus=1)
+            assert len(calls) == 6 and again[0] is phbands[0] and again[1] is phbands[0]
+            assert again[2] is None and ("fake", 0) not in memo
+            assert robot.anaget_phmodes_at_qpoint([0.25, 0, 0], num_cpus=1)[0] is phbands[0]
+            assert len(calls) == 7
+        finally:
+            DdbFile.anaget_phmodes_at_qpoint = anaget_phmodes_at_qpoint
+            robots_module._ANADDB_MEMO.clear()
+            robot.close()
 
 
 if __name__ == '__main__':
@@ -187,6 +187,28 @@ class ScalarField(Has_Structure):
         else:
             return self.datag.std(axis=0)
 
+    def symmetrize(self, symmops=None):
+        """
+        Symmetrize the field in real space with the FFT rotation tables of the mesh.
+
+        Args:
+            symmops: List of symmetry operations. If None, the ferromagnetic
+                operations of the spacegroup associated to the structure are used.
+
+        Returns:
+            New object of the same class with the symmetrized data.
+        """
+        if symmops is None:
+            if self.structure.spacegroup is None:
+                raise ValueError("Structure does not have a spacegroup, symmops must be specified")
+            symmops = self.structure.spacegroup.symmops(time_sign=+1, afm_sign=+1)
+
+        if self.nspden == 4:
+            raise NotImplementedError("Symmetrization of non-collinear magnetization is not coded")
+
+        datar = self.mesh.symmetrize(self.datar, symmops)
+        return self.__class__(self.nspinor, self.nsppol, self.nspden, datar, self.structure, iorder="c")
+
     #def spheres_indexarr(self, symbrad=None):
     #    if not hasattr(self, "_cached_spheres_indexarr"):
     #        self._cached_spheres_indexarr = collections.deque(5)
@@ -412,30 +434,33 @@ class Density(ScalarField):
                                 total /= (nnx*nny*nnz)
                                 core_den[0, ix, iy, iz] += total
         elif method == 'mesh3d_dist_gridpoints':
-            site_coords = [site.coords for site in structure]
-            dist_gridpoints_sites = valence_density.mesh.dist_gridpoints_in_spheres(points=site_coords, radius=maxr)
-            for isite, dist_gridpoints_site in enumerate(dist_gridpoints_sites):
-                for igp_uc, dist, igp in dist_gridpoints_site:
-                    if dist > smallradius:
-                        core_den[0, igp_uc[0], igp_uc[1], igp_uc[2]] += rhoc_atom_splines[isite](dist)
-                    # For small distances, integrate over the small volume dv around the point as the core density
-                    # is extremely high close to the atom
-                    else:
-                        total = 0.0
-                        nnx, nny, nnz = small_dist_mesh
-                        ddvx = dvx/nnx
-                        ddvy = dvy/nny
-                        ddvz = dvz/nnz
-                        rpoint = valence_density.mesh.rpoint(ix=igp[0], iy=igp[1], iz=igp[2])
-                        rpi = rpoint - 0.5 * (dvx + dvy + dvz) + 0.5*ddvx + 0.5*ddvy + 0.5*ddvz
-                        for iix in range(nnx):
-                            for iiy in range(nny):
-                                for iiz in range(nnz):
-                                    rpoint2 = rpi + iix*ddvx + iiy*ddvy + iiz*ddvz
-                                    dist2 = np.linalg.norm(rpoint2 - site_coords[isite])
-                                    total += rhoc_atom_splines[isite](dist2)
-                        total /= (nnx*nny*nnz)
-                        core_den[0, igp_uc[0], igp_uc[1], igp_uc[2]] += total
+            mesh = valence_density.mesh
+            site_coords = np.array([site.coords for site in structure])
+            isites, igps, dists = mesh.gridpoints_in_spheres(points=site_coords, radius=maxr)
+
+            # For small distances, integrate over the small volume dv around the point as the core density
+            # is extremely high close to the atom. small_offsets are the centers of the sub-cells.
+            small_offsets = (np.reshape(np.indices(small_dist_mesh), (3, -1)).T + 0.5) / small_dist_mesh - 0.5
+            small_offsets = np.dot(small_offsets, np.array([dvx, dvy, dvz]))
+
+            values = np.empty(len(dists))
+            for isite in range(len(structure)):
+                mask = isites == isite
+                if not np.any(mask): continue
+                site_dists = dists[mask]
+                site_values = rhoc_atom_splines[isite](site_dists)
+
+                small = site_dists <= smallradius
+                if np.any(small):
+                    rpoints = np.dot(igps[mask][small], np.array([dvx, dvy, dvz]))
+                    rpoints2 = rpoints[:, np.newaxis, :] + small_offsets[np.newaxis, :, :]
+                    dists2 = np.sqrt(np.sum((rpoints2 - site_coords[isite]) ** 2, axis=-1))
+                    site_values[small] = np.reshape(rhoc_atom_splines[isite](dists2.ravel()), dists2.shape).mean(axis=1)
+
+                values[mask] = site_values
+
+            flat_inds = np.ravel_multi_index(np.mod(igps, mesh.shape).T, mesh.shape)
+            core_den[0] += np.reshape(np.bincount(flat_inds, weights=values, minlength=mesh.size), mesh.shape)
         else:
             raise ValueError('Method "{}" is not allowed'.format(method))
         if nelec is not None:
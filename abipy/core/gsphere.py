@@ -36,6 +36,11 @@ class GSphere(collections.Sequence):
         if istwfk != 1:
             raise NotImplementedError("istwfk %d is not implemented" % self.istwfk)
 
+        # Cache mesh.shape --> flat indices of the G-vectors in the FFT box.
+        self._fft_indices = {}
+        # Cache (rot_g, time_sign) --> rotated G-sphere.
+        self._rotated = {}
+
     @property
     def gvecs(self):
         """ndarray with the G-vectors in reduced coordinates."""
@@ -147,79 +152,90 @@ class GSphere(collections.Sequence):
     #  """Returns the number of divisions of the FFT box enclosing the sphere."""
     #  #return ndivs
 
+    def fft_indices(self, mesh):
+        """
+        Return the indices of the G-vectors in the flattened FFT box associated to mesh
+        (C-ordering, G-vectors with negative components are wrapped around).
+        The table is computed once and cached for each mesh.shape.
+
+        Raises:
+            ValueError if the G-sphere does not fit in the FFT box.
+        """
+        shape = tuple(mesh.shape)
+        try:
+            return self._fft_indices[shape]
+        except KeyError:
+            pass
+
+        if self.istwfk != 1:
+            raise NotImplementedError("istwfk = %s not implemented" % self.istwfk)
+
+        #do ipw=1,npw
+        #  i1=kg_k(1,ipw); if(i1<0)i1=i1+n1; i1=i1+1
+        #  i2=kg_k(2,ipw); if(i2<0)i2=i2+n2; i2=i2+1
+        #  i3=kg_k(3,ipw); if(i3<0)i3=i3+n3; i3=i3+1
+        #end do
+        ndivs = np.array(shape, dtype=np.int)
+        gvecs = np.asarray(self.gvecs, dtype=np.int)
+        if np.any(gvecs >= ndivs) or np.any(gvecs < -ndivs):
+            raise ValueError("G-sphere does not fit in FFT mesh with divisions %s" % str(shape))
+
+        i1, i2, i3 = (np.where(gvecs < 0, gvecs + ndivs, gvecs)).T
+        inds = (i1 * shape[1] + i2) * shape[2] + i3
+        self._fft_indices[shape] = inds
+
+        return inds
+
     def tofftmesh(self, mesh, arr_on_sphere):
         """
         Insert the array arr_on_sphere given on the sphere inside the FFT mesh.
 
         Args:
-            mesh:
-            arr_on_sphere:
+            mesh: :class:`Mesh3D` object.
+            arr_on_sphere: Array of shape [..., npw]. Leading dimensions (e.g. bands, spinors)
+                are transferred with a single fancy-indexing operation.
+
+        Returns:
+            Array of shape [..., nx, ny, nz]. An input array of shape [npw] or [1, npw]
+            gives an array with shape [nx, ny, nz].
         """
         arr_on_sphere = np.atleast_2d(arr_on_sphere)
         ishape = arr_on_sphere.shape
-        s0 = ishape[0]
         assert self.npw == ishape[-1]
 
-        arr_on_mesh = np.zeros((s0,) + mesh.shape, dtype=arr_on_sphere.dtype)
-
-        if self.istwfk == 1:
-            #do ipw=1,npw
-            #  i1=kg_k(1,ipw); if(i1<0)i1=i1+n1; i1=i1+1
-            #  i2=kg_k(2,ipw); if(i2<0)i2=i2+n2; i2=i2+1
-            #  i3=kg_k(3,ipw); if(i3<0)i3=i3+n3; i3=i3+1
-            #end do
-
-            (n1, n2, n3) = mesh.shape
-            for sph_idx, gvec in enumerate(self.gvecs):
-                i1 = gvec[0]
-                if i1 < 0: i1 = i1 + n1
-                i2 = gvec[1]
-                if i2 < 0: i2 = i2 + n2
-                i3 = gvec[2]
-                if i3 < 0: i3 = i3 + n3
-                arr_on_mesh[..., i1, i2, i3] = arr_on_sphere[..., sph_idx]
+        inds = self.fft_indices(mesh)
+        extra = ishape[:-1]
+        arr_on_mesh = np.zeros(extra + (mesh.size,), dtype=arr_on_sphere.dtype)
+        arr_on_mesh[..., inds] = arr_on_sphere
 
-        else:
-            raise NotImplementedError("istwfk = %s not implemented" % self.istwfk)
-
-        if s0 == 1:
+        if len(extra) == 1 and extra[0] == 1:
             # Reinstate input shape
-            arr_on_mesh.shape = mesh.shape
+            return np.reshape(arr_on_mesh, mesh.shape)
 
-        return arr_on_mesh
+        return np.reshape(arr_on_mesh, extra + tuple(mesh.shape))
 
     def fromfftmesh(self, mesh, arr_on_mesh):
         """
         Transfer arr_on_mesh given on the FFT mesh to the G-sphere.
-        """
-        indim =  arr_on_mesh.ndim
-        arr_on_mesh = mesh.reshape(arr_on_mesh)
-        ishape = arr_on_mesh.shape
-        s0 = ishape[0]
-
-        arr_on_sphere = np.empty((s0,) + (self.npw,), dtype=arr_on_mesh.dtype)
-
-        if self.istwfk == 1:
-            #do ig=1,npwout
-            #  i1=kg_kout(1,ig); if (i1<0) i1=i1+n1; i1=i1+1
-            #  i2=kg_kout(2,ig); if (i2<0) i2=i2+n2; i2=i2+1
-            #  i3=kg_kout(3,ig); if (i3<0) i3=i3+n3; i3=i3+1
-            #end do
-            (n1, n2, n3) = mesh.shape
-
-            for sph_idx, gvec in enumerate(self.gvecs):
-                i1 = gvec[0]
-                if i1 < 0: i1 = i1 + n1
-                i2 = gvec[1]
-                if i2 < 0: i2 = i2 + n2
-                i3 = gvec[2]
-                if i3 < 0: i3 = i3 + n3
-                arr_on_sphere[..., sph_idx] = arr_on_mesh[..., i1, i2, i3]
 
+        Args:
+            mesh: :class:`Mesh3D` object.
+            arr_on_mesh: Array of shape [..., nx, ny, nz] or flattened array with size
+                multiple of mesh.size.
+
+        Returns:
+            Array of shape [..., npw]
+        """
+        indim = arr_on_mesh.ndim
+        if indim > 4 and tuple(arr_on_mesh.shape[-3:]) == tuple(mesh.shape):
+            extra = arr_on_mesh.shape[:-3]
         else:
-            raise NotImplementedError("istwfk %s is not implemented" % self.istwfk)
+            extra = mesh.reshape(arr_on_mesh).shape[:1]
+
+        inds = self.fft_indices(mesh)
+        arr_on_sphere = np.reshape(arr_on_mesh, extra + (mesh.size,))[..., inds]
 
-        if s0 == 1 and indim == 1:
+        if indim == 1 and extra[0] == 1:
             # Reinstate input shape
             arr_on_sphere.shape = self.npw
 
@@ -228,10 +244,18 @@ class GSphere(collections.Sequence):
     def rotate(self, symmop):
         """
         Returns a new `GSphere` centered on Sk.
+        The rotated sphere depends only on the rotational part of symmop and
+        on time-reversal hence it is computed once and cached.
 
         Args:
             symmop: Symmetry operation object.
         """
+        key = tuple(np.ravel(symmop.rot_g)) + (symmop.time_sign,)
+        try:
+            return self._rotated[key]
+        except KeyError:
+            pass
+
         # The problem in this approach is that G-spheres centered on the
         # same k-point might have G-vectors ordered in a different way
         # and therefore one cannot operate on two wavefunctions in reciprocal space
@@ -250,8 +274,37 @@ class GSphere(collections.Sequence):
         rot_istwfk = self.istwfk
 
         new = self.__class__(self.ecut, self.lattice, rot_kpt, rot_gvecs, istwfk=rot_istwfk)
+        self._rotated[key] = new
         return new
 
+    def rotated_fft_indices(self, symmops, mesh):
+        """
+        Return the indices of the rotated G-vectors S(G) in the flattened FFT box for all
+        the operations in symmops. The tables of the rotated spheres are cached.
+
+        Returns:
+            Integer array of shape [nsym, npw].
+        """
+        return np.array([self.rotate(symmop).fft_indices(mesh) for symmop in symmops])
+
+    def rotation_phases(self, symmops):
+        """
+        Phase factors e^{-i(Sk + SG).tau} associated to the non-symmorphic
+        translations of the operations in symmops.
+
+        Returns:
+            Complex array of shape [nsym, npw].
+        """
+        phases = np.ones((len(symmops), self.npw), dtype=np.complex)
+
+        for isym, symmop in enumerate(symmops):
+            if np.allclose(symmop.tau, np.zeros(3)): continue
+            rot_gsphere = self.rotate(symmop)
+            rot_kpt = rot_gsphere.kpoint.frac_coords
+            phases[isym] = np.exp(-2j * np.pi * np.dot(rot_gsphere.gvecs + rot_kpt, symmop.tau))
+
+        return phases
+
 
 #def kpg_sphere(lattice, kcoords, ecut):
 #    """
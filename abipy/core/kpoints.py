@@ -29,11 +29,20 @@ __all__ = [
     "IrredZone",
     "rc_list",
     "kmesh_from_mpdivs",
+    "map_bz2ibz",
+    "kpoints_intkeys",
 ]
 
 # Tolerance used to compare k-points.
 _ATOL_KDIFF = 1e-8
 
+# Spacing of the grid used to hash k-points in reduced coordinates (must be >> _ATOL_KDIFF).
+_KHASH_STEP = 1e-3
+
+# Spacing of the grid used to convert k-points into integer keys in the vectorized routines.
+# Points whose reduced coordinates (modulo 1) are rounded to the same point of the grid are considered equal.
+_KGRID_STEP = 1e-6
+
 
 def set_atol_kdiff(new_atol):
     """
@@ -67,6 +76,17 @@ def is_integer(x, atol=None):
     #        np.abs(int_x[2] - x[2]) < atol )
 
 
+def is_integer_rows(x, atol=None):
+    """
+    Vectorized version of `is_integer` operating on the last axis of x.
+    Returns boolean array with shape x.shape[:-1].
+    """
+    if atol is None: atol = _ATOL_KDIFF
+    x = np.asarray(x)
+    # Same criterion as np.allclose(np.around(x), x, atol=atol)
+    return np.all(np.abs(np.around(x) - x) <= atol + 1e-5 * np.abs(x), axis=-1)
+
+
 def issamek(k1, k2, atol=None):
     """
     True if k1 and k2 are equal modulo a lattice vector.
@@ -174,6 +194,112 @@ def kmesh_from_mpdivs(mpdivs, shifts, pbc=False, order="bz"):
     return np.array(kbz)
 
 
+Bz2IbzMap = collections.namedtuple("Bz2IbzMap", "bz2ibz, bz2isym, bz2timrev")
+
+
+def map_bz2ibz(bz, ibz, symmops, mpdivs, shifts, atol=None):
+    """
+    Map the points of a homogeneous mesh in the BZ onto the points in the IBZ.
+    All the IBZ points are rotated by all the symmetry operations at once, converted into
+    integer indices of the mesh defined by mpdivs and shifts and inverted with a lookup table.
+
+    Args:
+        bz: Reduced coordinates of the points in the BZ. Array of shape [nbz, 3].
+        ibz: Reduced coordinates of the points in the IBZ. Array of shape [nibz, 3].
+        symmops: List of symmetry operations (:class:`SymmOp` objects) e.g. :class:`SpaceGroup`.
+        mpdivs: The three MP divisions.
+        shifts: Array-like object with the MP shifts.
+        atol: Tolerance used to check if a point belongs to the mesh. Use _ATOL_KDIFF if None.
+
+    Returns:
+        namedtuple with the following integer arrays of shape [nbz]:
+
+            - bz2ibz: index of the IBZ point. -1 if the point cannot be reconstructed from the IBZ.
+            - bz2isym: index of the symmetry operation such that bz[ik] = S ibz[bz2ibz[ik]] + G.
+            - bz2timrev: 1 if the operation includes time-reversal else 0.
+
+        If several (ibz, isym) pairs give the same point, the first IBZ point
+        and then the first operation are selected.
+    """
+    if atol is None: atol = _ATOL_KDIFF
+    bz, ibz = np.reshape(bz, (-1, 3)), np.reshape(ibz, (-1, 3))
+    mpdivs = np.array(mpdivs, dtype=np.int)
+    shifts = np.reshape(shifts, (-1, 3))
+    nsym = len(symmops)
+
+    # Rotate all the IBZ points: krot[ik_ibz, isym] = time_sign * S k
+    rots = np.array([op.rot_g * op.time_sign for op in symmops])
+    krots = np.einsum("sij,kj->ksi", rots, ibz)
+
+    # Linear index in the mesh for each (ibz, isym). -1 if not on the mesh.
+    rot_inds = _kmesh_indices(np.reshape(krots, (-1, 3)), mpdivs, shifts, atol)
+    bz_inds = _kmesh_indices(bz, mpdivs, shifts, atol)
+
+    # Lookup table mesh_index --> first (ibz, isym) pair giving this point.
+    table = -np.ones(len(shifts) * np.prod(mpdivs), dtype=np.int)
+    onmesh = np.nonzero(rot_inds != -1)[0]
+    uniq, first = np.unique(rot_inds[onmesh], return_index=True)
+    table[uniq] = onmesh[first]
+
+    bz2ibz = -np.ones(len(bz), dtype=np.int)
+    bz2isym = -np.ones(len(bz), dtype=np.int)
+    found = bz_inds != -1
+    pairs = table[bz_inds[found]]
+    ok = pairs != -1
+    bz2ibz[np.nonzero(found)[0][ok]] = pairs[ok] // nsym
+    bz2isym[np.nonzero(found)[0][ok]] = pairs[ok] % nsym
+
+    time_signs = np.array([op.time_sign for op in symmops])
+    bz2timrev = np.where(bz2isym != -1, time_signs[bz2isym] == -1, 0).astype(np.int)
+
+    return Bz2IbzMap(bz2ibz=bz2ibz, bz2isym=bz2isym, bz2timrev=bz2timrev)
+
+
+def _kmesh_indices(frac_coords, mpdivs, shifts, atol):
+    """
+    Return the linear index of the k-points in the mesh defined by mpdivs and shifts
+    (the block associated to the first shift comes first). -1 if the point does not belong to the mesh.
+    """
+    inds = -np.ones(len(frac_coords), dtype=np.int)
+    nmesh = np.prod(mpdivs)
+
+    for ish, shift in enumerate(shifts):
+        x = frac_coords * mpdivs - shift
+        ix = np.rint(x)
+        onmesh = np.all(np.abs(x - ix) <= atol * mpdivs, axis=1) & (inds == -1)
+        ix = np.mod(np.array(ix[onmesh], dtype=np.int), mpdivs)
+        inds[onmesh] = ish * nmesh + (ix[:, 0] * mpdivs[1] + ix[:, 1]) * mpdivs[2] + ix[:, 2]
+
+    return inds
+
+
+def _khash_keys(frac_coords):
+    """
+    Integer coordinates of the cells of the hash grid containing the k-points
+    (k-points are wrapped to [0, 1[). Array of shape [nk, 3].
+    """
+    nsteps = int(round(1 / _KHASH_STEP))
+    x = wrap_to_bz(np.reshape(frac_coords, (-1, 3))) / _KHASH_STEP
+    return np.mod(np.array(np.rint(x), dtype=np.int), nsteps)
+
+
+def kpoints_intkeys(frac_coords):
+    """
+    Convert k-points into integer keys so that points that are equal modulo a reciprocal lattice
+    vector have the same key. Coordinates are wrapped to [0, 1[ and rounded to a grid with step `_KGRID_STEP`.
+
+    Args:
+        frac_coords: Array of shape [..., 3] with reduced coordinates.
+
+    Returns:
+        int64 array of shape [...].
+    """
+    nsteps = int(round(1 / _KGRID_STEP))
+    ix = np.rint(wrap_to_bz(np.asarray(frac_coords, dtype=np.float)) / _KGRID_STEP).astype(np.int64)
+    ix = np.mod(ix, nsteps)
+    return (ix[..., 0] * nsteps + ix[..., 1]) * nsteps + ix[..., 2]
+
+
 class KpointsError(Exception):
     """Base error class for KpointList exceptions."""
 
@@ -401,16 +527,13 @@ class Kpoint(SlotPickleMixin):
 
     def compute_star(self, symmops, wrap_tows=True):
         """Return the star of the kpoint (tuple of `Kpoint` objects)."""
-        frac_coords = [self.frac_coords]
-
-        for sym in symmops:
-            sk_coords = sym.rotate_k(self.frac_coords, wrap_tows=wrap_tows)
-
-            # Add it only if it's not already in the list.
-            for prev_coords in frac_coords:
-                if issamek(sk_coords, prev_coords): break
-            else:
-                frac_coords.append(sk_coords)
+        # Rotate the point with all the operations at once and keep the first occurrence of each image.
+        rots = np.reshape([op.rot_g * op.time_sign for op in symmops], (-1, 3, 3))
+        sk_coords = np.concatenate([[self.frac_coords], np.einsum("sij,j->si", rots, self.frac_coords)])
+        _, first = np.unique(kpoints_intkeys(sk_coords), return_index=True)
+        frac_coords = sk_coords[np.sort(first)]
+        if wrap_tows:
+            frac_coords[1:] = wrap_to_ws(frac_coords[1:])
 
         return KpointStar(self.lattice, frac_coords, weights=None, names=len(frac_coords) * [self.name])
 
@@ -532,7 +655,7 @@ class KpointList(collections.Sequence):
         return self._points[slice]
 
     def __contains__(self, kpoint):
-        return kpoint in self._points
+        return self.find(kpoint) != -1
 
     def __reversed__(self):
         return self._points.__reversed__()
@@ -562,11 +685,82 @@ class KpointList(collections.Sequence):
 
         Raises: ValueError if not found.
         """
-        try:
-            return self._points.index(kpoint)
-        except ValueError:
+        ik = self.index_many(getattr(kpoint, "frac_coords", kpoint))[0]
+        if ik == -1:
             raise ValueError("Cannot find point: %s in KpointList:\n%s" % (repr(kpoint), repr(self)))
 
+        return ik
+
+    @lazy_property
+    def _khash_table(self):
+        """
+        Dictionary mapping the cell of the hash grid (k-points wrapped to [0, 1[)
+        to the list of indices of the k-points in the cell. Built on first use.
+        KpointList does not provide methods to change the points hence the table is never invalidated.
+        """
+        table = collections.defaultdict(list)
+        for ik, key in enumerate(_khash_keys(self.frac_coords)):
+            table[tuple(key)].append(ik)
+
+        return dict(table)
+
+    @lazy_property
+    def _kabsmax(self):
+        """Max absolute value of the reduced coordinates in self. Used to compute the tolerance of the hash grid."""
+        return np.abs(self.frac_coords).max()
+
+    def index_many(self, frac_coords):
+        """
+        Find the (first) index in self of each k-point in frac_coords (k-points are compared
+        modulo reciprocal lattice vectors). The lookup uses a hash table of the k-points in self.
+
+        Args:
+            frac_coords: Array-like object with the reduced coordinates of the k-points. Shape [nk, 3].
+
+        Returns:
+            Integer array with the indices. -1 if the k-point is not in self.
+        """
+        frac_coords = np.reshape(np.asarray(frac_coords, dtype=np.float), (-1, 3))
+        if len(self) == 0: return -np.ones(len(frac_coords), dtype=np.int)
+
+        # Tolerance on the difference in units of the hash grid.
+        # issamek uses np.allclose hence the tolerance increases with the lattice vector.
+        gmax = np.abs(frac_coords).max() + self._kabsmax + 1
+        tol = (_ATOL_KDIFF + 1e-5 * gmax) / _KHASH_STEP
+        if tol >= 0.5:
+            # Tolerance is too large for the hash grid, fallback to linear search.
+            return np.array([self._linear_find(k) for k in frac_coords], dtype=np.int)
+
+        x = wrap_to_bz(frac_coords) / _KHASH_STEP
+        keys = _khash_keys(frac_coords)
+        # Points close to the boundary of the cell may have their images in the neighboring cell.
+        border = np.abs(np.abs(x - np.rint(x)) - 0.5) <= tol
+        shift = np.where(x - np.rint(x) > 0, 1, -1)
+        nsteps = int(round(1 / _KHASH_STEP))
+
+        table, points = self._khash_table, self._points
+        indices = -np.ones(len(frac_coords), dtype=np.int)
+
+        for i, kcoords in enumerate(frac_coords):
+            cells = [keys[i]]
+            for idir in np.nonzero(border[i])[0]:
+                for cell in list(cells):
+                    cell = cell.copy()
+                    cell[idir] = (cell[idir] + shift[i, idir]) % nsteps
+                    cells.append(cell)
+
+            found = [ik for cell in cells for ik in table.get(tuple(cell), ())
+                     if issamek(points[ik].frac_coords, kcoords)]
+            if found: indices[i] = min(found)
+
+        return indices
+
+    def _linear_find(self, frac_coords):
+        """Linear search. Return the first index of frac_coords in self or -1 if not found."""
+        for ik, kpoint in enumerate(self):
+            if issamek(kpoint.frac_coords, frac_coords): return ik
+        return -1
+
     def find(self, kpoint):
         """
         Returns: first index of kpoint. -1 if not found
@@ -631,18 +825,8 @@ class KpointList(collections.Sequence):
         """
         Remove duplicated k-points from self. Returns new KpointList instance.
         """
-        frac_coords, good_indices = [self[0].frac_coords], [0]
-
-        for i, kpoint in enumerate(self[1:]):
-            i += 1
-            # Add it only if it's not already in the list.
-            for prev_coords in frac_coords:
-                if issamek(kpoint.frac_coords, prev_coords): break
-            else:
-                frac_coords.append(kpoint.frac_coords)
-                good_indices.append(i)
-
-        good_kpoints = [self[i] for i in good_indices]
+        _, first = np.unique(kpoints_intkeys(self.frac_coords), return_index=True)
+        good_kpoints = [self[i] for i in np.sort(first)]
 
         return self.__class__(
                 self.reciprocal_lattice,
@@ -65,6 +65,11 @@ class Mesh3D(object):
         self.dvy = self.vectors[1] / self.ny
         self.dvz = self.vectors[2] / self.nz
 
+        # Cache symmetry operations --> irottable.
+        self._irottables = {}
+        # Cache radius --> stencil of grid points.
+        self._sphere_stencils = {}
+
     def __len__(self):
         return self.size
 
@@ -338,64 +343,100 @@ class Mesh3D(object):
             raise ValueError("Wrong plane %s" % plane)
 
     def irottable(self, symmops):
+        """
+        Compute the indices of the points :math:`R^{-1}(r-\tau)` in the flattened FFT box (C-ordering)
+        for all the operations in symmops. The table is computed with array operations
+        and cached for each set of symmetries.
+
+        Args:
+            symmops: List of symmetry operations e.g. :class:`SpaceGroup`.
+
+        Returns:
+            Integer array of shape [nsym, nx*ny*nz].
+        """
+        key = tuple((tuple(np.ravel(op.rotm1_r)), tuple(np.round(op.tau, decimals=8))) for op in symmops)
+        try:
+            return self._irottables[key]
+        except KeyError:
+            pass
+
         nsym = len(symmops)
         nx, ny, nz = self.nx, self.ny, self.nz
 
         red2fft = np.diag([nx, ny, nz])
         fft2red = np.diag([1/nx, 1/ny, 1/nz])
 
-        # For a fully compatible mesh, each mat in rotsm1_fft should be integer
-        rotsm1_fft, tnons_fft = np.empty((nsym,3,3)), np.empty((nsym,3))
+        # Reduced coordinates of the points in the FFT basis, shape [3, nfft]
+        points = np.reshape(np.indices(self.shape), (3, -1))
+        nxyz = np.reshape(np.array(self.shape, dtype=np.int), (3, 1))
+
+        # Indices of $R^{-1}(r-\tau)$ in the FFT box.
+        irottable = np.empty((nsym, self.size), dtype=np.int)
 
         for isym, symmop in enumerate(symmops):
-            rotm1_r, tau = symmop.rotm1_r, symmop.tau
-            rotsm1_fft[isym] = np.dot(np.dot(red2fft, rotm1_r), fft2red)
-            tnons_fft[isym] = np.dot(red2fft, tau)
-
-        # Indeces of $R^{-1}(r-\tau)$ in the FFT box.
-        irottable = np.empty((nsym, nx*ny*nz), dtype=np.int)
-
-        #max_err = 0.0
-        nxyz = np.array((nx, ny, nz), np.int)
-        for isym in range(nsym):
-            rm1_fft = rotsm1_fft[isym]
-            tau_fft = tnons_fft[isym]
-            for ifft, p1_fft in enumerate(iproduct(range(nx), range(ny), range(nz))):
-                # Form R^-1 (r-\tau) in the FFT basis.
-                p1_fft = np.array(p1_fft)
-                prot_fft = np.dot(rm1_fft, p1_fft - tau_fft)
-                #err = ABS(prot_fft - (ix, iy, iz)) / (nx, ny, nz)
-                prot_fft = np.round(prot_fft)
-                jx, jy, jz = prot_fft % nxyz
-                irottable[isym, ifft] = jz + (jy * nz) + (jx * nx * ny)
-
-        # Test
-        #for isym in range(nsym):
-        #    irottable[isym, ifft]
-        #    rm1_fft = rotsm1_fft[isym]
-        #    tau_fft = tnons_fft[isym]
-        #    for ifft, p1_fft in enumerate(itertools.product(range(nx), range(ny), range(nz))):
-        #        irot_fft == irottable[isym, ifft]
+            # For a fully compatible mesh, rm1_fft should be integer
+            rm1_fft = np.dot(np.dot(red2fft, symmop.rotm1_r), fft2red)
+            tau_fft = np.dot(red2fft, symmop.tau)
+
+            # Form R^-1 (r-\tau) in the FFT basis and wrap it in the box.
+            prot_fft = np.dot(rm1_fft, points - tau_fft[:, np.newaxis])
+            jx, jy, jz = np.array(np.rint(prot_fft), dtype=np.int) % nxyz
+            irottable[isym] = jz + (jy * nz) + (jx * ny * nz)
 
+        self._irottables[key] = irottable
         return irottable
 
+    def symmetrize(self, fr, symmops):
+        """
+        Symmetrize the array fr given in real space:
+
+            :math:`f_{sym}(r) = \frac{1}{N_{sym}} \sum_R f(R^{-1}(r-\tau))`
+
+        Args:
+            fr: Array of shape [..., nx, ny, nz] or flattened array with size multiple of mesh.size
+            symmops: List of symmetry operations.
+
+        Returns:
+            Array with the same shape as fr.
+        """
+        irottable = self.irottable(symmops)
+
+        fr = np.asarray(fr)
+        fr_flat = np.reshape(fr, (-1, self.size))
+        sym_fr = np.zeros(fr_flat.shape, dtype=np.result_type(fr_flat, np.float))
+        for irot in irottable:
+            sym_fr += fr_flat[:, irot]
+
+        sym_fr /= len(irottable)
+        return np.reshape(sym_fr, fr.shape)
+
     def i_closest_gridpoints(self, points):
-        inv_vectors = self.inv_vectors
-        fcoords = [np.dot(point, inv_vectors) for point in points]
-        return [[np.mod(int(np.rint(pc[ii]*self.shape[ii])), self.nx) for ii in range(3)] for pc in fcoords]
-        # return [(int(np.rint(pc[ii]*self.nx)), int(np.rint(pc[0]*self.nx)),int(np.rint(pc[0]*self.nx))) for pc in coords]
-        # ix = int(np.rint(coords[0]*self.nx))
-        # iy = int(np.rint(coords[1]*self.ny))
-        # iz = int(np.rint(coords[2]*self.nz))
-        # return (ix, iy, iz)
+        """
+        Return the indices of the grid points closest to points (cartesian coordinates),
+        wrapped inside the FFT box. Integer array of shape [npoints, 3].
+        """
+        return np.mod(self._closest_gridpoints(points), self.shape)
+
+    def _closest_gridpoints(self, points):
+        """Indices of the closest grid points (not wrapped in the box). Integer array [npoints, 3]."""
+        fcoords = np.dot(np.reshape(points, (-1, 3)), self.inv_vectors)
+        return np.array(np.rint(fcoords * self.shape), dtype=np.int)
+
+    def sphere_stencil(self, radius):
+        """
+        Integer offsets of the grid points that can be at distance <= radius from a point
+        whose closest grid point is the origin. The stencil is computed once for each radius.
+
+        Returns:
+            (offsets, cart_offsets) where offsets is an integer array of shape [nstencil, 3]
+            and cart_offsets gives the cartesian coordinates of the offsets.
+        """
+        radius = float(radius)
+        try:
+            return self._sphere_stencils[radius]
+        except KeyError:
+            pass
 
-    def dist_gridpoints_in_spheres(self, points, radius):
-        # c_ab = np.cross(self.vectors[0], self.vectors[1])
-        # c_bc = np.cross(self.vectors[1], self.vectors[2])
-        # c_ca = np.cross(self.vectors[2], self.vectors[0])
-        # h_ab = np.abs(np.dot(c_ab, self.vectors[2]) / np.linalg.norm(c_ab))
-        # h_bc = np.abs(np.dot(c_bc, self.vectors[0]) / np.linalg.norm(c_bc))
-        # h_ca = np.abs(np.dot(c_ca, self.vectors[1]) / np.linalg.norm(c_ca))
         maxdiag = max([np.linalg.norm(self.dvx+self.dvy+self.dvz),
                        np.linalg.norm(self.dvx+self.dvy-self.dvz),
                        np.linalg.norm(self.dvx-self.dvy+self.dvz),
@@ -409,33 +450,103 @@ class Mesh3D(object):
         a_factor = 1.01 * (radius+0.5*maxdiag) / h_bc
         b_factor = 1.01 * (radius+0.5*maxdiag) / h_ca
         c_factor = 1.01 * (radius+0.5*maxdiag) / h_ab
-        # print('HEIGHTS')
-        # print(h_ab, h_bc, h_ca)
-        # print(c_factor*h_ab, a_factor* h_bc, b_factor*h_ca)
-        mins = np.array(np.floor([-a_factor, -b_factor, -c_factor]), dtype=int)
-        maxes = np.array(np.ceil([a_factor, b_factor, c_factor]), dtype=int)
-        # print('AAAMINS AND MAXES', mins, maxes)
-        # maxes = np.ceil(nmax)
-        i_closest_gridpoint_points = self.i_closest_gridpoints(points=points)
-        dist_gridpoints_points = []
-        r2 = radius**2
-        for ipoint, point_i_closest_gridpoint in enumerate(i_closest_gridpoint_points):
-            pp = points[ipoint]
-            dist_gridpoints = []
-            for ix in range(int(mins[0]), int(maxes[0])):
-                ipx = point_i_closest_gridpoint[0] + ix
-                for iy in range(int(mins[1]), int(maxes[1])):
-                    ipy = point_i_closest_gridpoint[1] + iy
-                    for iz in range(int(mins[2]), int(maxes[2])):
-                        ipz = point_i_closest_gridpoint[2] + iz
-                        gp = ipx*self.dvx + ipy * self.dvy + ipz * self.dvz
-                        dist2_gp_pp = np.dot(pp-gp, pp-gp)
-                        if dist2_gp_pp <= r2:
-                            dist_gridpoints.append(((np.mod(ipx, self.nx), np.mod(ipy, self.ny), np.mod(ipz, self.nz)),
-                                                    np.sqrt(dist2_gp_pp), (ipx, ipy, ipz)))
-            dist_gridpoints_points.append(dist_gridpoints)
+        mins = np.array(np.floor([-a_factor, -b_factor, -c_factor]), dtype=np.int)
+        maxes = np.array(np.ceil([a_factor, b_factor, c_factor]), dtype=np.int)
+
+        # All the integer vectors in the box [mins, maxes] (ix is the slowest index).
+        offsets = np.reshape(np.indices(maxes - mins + 1), (3, -1)).T + mins
+        cart_offsets = np.dot(offsets, self._dvecs)
+
+        # The point is at most 0.5 * maxdiag from its closest grid point.
+        rmax = 1.01 * (radius + 0.5 * maxdiag)
+        keep = np.sum(cart_offsets ** 2, axis=1) <= rmax ** 2
+        stencil = offsets[keep], cart_offsets[keep]
+
+        self._sphere_stencils[radius] = stencil
+        return stencil
+
+    @property
+    def _dvecs(self):
+        """Matrix with dvx, dvy, dvz along the rows."""
+        return np.array([self.dvx, self.dvy, self.dvz])
+
+    def gridpoints_in_spheres(self, points, radius, chunk_size=2**20):
+        """
+        Find the grid points inside the spheres of given radius centered on points.
+        The stencil of the sphere is applied to all the points with broadcasting.
+
+        Args:
+            points: Cartesian coordinates of the centers. Array of shape [npoints, 3].
+            radius: Radius of the spheres (same units as the mesh vectors).
+            chunk_size: Approximate number of (point, stencil) pairs treated at once. Used to bound memory.
+
+        Returns:
+            (ipoints, inds, dists) where ipoints gives the index of the sphere, inds is an integer
+            array of shape [n, 3] with the indices of the grid points (not wrapped in the box)
+            and dists gives the distance between the grid point and the center.
+        """
+        points = np.reshape(points, (-1, 3))
+        offsets, cart_offsets = self.sphere_stencil(radius)
+        closest = self._closest_gridpoints(points)
+
+        # Position of the centers with respect to their closest grid point.
+        deltas = points - np.dot(closest, self._dvecs)
+
+        r2 = radius ** 2
+        step = max(1, chunk_size // max(1, len(offsets)))
+        ipoints, inds, dists = [], [], []
+        for start in range(0, len(points), step):
+            diff = cart_offsets[np.newaxis, :, :] - deltas[start:start+step, np.newaxis, :]
+            dist2 = np.sum(diff ** 2, axis=-1)
+            ip, ist = np.nonzero(dist2 <= r2)
+            ipoints.append(ip + start)
+            inds.append(closest[ip + start] + offsets[ist])
+            dists.append(np.sqrt(dist2[ip, ist]))
+
+        if not ipoints:
+            return np.empty(0, dtype=np.int), np.empty((0, 3), dtype=np.int), np.empty(0)
+
+        return np.concatenate(ipoints), np.concatenate(inds), np.concatenate(dists)
+
+    def dist_gridpoints_in_spheres(self, points, radius):
+        """
+        Return a list with the grid points inside the spheres centered on points.
+        Each item of the list is a list of tuples ((ix, iy, iz) wrapped in the box, distance, (ix, iy, iz)).
+        See also gridpoints_in_spheres for a version returning arrays.
+        """
+        ipoints, inds, dists = self.gridpoints_in_spheres(points, radius)
+        inds_uc = np.mod(inds, self.shape)
+
+        dist_gridpoints_points = [[] for _ in range(len(np.reshape(points, (-1, 3))))]
+        for ip, ind_uc, dist, ind in zip(ipoints, inds_uc, dists, inds):
+            dist_gridpoints_points[ip].append((tuple(ind_uc), dist, tuple(ind)))
+
         return dist_gridpoints_points
 
+    def integrate_in_spheres(self, fr, points, radius):
+        """
+        Integrate the array(s) fr inside the spheres of given radius centered on points
+        (e.g. charge inside atomic spheres).
+
+        Args:
+            fr: Array of shape [..., nx, ny, nz]
+            points: Cartesian coordinates of the centers. Array of shape [npoints, 3].
+            radius: Radius of the spheres.
+
+        Returns:
+            Array of shape [..., npoints]
+        """
+        npoints = len(np.reshape(points, (-1, 3)))
+        ipoints, inds, _ = self.gridpoints_in_spheres(points, radius)
+        flat_inds = np.ravel_multi_index(np.mod(inds, self.shape).T, self.shape)
+
+        fr = np.asarray(fr)
+        fr_flat = np.reshape(fr, (-1, self.size))
+        sums = np.zeros((fr_flat.shape[0], npoints), dtype=fr_flat.dtype)
+        np.add.at(sums, (slice(None), ipoints), fr_flat[:, flat_inds])
+
+        return np.reshape(sums, fr.shape[:-3] + (npoints,)) * self.dv
+
     # def dist2_gridpoints_in_spheres(self, points, radius):
     #     # c_ab = np.cross(self.vectors[0], self.vectors[1])
     #     # c_bc = np.cross(self.vectors[1], self.vectors[2])
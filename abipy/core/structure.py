@@ -874,78 +874,54 @@ class Structure(pymatgen.Structure):
             scale_matrix = np.eye(3, 3)
             return scale_matrix
 
-        l = max_supercell
+        return self.get_smallest_supercells([qpoint], max_supercell)[0]
 
+    def get_smallest_supercells(self, qpoints, max_supercell):
+        """
+        Compute the scaling matrices of the smallest supercells commensurate with a list of q-points.
+
+        Args:
+            qpoints: List of q vectors in reduced coordinates in reciprocal space
+            max_supercell: vector with the maximum supercell size
+
+        Returns: int array of shape [nq, 3, 3] with the scaling matrices (rows define the new lattice vectors).
+        """
         # Inspired from Exciting Fortran code phcell.F90
-        # It should be possible to improve this code taking advantage of python !
-        scale_matrix = np.zeros((3,3),dtype=np.int)
-        dmin = np.inf
-        found = False
-
-        # Try to reduce the matrix
-        rprimd = self.lattice.matrix
-        for l1 in np.arange(-l[0], l[0]+1):
-            for l2 in np.arange(-l[1], l[1]+1):
-                for l3 in np.arange(-l[2], l[2]+1):
-                    lnew = np.array([l1, l2, l3])
-                    ql = np.dot(lnew, qpoint)
-                    # Check if integer and non zero !
-                    if np.abs(ql - np.round(ql)) < 1e-6:
-                        Rl = np.dot(lnew, rprimd)
-                        # Normalize the displacement so that the maximum atomic displacement is 1 Angstrom.
-                        dnorm = np.sqrt(np.dot(Rl,Rl))
-                        if dnorm < (dmin-1e-6) and dnorm > 1e-6:
-                            found = True
-                            scale_matrix[:, 0] = lnew
-                            dmin = dnorm
-        if not found:
-            raise ValueError('max_supercell is not large enough for this q-point')
-
-        found = False
-        dmin = np.inf
-        for l1 in np.arange(-l[0], l[0]+1):
-            for l2 in np.arange(-l[1], l[1]+1):
-                for l3 in np.arange(-l[2], l[2]+1):
-                    lnew = np.array([l1, l2, l3])
-                    # Check if not parallel !
-                    cp = np.cross(lnew, scale_matrix[:,0])
-                    if np.dot(cp,cp) > 1e-6:
-                        ql = np.dot(lnew, qpoint)
-                        # Check if integer and non zero !
-                        if np.abs(ql - np.round(ql)) < 1e-6:
-                            Rl = np.dot(lnew, rprimd)
-                            dnorm = np.sqrt(np.dot(Rl, Rl))
-                            if dnorm < (dmin-1e-6) and dnorm > 1e-6:
-                                found = True
-                                scale_matrix[:, 1] = lnew
-                                dmin = dnorm
-        if not found:
-            raise ValueError('max_supercell is not large enough for this q-point')
-
-        dmin = np.inf
-        found = False
-        for l1 in np.arange(-l[0], l[0]+1):
-            for l2 in np.arange(-l[1], l[1]+1):
-                for l3 in np.arange(-l[2], l[2]+1):
-                    lnew = np.array([l1, l2, l3])
-                    # Check if not parallel !
-                    cp = np.dot(np.cross(lnew, scale_matrix[:, 0]), scale_matrix[:, 1])
-                    if cp > 1e-6:
-                        # Should be positive as (R3 X R1).R2 > 0 for abinit !
-                        ql = np.dot(lnew, qpoint)
-                        # Check if integer and non zero !
-                        if np.abs(ql - np.round(ql)) < 1e-6:
-                            Rl = np.dot(lnew, rprimd)
-                            dnorm = np.sqrt(np.dot(Rl,Rl))
-                            if dnorm < (dmin-1e-6) and dnorm > 1e-6:
-                                found = True
-                                scale_matrix[:, 2] = lnew
-                                dmin = dnorm
-        if not found:
-            raise ValueError('max_supercell is not large enough for this q-point')
-
-        # Fortran 2 python!!!
-        return scale_matrix.T
+        # All the integer vectors in [-l, l]^3 in the same order as the original triple loop.
+        l = np.array(max_supercell, dtype=np.int)
+        cands = np.array(np.meshgrid(*[np.arange(-n, n + 1) for n in l], indexing="ij")).reshape(3, -1).T
+        dnorms = np.sqrt(np.sum(np.dot(cands, self.lattice.matrix) ** 2, axis=1))
+        nonzero = dnorms > 1e-6
+
+        # Commensurate vectors: l.q must be integer for each q-point. Shape [nq, ncands]
+        qpoints = np.reshape(qpoints, (-1, 3))
+        ql = np.dot(qpoints, cands.T)
+        commensurate = (np.abs(ql - np.round(ql)) < 1e-6) & nonzero
+
+        def select_shortest(mask):
+            """Index of the shortest candidate in mask for each q-point. The first one is taken if degenerate."""
+            d = np.where(mask, dnorms, np.inf)
+            dmin = d.min(axis=1)
+            if not np.all(np.isfinite(dmin)):
+                raise ValueError('max_supercell is not large enough for this q-point')
+            return np.argmax(d < dmin[:, None] + 1e-6, axis=1)
+
+        # First vector: the shortest commensurate one.
+        v1 = cands[select_shortest(commensurate)]
+
+        # Second vector: the shortest one not parallel to v1.
+        cp = np.cross(cands[None, :, :], v1[:, None, :])
+        v2 = cands[select_shortest(commensurate & (np.sum(cp ** 2, axis=-1) > 1e-6))]
+
+        # Third vector: the shortest one such that (v3 x v1).v2 > 0 (positive volume as in abinit)
+        triple = np.einsum("qcx,qx->qc", cp, v2)
+        v3 = cands[select_shortest(commensurate & (triple > 1e-6))]
+
+        scale_matrices = np.array(np.stack([v1, v2, v3], axis=1), dtype=np.int)
+        # Gamma does not require a supercell.
+        scale_matrices[np.all(np.abs(qpoints) <= 1e-8, axis=1)] = np.eye(3, dtype=np.int)
+
+        return scale_matrices
 
     def get_trans_vect(self, scale_matrix):
         """
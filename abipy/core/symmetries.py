@@ -15,7 +15,7 @@ from monty.itertools import iuptri
 from monty.pprint import pprint_table
 from pymatgen.symmetry.analyzer import SpacegroupAnalyzer
 from pymatgen.serializers.pickle_coders import SlotPickleMixin
-from abipy.core.kpoints import wrap_to_ws, issamek
+from abipy.core.kpoints import wrap_to_ws, issamek, is_integer_rows, kpoints_intkeys
 from abipy.iotools import as_etsfreader
 
 
@@ -340,12 +340,104 @@ class SymmOp(Operation, SlotPickleMixin):
         Returns:
             rot_gvecs: `ndarray` with shape [ng, 3] containing the result of self(G).
         """
-        rot_gvecs = np.empty_like(gvecs)
+        gvecs = np.asarray(gvecs)
+        return (np.dot(gvecs, self.rot_g.T) * self.time_sign).astype(gvecs.dtype)
 
-        for ig, gvec in enumerate(gvecs):
-            rot_gvecs[ig] = np.dot(self.rot_g, gvec) * self.time_sign
 
-        return rot_gvecs
+# Cache with the multiplication tables and the classes of the sequences of operations
+# already analyzed. The key is computed from the integer representation of the operations.
+_OPSEQ_TABLES = {}
+
+# Fractional translations are represented by integers on a grid with this number of points.
+_TAU_GRID = 10**6
+
+
+def _stack_ops(ops):
+    """
+    Represent a list of operations (:class:`SymmOp` or :class:`LatticeRotation`) with stacked arrays.
+
+    Returns:
+        rots: int array [nops, 3, 3] with the rotations in reduced coordinates.
+        taus: float array [nops, 3] with the fractional translations.
+        signs: int array [nops, 2] with the time-reversal and the AFM signs.
+    """
+    nops = len(ops)
+    if all(isinstance(op, SymmOp) for op in ops):
+        rots = np.reshape([op.rot_r for op in ops], (nops, 3, 3))
+        taus = np.reshape([op.tau for op in ops], (nops, 3))
+        signs = np.reshape([(op.time_sign, op.afm_sign) for op in ops], (nops, 2))
+    else:
+        rots = np.reshape([np.asarray(op.mat) for op in ops], (nops, 3, 3))
+        taus = np.zeros((nops, 3))
+        signs = np.ones((nops, 2), dtype=np.int)
+
+    return np.asarray(rots, dtype=np.int), np.asarray(taus, dtype=np.double), np.asarray(signs, dtype=np.int)
+
+
+def _ops_intkeys(rots, taus, signs):
+    """
+    Canonical integer representation of the operations given in terms of stacked arrays.
+    Fractional translations are taken modulo 1. Returns int64 array [..., 14].
+    """
+    itaus = np.mod(np.rint(taus * _TAU_GRID).astype(np.int64), _TAU_GRID)
+    shape = rots.shape[:-2]
+    return np.concatenate([np.reshape(rots, shape + (9,)).astype(np.int64), itaus,
+                           np.asarray(signs, dtype=np.int64)], axis=-1)
+
+
+def _get_opseq_tables(ops):
+    """
+    Compute the multiplication table and the classes of a sequence of operations.
+    Results are cached so that sequences with the same operations (e.g. little groups
+    of the same space group) are analyzed only once.
+
+    Returns:
+        mult_table: int array [nops, nops]. mult_table[i, j] is the index of S_i * S_j, -1 if not in ops.
+        class_indices: List of lists with the indices of the operations in each class.
+            None if ops is not a group.
+    """
+    rots, taus, signs = _stack_ops(ops)
+    keys = _ops_intkeys(rots, taus, signs)
+    cache_key = (keys.shape, keys.tobytes())
+    try:
+        return _OPSEQ_TABLES[cache_key]
+    except KeyError:
+        pass
+
+    # {R_i,t_i} {R_j,t_j} = {R_i R_j, R_i t_j + t_i} for all (i, j)
+    nops = len(keys)
+    prod_rots = np.einsum("iab,jbc->ijac", rots, rots)
+    prod_taus = np.einsum("iab,jb->ija", rots, taus) + taus[:, None, :]
+    prod_signs = signs[:, None, :] * signs[None, :, :]
+    prod_keys = _ops_intkeys(prod_rots, prod_taus, prod_signs).reshape(nops * nops, -1)
+
+    # Map the keys of the products to the index of the (first) operation with the same key.
+    uniq, inverse = np.unique(np.concatenate([keys, prod_keys]), axis=0, return_inverse=True)
+    inverse = np.ravel(inverse)
+    uniq2op = np.full(len(uniq), -1, dtype=np.int)
+    uniq2op[inverse[:nops][::-1]] = np.arange(nops)[::-1]
+    mult_table = uniq2op[inverse[nops:]].reshape(nops, nops)
+
+    class_indices = None
+    identity = np.nonzero(np.all(keys == _ops_intkeys(np.eye(3, dtype=np.int), np.zeros(3), np.ones(2)), axis=1))[0]
+    is_closed = np.all(mult_table >= 0) and len(identity) == 1
+    if is_closed and np.all(np.any(mult_table == identity[0], axis=1)):
+        # conj[i, j] is the index of X_j^-1 S_i X_j.
+        inv_inds = np.argmax(mult_table == identity[0], axis=1)
+        conj = mult_table[mult_table[inv_inds].T, np.arange(nops)[None, :]]
+        found = np.zeros(nops, dtype=bool)
+        class_indices = []
+        for i in range(nops):
+            if found[i]: continue
+            # Indices in the order of first appearance.
+            _, first = np.unique(conj[i], return_index=True)
+            cls_inds = [int(k) for k in conj[i, np.sort(first)]]
+            found[cls_inds] = True
+            class_indices.append(cls_inds)
+
+    if len(_OPSEQ_TABLES) > 1000: _OPSEQ_TABLES.clear()
+    _OPSEQ_TABLES[cache_key] = mult_table, class_indices
+    return mult_table, class_indices
 
 
 class OpSequence(collections.Sequence):
@@ -428,18 +520,16 @@ class OpSequence(collections.Sequence):
         if [op.isE for op in self].count(True) != 1:
             check += 1
 
-        # The inverse must be in the set.
-        if [op.inverse() in self for op in self].count(True) != len(self):
-            check += 2
-
-        # The product of two members must be in the set.
-        op_prods = [op1 * op2 for op1 in self for op2 in self]
+        # The inverse must be in the set and the product of two members must be in the set.
+        mtable = self.mult_table
+        if check == 0:
+            ie = [op.isE for op in self].index(True)
+            if not np.all(np.any(mtable == ie, axis=1)):
+                check += 2
 
-        d = self.asdict()
-        for op12 in op_prods:
-            if op12 not in d:
-                print("op12 not in group\n %s" % str(op12))
-                check += 1
+        for i, j in zip(*np.nonzero(mtable < 0)):
+            print("op12 not in group\n %s" % str(self[i] * self[j]))
+            check += 1
 
         return check == 0
 
@@ -469,27 +559,13 @@ class OpSequence(collections.Sequence):
         """
         Given a set of nsym 3x3 operations which are supposed to form a group,
         this routine constructs the multiplication table of the group.
-        mtable[i,j] gives the index of the product S_i * S_j.
+        mtable[i,j] gives the index of the product S_i * S_j (-1 if the product is not in the set).
         """
         try:
             return self._mult_table
 
         except AttributeError:
-            mtable = np.empty((len(self), len(self)), dtype=np.int)
-
-            d = self.asdict()
-            for (i, op1) in enumerate(self):
-                for (j, op2) in enumerate(self):
-                    op12 = op1 * op2
-                    # Save the index of op12 in self
-                    try:
-                        index = d[op12]
-                    except KeyError:
-                        index = None
-
-                    mtable[i,j] = index
-
-            self._mult_table = mtable
+            self._mult_table, self._class_indices = _get_opseq_tables(self)
             return self._mult_table
 
     @property
@@ -509,30 +585,16 @@ class OpSequence(collections.Sequence):
             contains the indices of the class. len(l) equals the number of classes.
         """
         try:
-            return self._class_indices
+            class_indices = self._class_indices
 
         except AttributeError:
-            found, class_indices = len(self) * [False], [[] for i in range(len(self))]
-
-            num_classes = -1
-            for (ii, op1) in enumerate(self):
-                if found[ii]: continue
-                num_classes += 1
-
-                for (jj, op2) in enumerate(self):
-                    # Form conjugate and search it among the operations
-                    # that have not been found yet.
-                    op1_conj = op1.opconj(op2)
-
-                    for (kk, op3) in enumerate(self):
-                        if not found[kk] and op1_conj == op3:
-                            found[kk] = True
-                            class_indices[num_classes].append(kk)
+            self._mult_table, self._class_indices = _get_opseq_tables(self)
+            class_indices = self._class_indices
 
-            self._class_indices = class_indices[:num_classes+1]
+        if class_indices is None:
+            raise ValueError("Cannot compute classes: the operations do not form a group")
 
-            assert sum(len(c) for c in self._class_indices) == len(self)
-            return self._class_indices
+        return class_indices
 
     def groupby_class(self, with_inds=False):
         """
@@ -760,19 +822,141 @@ class SpaceGroup(OpSequence):
             :class:`LittleGroup` object.
         """
         frac_coords = getattr(kpoint, "frac_coords", kpoint)
-
-        to_spgrp, g0vecs = [], []
-
-        # Exclude AFM operations.
-        for isym, symmop in enumerate(self.fm_symmops):
-            is_same, g0 = symmop.preserve_k(frac_coords)
-            if is_same:
-                to_spgrp.append(isym)
-                g0vecs.append(g0)
+        mask, g0vecs = self.find_little_groups([frac_coords])
 
         # List with the symmetry operation that preserve the kpoint.
+        to_spgrp = np.nonzero(mask[0])[0]
         k_symmops = [self[i] for i in to_spgrp]
-        return LittleGroup(kpoint, k_symmops, g0vecs)
+        return LittleGroup(kpoint, k_symmops, g0vecs[0, to_spgrp])
+
+    # Batched operations on arrays of k-points.
+    # The symmetries are applied to all the k-points at once with the stacked rotations.
+
+    @property
+    def _krots(self):
+        """Stacked rotations in reciprocal space multiplied by the time-reversal sign. Shape [nsym, 3, 3]"""
+        try:
+            return self._krots_stack
+        except AttributeError:
+            self._krots_stack = np.array([op.rot_g * op.time_sign for op in self], dtype=np.int)
+            return self._krots_stack
+
+    def _kslices(self, nk, max_size):
+        """
+        Slices used to process nk k-points in chunks so that the [chunk, nsym, 3]
+        temporary arrays contain at most max_size elements.
+        """
+        chunk = max(1, max_size // (3 * len(self)))
+        return [slice(start, start + chunk) for start in range(0, nk, chunk)]
+
+    def rotate_kpoints(self, frac_coords):
+        """
+        Apply all the symmetry operations to a list of k-points in reduced coordinates.
+
+        Returns:
+            Array of shape [nk, nsym, 3] with S_i k.
+        """
+        frac_coords = np.reshape(frac_coords, (-1, 3))
+        return np.einsum("sij,kj->ksi", self._krots, frac_coords)
+
+    def find_little_groups(self, frac_coords, atol=None, max_size=2**20):
+        """
+        Find the operations that preserve the k-points modulo a reciprocal lattice vector. AFM operations are excluded.
+
+        Args:
+            frac_coords: Array-like with the reduced coordinates of the k-points. Shape [nk, 3]
+            atol: Tolerance on the reduced coordinates (see `issamek`).
+            max_size: Max number of elements in the temporary arrays (k-points are processed in chunks).
+
+        Returns:
+            mask: Boolean array [nk, nsym]. True if S_i k = k + G0.
+            g0vecs: Integer array [nk, nsym, 3] with G0 = S_i k - k.
+        """
+        frac_coords = np.reshape(frac_coords, (-1, 3))
+        nk, nsym = len(frac_coords), len(self)
+        mask = np.empty((nk, nsym), dtype=bool)
+        g0vecs = np.empty((nk, nsym, 3), dtype=np.int)
+        is_fm = np.array([op.is_fm for op in self], dtype=bool)
+
+        for ks in self._kslices(nk, max_size):
+            diff = self.rotate_kpoints(frac_coords[ks]) - frac_coords[ks, None, :]
+            g0vecs[ks] = np.round(diff)
+            mask[ks] = is_integer_rows(diff, atol=atol) & is_fm
+
+        return mask, g0vecs
+
+    def get_star_indices(self, frac_coords, max_size=2**20):
+        """
+        Compute the stars of a list of k-points.
+
+        Args:
+            frac_coords: Array-like with the reduced coordinates of the k-points. Shape [nk, 3]
+            max_size: Max number of elements in the temporary arrays (k-points are processed in chunks).
+
+        Returns:
+            List of nk integer arrays with the indices of the operations generating the distinct
+            points of the star (first operation for each point). The star of the i-th point
+            is given by `self.rotate_kpoints(frac_coords)[i, stars[i]]`.
+        """
+        frac_coords = np.reshape(frac_coords, (-1, 3))
+        stars = []
+        for ks in self._kslices(len(frac_coords), max_size):
+            kkeys = kpoints_intkeys(self.rotate_kpoints(frac_coords[ks]))
+            rows = np.arange(len(kkeys))[:, None]
+
+            # Stable sort so that the first element of each group of equal keys has the smallest operation index.
+            order = np.argsort(kkeys, axis=1, kind="mergesort")
+            skeys = kkeys[rows, order]
+            first = np.ones(kkeys.shape, dtype=bool)
+            first[:, 1:] = skeys[:, 1:] != skeys[:, :-1]
+
+            # Mark the operations in the original order so that np.nonzero returns sorted indices.
+            is_first = np.zeros(kkeys.shape, dtype=bool)
+            is_first[np.broadcast_to(rows, kkeys.shape)[first], order[first]] = True
+            _, isyms = np.nonzero(is_first)
+            stars.extend(np.split(isyms, np.cumsum(is_first.sum(axis=1))[:-1]))
+
+        return stars
+
+    def reduce_kpoints(self, frac_coords, max_size=2**20):
+        """
+        Reduce a list of k-points to the irreducible set using the symmetries of the space group.
+        Two k-points are equivalent if one of them is in the star of the other.
+
+        Args:
+            frac_coords: Array-like with the reduced coordinates of the k-points. Shape [nk, 3]
+            max_size: Max number of elements in the temporary arrays (k-points are processed in chunks).
+
+        Returns:
+            namedtuple with:
+
+                - ibz_inds: Indices of the irreducible points in frac_coords (first point of each class).
+                - k2ibz: Index in ibz_inds of the irreducible point equivalent to each k-point.
+                - weights: Number of k-points mapped onto each irreducible point divided by nk.
+        """
+        frac_coords = np.reshape(frac_coords, (-1, 3))
+        if len(frac_coords) == 0:
+            return KpointReduction(ibz_inds=np.array([], dtype=np.int), k2ibz=np.array([], dtype=np.int),
+                                   weights=np.array([]))
+
+        # Label each k-point with the smallest key in its star.
+        orbit_keys = np.empty(len(frac_coords), dtype=np.int64)
+        for ks in self._kslices(len(frac_coords), max_size):
+            orbit_keys[ks] = kpoints_intkeys(self.rotate_kpoints(frac_coords[ks])).min(axis=1)
+
+        _, first, inverse, counts = np.unique(orbit_keys, return_index=True, return_inverse=True,
+                                              return_counts=True)
+
+        # Order the irreducible points as in frac_coords.
+        order = np.argsort(first)
+        rank = np.empty(len(order), dtype=np.int)
+        rank[order] = np.arange(len(order))
+
+        return KpointReduction(ibz_inds=first[order], k2ibz=rank[np.ravel(inverse)],
+                               weights=counts[order] / len(frac_coords))
+
+
+KpointReduction = collections.namedtuple("KpointReduction", "ibz_inds, k2ibz, weights")
 
 
 class LittleGroup(OpSequence):
@@ -41,6 +41,32 @@ class TestGSphere(AbipyTest):
         gsphere.empty()
         gsphere.cempty()
 
+    def test_fftmesh_transfer(self):
+        """Scatter/gather of arrays between G-sphere and FFT mesh"""
+        mesh = Mesh3D((6, 5, 7), np.eye(3))
+        gvecs = np.array([g for g in np.ndindex(5, 5, 5) if sum(g) <= 3]) - 2
+        gsphere = GSphere(2, np.eye(3), [0, 0, 0], gvecs, istwfk=1)
+
+        ug = np.random.random(gsphere.npw) + 1j * np.random.random(gsphere.npw)
+        ug_mesh = gsphere.tofftmesh(mesh, ug)
+        assert ug_mesh.shape == mesh.shape
+        for ig, (i1, i2, i3) in enumerate(gvecs):
+            assert ug_mesh[i1, i2, i3] == ug[ig]
+        assert np.count_nonzero(ug_mesh) == gsphere.npw
+        self.assert_equal(gsphere.fromfftmesh(mesh, ug_mesh.flatten()), ug)
+
+        # Index table is computed once per mesh.
+        assert gsphere.fft_indices(mesh) is gsphere.fft_indices(mesh)
+
+        # Stacked arrays [nband, nspinor, npw]
+        stack = np.random.random((3, 2, gsphere.npw))
+        stack_mesh = gsphere.tofftmesh(mesh, stack)
+        assert stack_mesh.shape == (3, 2) + mesh.shape
+        self.assert_equal(gsphere.fromfftmesh(mesh, stack_mesh), stack)
+
+        with self.assertRaises(ValueError):
+            gsphere.tofftmesh(Mesh3D((2, 2, 2), np.eye(3)), ug)
+
     def test_fft(self):
         """FFT transforms"""
         rprimd = np.array([1.,0,0, 0,1,0, 0,0,1])
@@ -9,7 +9,8 @@ import abipy.data as data
 
 from pymatgen.core.lattice import Lattice
 from abipy.core.kpoints import (wrap_to_ws, wrap_to_bz, Kpoint, KpointList, KpointsReader,
-                                as_kpoints, rc_list, kmesh_from_mpdivs,)
+                                as_kpoints, rc_list, kmesh_from_mpdivs, map_bz2ibz, issamek)
+from abipy.core.structure import Structure
 from abipy.core.testing import *
 
 
@@ -147,6 +148,30 @@ class TestKpointList(AbipyTest):
         self.assertTrue(len(add_klist) == 4)
         self.assertTrue(add_klist == add_klist.remove_duplicated())
 
+    def test_index_many(self):
+        """Test hash-based lookup of k-points."""
+        frac_coords = np.concatenate([kmesh_from_mpdivs([4, 4, 4], [0, 0, 0]),
+                                      [[0.0005, 0, 0], [0.00049999999, 0, 0.25], [1.5, 0, 0]]])
+        klist = KpointList(self.lattice, frac_coords)
+
+        # Periodic images, points close to the border of the hash cells and missing points.
+        queries = np.concatenate([frac_coords + np.random.randint(-2, 3, size=frac_coords.shape),
+                                  frac_coords + 1e-9, [[0.3, 0.3, 0.3], [0.0005000000001, 1, 0.25]]])
+        ref = []
+        for q in queries:
+            for i, kpoint in enumerate(klist):
+                if kpoint == q:
+                    ref.append(i)
+                    break
+            else:
+                ref.append(-1)
+
+        self.assert_equal(klist.index_many(queries), ref)
+        assert klist.index(Kpoint([1, 1, 1], self.lattice)) == klist.find([0, 0, 0])
+        assert [0.3, 0.3, 0.3] not in klist
+        with self.assertRaises(ValueError):
+            klist.index([0.3, 0.3, 0.3])
+
 
 class TestKpointsReader(AbipyTest):
 
@@ -344,3 +369,27 @@ class KmeshTest(AbipyTest):
  [ 1.          0.5         0.33333333]
  [ 1.          0.5         0.66666667]]"""
         self.assertMultiLineEqual(str(bz_kmesh), ref_string)
+
+    def test_map_bz2ibz(self):
+        """Testing map_bz2ibz."""
+        filepath = data.ref_file("si_scf_GSR.nc")
+        structure = Structure.from_file(filepath)
+        with KpointsReader(filepath) as r:
+            ibz = r.read_kpoints()
+        mpdivs, shifts = ibz.mpdivs_shifts
+        spacegroup = structure.spacegroup
+
+        for pbc, order in [(False, "unit_cell"), (True, "unit_cell"), (False, "bz")]:
+            bz = kmesh_from_mpdivs(mpdivs, shifts, pbc=pbc, order=order)
+            bzmap = map_bz2ibz(bz, ibz.frac_coords, spacegroup, mpdivs, shifts)
+            assert np.all(bzmap.bz2ibz != -1)
+            assert np.all(np.bincount(bzmap.bz2ibz) > 0)
+
+            for ik_bz in range(0, len(bz), 7):
+                symmop = spacegroup[bzmap.bz2isym[ik_bz]]
+                assert bzmap.bz2timrev[ik_bz] == (symmop.time_sign == -1)
+                assert issamek(symmop.rotate_k(ibz.frac_coords[bzmap.bz2ibz[ik_bz]]), bz[ik_bz])
+
+        # Points that do not belong to the mesh.
+        bzmap = map_bz2ibz([[0.1, 0, 0]], ibz.frac_coords, spacegroup, mpdivs, shifts)
+        assert bzmap.bz2ibz[0] == -1 and bzmap.bz2isym[0] == -1
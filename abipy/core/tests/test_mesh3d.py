@@ -27,6 +27,70 @@ class TestMesh3D(AbipyTest):
         mesh_444.gvecs
         mesh_444.rpoints
 
+    def test_gridpoints_in_spheres(self):
+        """Grid points inside spheres."""
+        vectors = np.array([[3., 0.2, 0], [0.5, 4, 0.], [0.3, 0.1, 5]])
+        mesh = Mesh3D((10, 12, 14), vectors)
+        points = np.array([[0.1, 0.2, 0.3], [2.5, 3.1, 4.0], [-0.4, 5, 7]])
+        radius = 1.2
+
+        self.assert_equal(mesh.i_closest_gridpoints(points[:1]), [[0, 1, 1]])
+
+        # Brute force search on a supercell of grid points.
+        gpoints = np.reshape(np.indices((40, 48, 56)), (3, -1)).T - [15, 18, 21]
+        cart = np.dot(gpoints, np.array([mesh.dvx, mesh.dvy, mesh.dvz]))
+
+        ipoints, inds, dists = mesh.gridpoints_in_spheres(points, radius)
+        assert mesh.sphere_stencil(radius) is mesh.sphere_stencil(radius)
+        for ip, point in enumerate(points):
+            ref_dists = np.sqrt(np.sum((cart - point) ** 2, axis=1))
+            ref = set(tuple(g) for g in gpoints[ref_dists <= radius])
+            assert ref == set(tuple(g) for g in inds[ipoints == ip])
+
+        # Chunked computation gives the same results.
+        for ref, arr in zip((ipoints, inds, dists), mesh.gridpoints_in_spheres(points, radius, chunk_size=1)):
+            self.assert_equal(ref, arr)
+
+        dist_gridpoints = mesh.dist_gridpoints_in_spheres(points, radius)
+        assert [len(l) for l in dist_gridpoints] == [np.count_nonzero(ipoints == ip) for ip in range(3)]
+        igp_uc, dist, igp = dist_gridpoints[0][0]
+        self.assert_equal(igp_uc, np.mod(igp, mesh.shape))
+
+        # Integral of a constant function gives the number of points times dv.
+        charges = mesh.integrate_in_spheres(np.ones((2,) + mesh.shape), points, radius)
+        assert charges.shape == (2, 3)
+        self.assert_almost_equal(charges[0], [np.count_nonzero(ipoints == ip) * mesh.dv for ip in range(3)])
+
+    def test_irottable(self):
+        """FFT rotation tables and symmetrization in real space."""
+        from abipy.core.symmetries import SpaceGroup
+        mesh = Mesh3D((6, 6, 4), np.eye(3))
+        c4z = [[0, -1, 0], [1, 0, 0], [0, 0, 1]]
+        spgrp = SpaceGroup(spgid=0, symrel=[np.eye(3, dtype=np.int), c4z], tnons=[[0, 0, 0], [0, 0.5, 0]],
+                           symafm=[1, 1], has_timerev=False, inord="C")
+
+        irottable = mesh.irottable(spgrp)
+        assert irottable.shape == (2, mesh.size)
+        assert mesh.irottable(spgrp) is irottable
+        self.assert_equal(irottable[0], np.arange(mesh.size))
+
+        # Compare with the explicit formula R^{-1}(r - tau)
+        nx, ny, nz = mesh.shape
+        rotm1_r, tau = spgrp[1].rotm1_r, spgrp[1].tau
+        for ifft, (ix, iy, iz) in enumerate(np.ndindex(mesh.shape)):
+            jx, jy, jz = np.rint(np.dot(rotm1_r, [ix/nx, iy/ny, iz/nz] - tau) * mesh.shape)
+            assert irottable[1, ifft] == (jx % nx) * ny * nz + (jy % ny) * nz + (jz % nz)
+
+        # Symmetrize with the group {E, I}
+        spgrp = SpaceGroup(spgid=0, symrel=[np.eye(3, dtype=np.int), -np.eye(3, dtype=np.int)],
+                           tnons=np.zeros((2, 3)), symafm=[1, 1], has_timerev=False, inord="C")
+        fr = mesh.random(extra_dims=2)
+        sym_fr = mesh.symmetrize(fr, spgrp)
+        assert sym_fr.shape == fr.shape
+        self.assert_almost_equal(sym_fr[..., 1, 2, 3], 0.5 * (fr[..., 1, 2, 3] + fr[..., 5, 4, 1]))
+        self.assert_almost_equal(mesh.symmetrize(sym_fr, spgrp), sym_fr)
+        self.assert_almost_equal(mesh.integrate(sym_fr), mesh.integrate(fr))
+
     def test_fft(self):
         """FFT transforms"""
         rprimd = np.array([1.,0,0, 0,1,0, 0,0,1])
@@ -71,6 +71,23 @@ class TestStructure(AbipyTest):
         qpoint = [0,0,0]
         mx_sc = [2, 2, 2]
         scale_matrix = structure.get_smallest_supercell(qpoint, max_supercell=mx_sc)
+        self.assert_equal(scale_matrix, np.eye(3))
+
+        # Supercells for a list of q-points.
+        qpoints = [[0.5, 0, 0], [0.5, 0.5, 0.5], [0, 0, 0], [1/3, 0, 0]]
+        scale_matrices = structure.get_smallest_supercells(qpoints, max_supercell=[3, 3, 3])
+        assert scale_matrices.shape == (4, 3, 3)
+        for q, sm in zip(qpoints, scale_matrices):
+            self.assert_equal(sm, structure.get_smallest_supercell(q, max_supercell=[3, 3, 3]))
+            # The supercell vectors are commensurate with q and the volume is positive.
+            ql = np.dot(sm, q)
+            self.assert_almost_equal(ql, np.round(ql))
+            assert np.linalg.det(sm) > 0
+        assert np.rint(np.linalg.det(scale_matrices[0])) == 2
+        assert np.rint(np.linalg.det(scale_matrices[3])) == 3
+        with self.assertRaises(ValueError):
+            structure.get_smallest_supercells([[0.1, 0, 0]], max_supercell=[2, 2, 2])
+
         scale_matrix = 2*np.eye(3)
         #print("Scale_matrix = ", scale_matrix)
         #scale_matrix = 2*np.eye(3)
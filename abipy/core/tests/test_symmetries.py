@@ -7,6 +7,7 @@ import abipy.data as abidata
 
 from abipy.core import Structure
 from abipy.core.symmetries import *
+from abipy.core.kpoints import kpoints_intkeys
 from abipy.core.testing import *
 from abipy.abilab import abiopen
 
@@ -49,6 +50,15 @@ class TestSymmetries(AbipyTest):
         assert spgrp.num_spatial_symmetries == 48
 
         assert spgrp.is_group()
+        mtable = spgrp.mult_table
+        assert mtable.shape == (96, 96) and np.all(mtable >= 0)
+        for i in range(0, len(spgrp), 7):
+            for j in range(0, len(spgrp), 5):
+                assert spgrp[mtable[i, j]] == spgrp[i] * spgrp[j]
+        # Classes are computed once for the same set of operations.
+        other = Structure.from_file(abidata.ref_file("si_scf_WFK.nc")).spacegroup
+        assert other.class_indices == spgrp.class_indices
+        assert other.num_classes == spgrp.num_classes
         # TODO
         #si_symrel =
         si_tnons = np.reshape(24 * [0, 0, 0, 0.25, 0.25, 0.25], (48, 3))
@@ -89,6 +99,37 @@ class TestSymmetries(AbipyTest):
 
                 self.assertFalse(err_msg)
 
+        # Batched k-point operations.
+        kpoints = [[0, 0, 0], [0.5, 0, 0], [0.5, 0.5, 0], [0.25, 0, 0], [0, 0.25, 0], [1.5, 0, 0]]
+        mask, g0vecs = spgrp.find_little_groups(kpoints)
+        assert mask.shape == (6, 96) and g0vecs.shape == (6, 96, 3)
+        assert np.all(mask[0]) and np.all(g0vecs[0] == 0)
+        for ik, kpt in enumerate(kpoints):
+            for isym in range(0, len(spgrp), 11):
+                is_same, g0 = spgrp[isym].preserve_k(kpt)
+                assert mask[ik, isym] == is_same
+                if is_same: self.assert_equal(g0vecs[ik, isym], g0)
+
+        stars = spgrp.get_star_indices(kpoints)
+        assert [len(star) for star in stars] == [1, 4, 3, 8, 8, 4]
+        # First operation generating each point of the star.
+        for star, kkeys in zip(stars, kpoints_intkeys(spgrp.rotate_kpoints(kpoints))):
+            self.assert_equal(star, np.sort(np.unique(kkeys, return_index=True)[1]))
+
+        red = spgrp.reduce_kpoints(kpoints)
+        self.assert_equal(red.ibz_inds, [0, 1, 2, 3])
+        self.assert_equal(red.k2ibz, [0, 1, 2, 3, 3, 1])
+        self.assert_almost_equal(red.weights, [1/6, 2/6, 1/6, 2/6])
+
+        # Small chunks of k-points (one k-point per chunk) give the same results.
+        max_size = 3 * len(spgrp)
+        self.assert_equal(spgrp.find_little_groups(kpoints, max_size=max_size)[1], g0vecs)
+        assert [len(star) for star in spgrp.get_star_indices(kpoints, max_size=max_size)] == [1, 4, 3, 8, 8, 4]
+        self.assert_equal(spgrp.reduce_kpoints(kpoints, max_size=max_size).k2ibz, red.k2ibz)
+
+        ltk = spgrp.find_little_group([0.5, 0, 0])
+        assert len(ltk) == np.count_nonzero(mask[1])
+
         # Test little group.
         # TODO
         #ltg_symmops, g0vecs, isyms = spgrp.find_little_group(kpoint=[0,0,0])
@@ -1,3 +1,22 @@
 """This subpackage provides objects and functions for the analysis of DFPT calculatios."""
-from .phonons import *
-from .eph import *
+from abipy.tools.lazyimport import install_lazy_attributes
+
+# The submodules are imported when one of their objects is accessed for the first time (PEP 562).
+# Registry: name --> submodule defining the object.
+_LAZY_ATTRS = {
+    # phonons
+    "PhononBands": ".phonons",
+    "PhononBandsPlotter": ".phonons",
+    "PhbstFile": ".phonons",
+    "PhononDos": ".phonons",
+    "PhdosReader": ".phonons",
+    "PhdosFile": ".phonons",
+    # eph
+    "EliashbergFunction": ".eph",
+    "EPH_Reader": ".eph",
+}
+
+# The submodules are accessible as attributes of the package.
+_LAZY_MODULES = {"phonons": ".phonons", "eph": ".eph"}
+
+install_lazy_attributes(globals(), attrs=_LAZY_ATTRS, modules=_LAZY_MODULES)
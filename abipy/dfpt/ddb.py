@@ -4,6 +4,7 @@ from __future__ import print_function, division, unicode_literals, absolute_impo
 
 import sys
 import os
+import hashlib
 import tempfile
 import numpy as np
 from collections import OrderedDict
@@ -19,9 +20,11 @@ from abipy.core.symmetries import SpaceGroup
 from abipy.core.structure import Structure
 from abipy.core.kpoints import KpointList
 from abipy.core.tensor import Tensor
+from abipy.core.abinit_units import Ha_eV, amu_emass, Bohr_Ang
 from abipy.iotools import ETSF_Reader
+from abipy.tools.iotools import sidecar_path
 from abipy.abio.inputs import AnaddbInput
-from abipy.dfpt.phonons import PhononDosPlotter, InteratomicForceConstants
+from abipy.dfpt.phonons import PhononBands, PhononDosPlotter, NonAnalyticalPh, InteratomicForceConstants
 
 import logging
 logger = logging.getLogger(__name__)
@@ -66,10 +69,19 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         """Needed for the `AbinitFile` abstract interface."""
         return cls(filepath)
 
-    def __init__(self, filepath, read_blocks=False):
+    # If True, the index of the data blocks is saved in a hidden npz file
+    # in the same directory as the DDB file and reused the next time the file is opened.
+    cache_index = False
+
+    # Bit flags used in block_index.pertmask to signal the perturbations present in a block.
+    PERT_PHONON, PERT_DDK, PERT_EFIELD, PERT_STRAIN, PERT_OTHER = 1, 2, 4, 8, 16
+
+    def __init__(self, filepath, read_blocks=False, cache_index=None):
         super(DdbFile, self).__init__(filepath)
+        if cache_index is not None: self.cache_index = cache_index
 
-        self._header = self._parse_header()
+        # Single pass over the file: parse the header and index the data blocks.
+        self._header, self._block_index = self._parse()
 
         self._structure = Structure.from_abivars(**self.header)
         # Add Spacegroup (needed in guessed_ngkpt)
@@ -77,7 +89,7 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         spgid, has_timerev, h = 0, True, self.header
         self._structure.set_spacegroup(SpaceGroup(spgid, h.symrel, h.tnons, h.symafm, has_timerev))
 
-        frac_coords = self._read_qpoints()
+        frac_coords = self._block_index.qpoints
         self._qpoints = KpointList(self.structure.lattice.reciprocal_lattice, frac_coords, weights=None, names=None)
 
         self.blocks = []
@@ -123,15 +135,46 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         """
         return self._header
 
-    def _parse_header(self):
-        """Parse the header sections. Returns :class:`AttrDict` dictionary."""
+    def _parse(self):
+        """
+        Parse the header and build the index of the data blocks with a single pass over the file.
+        The index is read from the cache file if available.
+        Returns (header, block_index)
+        """
+        with open(self.filepath, "rb") as fh:
+            header, offset = self._parse_header(fh)
+
+            path = self.index_path
+            if path is not None and os.path.exists(path):
+                try:
+                    return header, self._load_index(path)
+                except Exception:
+                    logger.warning("Ignoring corrupted DDB index file: %s" % path)
+
+            block_index = self._index_blocks(fh, offset, header.natom)
+
+        if path is not None:
+            try:
+                np.savez(path, **block_index)
+            except (IOError, OSError):
+                pass
+
+        return header, block_index
+
+    def _parse_header(self, fh):
+        """
+        Parse the header sections from the binary file object `fh` positioned at the beginning of the file.
+        Returns :class:`AttrDict` dictionary and the byte offset of the first line after the header.
+        """
         #ixc         7
         #kpt  0.00000000000000D+00  0.00000000000000D+00  0.00000000000000D+00
         #     0.25000000000000D+00  0.00000000000000D+00  0.00000000000000D+00
-        self.seek(0)
         keyvals = []
         header_lines = []
-        for i, line in enumerate(self):
+        offset = 0
+        for i, line in enumerate(fh):
+            offset += len(line)
+            line = line.decode("utf-8", "replace")
             header_lines.append(line.rstrip())
             line = line.strip()
             if not line: continue
@@ -162,7 +205,9 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
                     keyvals.append((key, list(map(parse, tokens))))
 
         # add the potential information
-        for line in self:
+        for line in fh:
+            offset += len(line)
+            line = line.decode("utf-8", "replace")
             if "Database of total energy derivatives" in line:
                 break
             header_lines.append(line.rstrip())
@@ -191,67 +236,194 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         # Transpose symrel because Abinit write matrices by colums.
         h.symrel = np.array([s.T for s in h.symrel])
 
-        return h
+        return h, offset
 
-    def _read_qpoints(self):
-        """Read the list q-points from the DDB file. Returns `ndarray`"""
+    def _index_blocks(self, fh, offset, natom):
+        """
+        Stream the database section of the DDB file and build the index of the blocks.
+        `fh` is the binary file object positioned at `offset`, just after the header.
+        The numerical values are not parsed here, see `get_block_data`.
+        Returns :class:`AttrDict` with the index (see `block_index`).
+        """
         # 2nd derivatives (non-stat.)  - # elements :      36
         # qpt  2.50000000E-01  0.00000000E+00  0.00000000E+00   1.0
+        #   1   1   1   1  0.80977066582497D+01 -0.46347282336361D-16
+        starts, stops, nelements, dords, btypes, qpts, iperts_list = [], [], [], [], [], [], []
 
-        # Since there are multiple occurrences of qpt in the DDB file
+        # Since there are multiple occurrences of qpt in the DDB file (e.g. 3rd derivatives)
         # we use seen to remove duplicates.
-        self.seek(0)
-        tokens, seen = [], set()
+        qpoints, seen = [], set()
+
+        stop, iperts, pert_slices = None, None, ()
+        for line in fh:
+            pos = offset
+            offset += len(line)
+            if line.isspace(): continue
+
+            if b"# elements" in line:
+                # New block. Close the previous one.
+                if iperts is not None:
+                    stops.append(stop)
+                    iperts_list.append(iperts)
+                btype, nel = line.decode("utf-8", "replace").split("- # elements :")
+                btype = btype.strip()
+                dord = {"1st": 1, "2nd": 2, "3rd": 3}.get(btype[:3], 0)
+                starts.append(pos)
+                nelements.append(int(nel))
+                dords.append(dord)
+                btypes.append(btype)
+                qpts.append(3 * [np.nan])
+                iperts, qpt_found = set(), False
+                # Data lines are written with format (2*dord i4, 2d22.14): ipert columns are at [4:8], [12:16] ...
+                pert_slices = [slice(8 * i + 4, 8 * i + 8) for i in range(dord)]
+
+            elif b"List of bloks and their characteristics" in line:
+                break
 
-        for line in self:
-            line = line.strip()
-            if line.startswith("qpt") and line not in seen:
-                seen.add(line)
-                tokens.append(line.replace("qpt", ""))
+            elif line.lstrip().startswith(b"qpt"):
+                line = line.decode("utf-8", "replace").strip()
+                nums = list(map(float, line.replace("qpt", "").split()))
+                if not qpt_found:
+                    qpts[-1] = nums[:3]
+                    qpt_found = True
+                if line not in seen:
+                    seen.add(line)
+                    qpoints.append(nums[:3])
 
-        qpoints, weights = [], []
-        for tok in tokens:
-            nums = list(map(float, tok.split()))
-            qpoints.append(nums[:3])
-            weights.append(nums[3])
+            else:
+                for sl in pert_slices:
+                    iperts.add(line[sl])
 
-        return np.reshape(qpoints, (-1,3))
+            stop = offset
 
-    def _read_blocks(self):
-        self.seek(0)
+        if iperts is not None:
+            stops.append(stop)
+            iperts_list.append(iperts)
 
-        # skip until the beginning of the db
-        while "Number of data blocks" not in self._file.readline():
-            pass
+        # Convert the ipert values found in each block into a bit mask.
+        pertmask = np.zeros(len(starts), dtype=np.int)
+        for iblock, iperts in enumerate(iperts_list):
+            for ipert in iperts:
+                try:
+                    ipert = int(ipert)
+                except ValueError:
+                    continue
+                if 1 <= ipert <= natom:
+                    pertmask[iblock] |= self.PERT_PHONON
+                elif ipert == natom + 1:
+                    pertmask[iblock] |= self.PERT_DDK
+                elif ipert == natom + 2:
+                    pertmask[iblock] |= self.PERT_EFIELD
+                elif ipert in (natom + 3, natom + 4):
+                    pertmask[iblock] |= self.PERT_STRAIN
+                else:
+                    pertmask[iblock] |= self.PERT_OTHER
+
+        return AttrDict(
+            start=np.array(starts, dtype=np.int64),
+            stop=np.array(stops, dtype=np.int64),
+            nelements=np.array(nelements, dtype=np.int),
+            dord=np.array(dords, dtype=np.int),
+            pertmask=pertmask,
+            btype=np.array(btypes, dtype=np.str_),
+            qpts=np.reshape(np.array(qpts, dtype=np.double), (-1, 3)),
+            qpoints=np.reshape(np.array(qpoints, dtype=np.double), (-1, 3)),
+        )
+
+    @staticmethod
+    def _load_index(path):
+        """Read the index of the blocks from the npz file `path`."""
+        with np.load(path) as d:
+            return AttrDict({k: d[k] for k in ("start", "stop", "nelements", "dord", "pertmask",
+                                                  "btype", "qpts", "qpoints")})
 
-        blocks = []
+    @lazy_property
+    def index_path(self):
+        """
+        Path of the npz file used to cache the index of the blocks. None if caching is disabled.
+        The name depends on the DDB file (path, size, modification time).
+        """
+        if not self.cache_index: return None
+        return sidecar_path(self.filepath, "INDEX")
 
-        block_lines = []
-        qpt = None
-        for line in self:
-            # skip empty lines
-            if line.isspace():
-                continue
+    @lazy_property
+    def md5(self):
+        """MD5 hash (hexadecimal string) of the content of the DDB file."""
+        md5 = hashlib.md5()
+        with open(self.filepath, "rb") as fh:
+            for chunk in iter(lambda: fh.read(2**20), b""):
+                md5.update(chunk)
+        return md5.hexdigest()
 
-            if "List of bloks and their characteristics" in line:
-                #add last block
-                blocks.append({"data": block_lines, "qpt": qpt})
-                break
+    @property
+    def block_index(self):
+        """
+        :class:`AttrDict` with the index of the data blocks. Arrays of length nblocks:
 
-            line = line.rstrip()
-            # new block
-            if "# elements" in line:
-                if block_lines:
-                    blocks.append({"data": block_lines, "qpt": qpt})
-                block_lines = []
-                qpt = None
+            start, stop: Byte offsets of the block in the file.
+            nelements: Number of elements in the block.
+            dord: Order of the derivative (0 for the total energy).
+            pertmask: Bit mask with the type of perturbations (see PERT_PHONON, PERT_EFIELD ...)
+            btype: Block type as reported in the file e.g. "2nd derivatives (non-stat.)"
+            qpts: First q-point of the block in reduced coordinates (nan if the block has no q-point).
 
-            block_lines.append(line)
-            if "qpt" in line:
-                qpt = list(map(float, line.split()[1:4]))
+        plus `qpoints`, the list of (unique) q-points in the order found in the file.
+        """
+        return self._block_index
+
+    @property
+    def nblocks(self):
+        """Number of data blocks in the DDB file."""
+        return len(self._block_index.start)
+
+    def _read_raw_blocks(self, iblocks):
+        """Read the text of the blocks with indices `iblocks`. Returns list of lists of lines."""
+        idx = self._block_index
+        raw_blocks = []
+        with open(self.filepath, "rb") as fh:
+            for iblock in iblocks:
+                fh.seek(idx.start[iblock])
+                text = fh.read(idx.stop[iblock] - idx.start[iblock]).decode("utf-8", "replace")
+                raw_blocks.append([l.rstrip() for l in text.splitlines() if l and not l.isspace()])
+
+        return raw_blocks
+
+    def _read_blocks(self):
+        """Read all the blocks. Returns list of dictionaries with the lines of the block and the q-point."""
+        idx = self._block_index
+        blocks = []
+        for iblock, data in enumerate(self._read_raw_blocks(range(self.nblocks))):
+            qpt = idx.qpts[iblock]
+            blocks.append({"data": data, "qpt": None if np.any(np.isnan(qpt)) else list(qpt)})
 
         return blocks
 
+    def get_block_data(self, iblock):
+        """
+        Read and decode the data of block `iblock`.
+
+        Returns float array of shape [nelements, ncols]. For second-order derivatives,
+        the columns are (idir1, ipert1, idir2, ipert2, re, im) following the Fortran (1-based) convention.
+        """
+        data = self._read_raw_blocks([iblock])[0]
+        # Remove the line with the number of elements and the q-points.
+        data = [l for l in data[1:] if not l.lstrip().startswith("qpt")]
+        # Python does not support exp format with D
+        values = " ".join(data).replace("D", "E").split()
+        return np.reshape(np.array(values, dtype=np.double), (self._block_index.nelements[iblock], -1))
+
+    def find_block_indices(self, qpt, dord=None, atol=1e-8):
+        """
+        Return the indices of the blocks whose (first) q-point is equal to `qpt` within `atol`.
+        If `dord` is not None, only blocks with derivative order `dord` are selected.
+        """
+        idx = self._block_index
+        qpt = np.reshape(getattr(qpt, "frac_coords", qpt), (3,))
+        # nan q-points (blocks without q-point) never compare equal.
+        mask = np.all(np.abs(idx.qpts - qpt) <= atol, axis=1)
+        if dord is not None: mask &= (idx.dord == dord)
+        return np.nonzero(mask)[0]
+
     @property
     def qpoints(self):
         """:class:`KpointList` object with the list of q-points in reduced coordinates."""
@@ -267,6 +439,196 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         else:
             return self.qpoints.index(qpoint)
 
+    @lazy_property
+    def rprimd(self):
+        """Lattice vectors in Bohr. Array of shape [3, 3] with the vectors along the rows."""
+        h = self.header
+        return np.reshape(h.rprim, (3, 3)) * np.reshape(h.acell, (3, 1))
+
+    def get_d2cart(self, iblock):
+        """
+        Convert the second-order derivatives stored in block `iblock` to Cartesian coordinates.
+        Phonon perturbations are transformed with the reciprocal lattice vectors,
+        electric field perturbations with the real space vectors divided by 2 pi (as in anaddb).
+
+        Returns:
+            d2cart: Complex array of shape [3, mpert, 3, mpert] with mpert = natom + 2 (phonons, ddk, electric field).
+            blkflg: Boolean array of shape [mpert, mpert]. True if all the 3x3 elements
+                for the pair of perturbations are present in the block.
+        """
+        idx = self._block_index
+        if idx.dord[iblock] != 2:
+            raise ValueError("Block %d does not contain second-order derivatives" % iblock)
+
+        natom = self.header.natom
+        mpert = natom + 2
+        data = self.get_block_data(iblock)
+        ids = np.array(data[:, :4], dtype=np.int) - 1
+        # Ignore the perturbations we don't support (e.g. strain)
+        ok = np.all(ids[:, [1, 3]] < mpert, axis=1)
+        ids, data = ids[ok], data[ok]
+
+        d2red = np.zeros((3, mpert, 3, mpert), dtype=np.complex)
+        blkflg = np.zeros((3, mpert, 3, mpert), dtype=bool)
+        d2red[ids[:, 0], ids[:, 1], ids[:, 2], ids[:, 3]] = data[:, 4] + 1j * data[:, 5]
+        blkflg[ids[:, 0], ids[:, 1], ids[:, 2], ids[:, 3]] = True
+
+        # Transformation matrix for each perturbation. ddk is left in reduced coordinates.
+        tmats = np.empty((mpert, 3, 3))
+        tmats[:natom] = np.linalg.inv(self.rprimd)
+        tmats[natom] = np.eye(3)
+        tmats[natom + 1] = self.rprimd.T / (2 * np.pi)
+
+        d2cart = np.einsum("pai,ipjq,qbj->apbq", tmats, d2red, tmats)
+
+        return d2cart, blkflg.all(axis=(0, 2))
+
+    def _get_gamma_d2cart(self):
+        """Return (d2cart, blkflg) for the second-order derivatives at Gamma. None if the block is not present."""
+        iblocks = self.find_block_indices([0, 0, 0], dord=2)
+        if len(iblocks) == 0: return None
+        return self.get_d2cart(iblocks[0])
+
+    def _get_emacro_becs_arrays(self, chneut=1):
+        """
+        Compute the macroscopic dielectric tensor and the Born effective charges from the Gamma block.
+        Returns (emacro[3, 3], becs[natom, 3, 3]) or None if the DDB does not contain these terms.
+        becs[iatom, i, j] is the derivative of the force along j wrt the electric field along i.
+        """
+        gamma = self._get_gamma_d2cart()
+        if gamma is None: return None
+        d2cart, blkflg = gamma
+        natom = self.header.natom
+        ief = natom + 1
+        if not blkflg[ief, ief] or not np.all(blkflg[ief, :natom]): return None
+
+        ucvol = abs(np.linalg.det(self.rprimd))
+        emacro = np.eye(3) - 4 * np.pi / ucvol * d2cart[:, ief, :, ief].real
+
+        # Add the ionic charges to the electronic contribution.
+        zion = np.atleast_1d(self.header.zion)[np.atleast_1d(self.header.typat) - 1]
+        becs = np.transpose(d2cart[:, ief, :, :natom].real, (2, 0, 1)) + zion[:, None, None] * np.eye(3)
+
+        if chneut == 1:
+            # Distribute the violation of the charge neutrality equally among the atoms.
+            becs -= becs.sum(axis=0) / natom
+        elif chneut != 0:
+            raise ValueError("chneut %s is not supported. Use anaget_emacro_and_becs" % chneut)
+
+        return emacro, becs
+
+    def get_emacro_and_becs(self, chneut=1):
+        """
+        Compute the macroscopic dielectric tensor and the Born effective charges
+        from the second-order derivatives at Gamma without calling anaddb.
+
+        Args:
+            chneut: Treatment of the charge neutrality (0 or 1, same meaning as in anaddb).
+
+        Return:
+            emacro, becs. None, None if the DDB does not contain the electric field perturbation.
+        """
+        arrays = self._get_emacro_becs_arrays(chneut=chneut)
+        if arrays is None: return None, None
+        emacro, becs = arrays
+        return (Tensor.from_cartesian_tensor(emacro, self.structure.lattice, space="r"),
+                Becs(becs, self.structure, chneut=chneut))
+
+    def get_phbands_at_qpoints(self, qpoints=None, asr=2, chneut=1, lo_to_splitting=False, directions=None):
+        """
+        Compute the phonon modes at the q-points of the DDB file by diagonalizing the dynamical matrix
+        built from the second-order derivatives. Contrary to `anaget_phmodes_at_qpoint`, anaddb is not
+        executed and no Fourier interpolation is performed. The blocks must be complete
+        i.e. the symmetrization of the perturbations is not performed here.
+
+        Args:
+            qpoints: List of q-points in reduced coordinates. None for all the q-points in the DDB file.
+            asr: Acoustic sum rule. 0 to disable it, 1 to impose it asymmetrically, 2 to impose it symmetrically
+                (same meaning as in anaddb). Requires the block at Gamma.
+            chneut: Treatment of the charge neutrality of the Born effective charges (0 or 1).
+            lo_to_splitting: if True and Gamma is in qpoints, the non-analytical contribution along directions
+                is computed and stored in the `non_anal_ph` attribute of the returned object.
+            directions: list of 3D Cartesian directions along which the LO-TO splitting will be calculated.
+                If None the three Cartesian directions will be used.
+
+        Return:
+            :class:`PhononBands` object.
+        """
+        if asr not in (0, 1, 2):
+            raise ValueError("asr %s is not supported. Use anaget_phmodes_at_qpoint" % asr)
+
+        natom = self.header.natom
+        if qpoints is None: qpoints = self.qpoints.frac_coords
+        qpoints = np.reshape([getattr(q, "frac_coords", q) for q in qpoints], (-1, 3))
+
+        iblocks = []
+        for qpt in qpoints:
+            inds = self.find_block_indices(qpt, dord=2)
+            if len(inds) == 0:
+                raise ValueError("input qpoint %s not in ddb.qpoints:%s\n" % (qpt, self.qpoints))
+            iblocks.append(inds[0])
+
+        # Dynamical matrices in Cartesian coordinates with shape [nq, natom, 3, natom, 3].
+        dyn = np.empty((len(iblocks), natom, 3, natom, 3), dtype=np.complex)
+        for iq, iblock in enumerate(iblocks):
+            d2cart, blkflg = self.get_d2cart(iblock)
+            if not np.all(blkflg[:natom, :natom]):
+                raise self.Error("Block %d with qpoint %s is not complete. Use anaddb" % (iblock, qpoints[iq]))
+            dyn[iq] = np.transpose(d2cart[:, :natom, :, :natom], (1, 0, 3, 2))
+
+        gamma = None
+        if asr != 0 or lo_to_splitting:
+            gamma = self._get_gamma_d2cart()
+            if gamma is None:
+                raise self.Error("The block at Gamma is required to impose the ASR and to compute the LO-TO splitting")
+            if not np.all(gamma[1][:natom, :natom]):
+                raise self.Error("The block at Gamma is not complete. Use anaddb")
+            dyn0 = np.transpose(gamma[0][:, :natom, :, :natom].real, (1, 0, 3, 2))
+
+        if asr in (1, 2):
+            # Correction to the self-interaction term obtained from the breaking of the ASR at Gamma.
+            corr = dyn0.sum(axis=2)
+            if asr == 2: corr = 0.5 * (corr + np.transpose(corr, (0, 2, 1)))
+            iat = np.arange(natom)
+            dyn[:, iat, :, iat, :] -= corr[:, None]
+            dyn0[iat, :, iat, :] -= corr
+
+        # Mass-weighted dynamical matrices. Hermitian part to remove numerical noise.
+        h = self.header
+        amu = np.atleast_1d(h.amu)[np.atleast_1d(h.typat) - 1]
+        masses = np.repeat(amu * amu_emass, 3)
+        mfact = 1.0 / np.sqrt(np.outer(masses, masses))
+        dyn = np.reshape(dyn, (-1, 3 * natom, 3 * natom)) * mfact
+        dyn = 0.5 * (dyn + np.conj(np.transpose(dyn, (0, 2, 1))))
+
+        phfreqs, phdispl_cart = _diagonalize_dynmat(dyn, masses)
+
+        amu_dict = {site.specie.number: a for site, a in zip(self.structure, amu)}
+        non_anal_ph = None
+        if lo_to_splitting and np.any(np.all(np.abs(qpoints) < 1e-8, axis=1)):
+            arrays = self._get_emacro_becs_arrays(chneut=chneut)
+            if arrays is None:
+                raise self.Error("LO-TO splitting requires the Born effective charges and the dielectric tensor")
+            emacro, becs = arrays
+            if directions is None: directions = [1, 0, 0, 0, 1, 0, 0, 0, 1]
+            directions = np.reshape(directions, (-1, 3))
+
+            # Non-analytical term: 4pi/ucvol (q.Z_k)_a (q.Z_k')_b / (q.eps.q)
+            ucvol = abs(np.linalg.det(self.rprimd))
+            qz = np.einsum("dc,kcb->dkb", directions, becs).reshape(len(directions), 3 * natom)
+            qeq = np.einsum("da,ab,db->d", directions, emacro, directions)
+            nac = 4 * np.pi / ucvol * qz[:, :, None] * qz[:, None, :] / qeq[:, None, None]
+            dyn_nac = (np.reshape(dyn0, (3 * natom, 3 * natom)) + nac) * mfact
+
+            nfreqs, ndispl = _diagonalize_dynmat(dyn_nac, masses)
+            non_anal_ph = NonAnalyticalPh(structure=self.structure, directions=directions,
+                                          phfreqs=nfreqs, phdispl_cart=ndispl, amu=amu_dict)
+
+        qpoints = KpointList(self.structure.lattice.reciprocal_lattice, qpoints, weights=None, names=None)
+
+        return PhononBands(structure=self.structure, qpoints=qpoints, phfreqs=phfreqs, phdispl_cart=phdispl_cart,
+                           non_anal_ph=non_anal_ph, amu=amu_dict)
+
     @lazy_property
     def guessed_ngqpt(self):
         """
@@ -287,16 +649,10 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         """
         if not self.qpoints: return None
         # Build the union of the stars of the q-points.
-        all_qpoints = np.empty((len(self.qpoints) * len(self.structure.spacegroup), 3))
-        count = 0
-        for qpoint in self.qpoints:
-            for op in self.structure.spacegroup:
-                all_qpoints[count] = op.rotate_k(qpoint.frac_coords, wrap_tows=False)
-                count += 1
+        all_qpoints = self.structure.spacegroup.rotate_kpoints(self.qpoints.frac_coords).reshape(-1, 3)
 
         # Replace zeros with np.inf
-        for q in all_qpoints:
-            q[q == 0] = np.inf
+        all_qpoints[all_qpoints == 0] = np.inf
 
         # Compute the minimum of the fractional coordinates along the 3 directions and invert
         #print(all_qpoints)
@@ -650,12 +1006,13 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         """
         Extracts the block data for the selected qpoint. Returns a list of lines containing the block information
         """
-        if not self.blocks:
-            raise ValueError("Blocks information are required to write the DDB file")
+        iblocks = self.find_block_indices(qpt)
+        if len(iblocks) == 0: return None
 
-        for b in self.blocks:
-            if b['qpt'] is not None and np.allclose(b['qpt'], qpt):
-                return b["data"]
+        if self.blocks:
+            return self.blocks[iblocks[0]]["data"]
+        else:
+            return self._read_raw_blocks(iblocks[:1])[0]
 
     def replace_block_for_qpoint(self, qpt, data):
         """
@@ -666,9 +1023,8 @@ class DdbFile(TextFile, Has_Structure, NotebookWriter):
         if not self.blocks:
             raise ValueError("Blocks information are required to write the DDB file")
 
-        for b in self.blocks:
-            if b['qpt'] is not None and np.allclose(b['qpt'], qpt):
-                b["data"] = data
+        for iblock in self.find_block_indices(qpt):
+            self.blocks[iblock]["data"] = data
 
     def write_notebook(self, nbpath=None):
         """
@@ -702,6 +1058,19 @@ ifc = ddb.anaget_ifc(ifcout=None, asr=2, chneut=1, dipdip=1, ngqpt=None, verbose
         return self._write_nb_nbpath(nb, nbpath)
 
 
+def _diagonalize_dynmat(dyn, masses):
+    """
+    Diagonalize a stack of mass-weighted dynamical matrices with shape [..., 3*natom, 3*natom] in atomic units.
+    Returns phonon frequencies in eV (negative values for unstable modes)
+    and phonon displacements in Cartesian coordinates in Angstrom.
+    """
+    w2, eigvec = np.linalg.eigh(dyn)
+    phfreqs = np.sign(w2) * np.sqrt(np.abs(w2)) * Ha_eV
+    # eigvec[..., :, nu] --> phdispl_cart[..., nu, :]
+    phdispl_cart = np.swapaxes(eigvec, -1, -2) / np.sqrt(masses) * Bohr_Ang
+    return phfreqs, phdispl_cart
+
+
 class Becs(Has_Structure):
     """This object stores the Born effective charges and provides simple tools for data analysis."""
 
@@ -16,9 +16,9 @@ from pymatgen.core.units import Ha_to_eV, eV_to_Ha
 from pymatgen.util.plotting_utils import add_fig_kwargs, get_ax_fig_plt
 from abipy.core.func1d import Function1D
 from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_PhononBands
-from abipy.core.kpoints import Kpoint, KpointList
+from abipy.core.kpoints import Kpoint, KpointList, kmesh_from_mpdivs, map_bz2ibz
 from abipy.iotools import ETSF_Reader
-from abipy.tools import gaussian
+from abipy.tools import gaussian_sum, linear_tetra_dos
 from abipy.tools.plotting_utils import Marker
 from abipy.core.abinit_units import amu_emass, Bohr_Ang
 
@@ -474,14 +474,17 @@ class PhononBands(object):
     #    """
     #    qindex, qpoint = self.qindex_qpoint(qpoint)
 
-    def get_phdos(self, method="gaussian", step=1.e-4, width=4.e-4):
+    def get_phdos(self, method="gaussian", step=1.e-4, width=4.e-4, ngqpt=None, qshift=(0, 0, 0)):
         """
         Compute the phonon DOS on a linear mesh.
 
         Args:
-            method: String defining the method
+            method: String defining the method: "gaussian" or "tetra" (linear tetrahedron method).
             step: Energy step (eV) of the linear mesh.
             width: Standard deviation (eV) of the gaussian.
+            ngqpt: Divisions of the q-mesh. Used by the tetrahedron method. If None, the divisions
+                are taken from the q-points if they are a Monkhorst-Pack mesh in the IBZ.
+            qshift: Shift of the q-mesh used by the tetrahedron method.
 
         Returns:
             :class:`PhononDos` object.
@@ -500,23 +503,44 @@ class PhononBands(object):
         w_max = self.maxfreq
         w_max += 0.1 * abs(w_max)
 
-        nw = 1 + (w_max - w_min) / step
+        nw = int(1 + (w_max - w_min) / step)
 
         mesh, step = np.linspace(w_min, w_max, num=nw, endpoint=True, retstep=True)
 
-        values = np.zeros(nw)
         if method == "gaussian":
-            for (q, qpoint) in enumerate(self.qpoints):
-                weight = qpoint.weight
-                for nu in self.branches:
-                    w = self.phfreqs[q, nu]
-                    values += weight * gaussian(mesh, width, center=w)
+            # Sum of the gaussians centered on all the frequencies (chunked broadcasting).
+            values = gaussian_sum(mesh, self.phfreqs, width, weights=self.qpoints.weights[:, None])
+
+        elif method == "tetra":
+            values = linear_tetra_dos(mesh, self._get_phfreqs_on_mesh(ngqpt, qshift))
 
         else:
             raise ValueError("Method %s is not supported" % method)
 
         return PhononDos(mesh, values)
 
+    def _get_phfreqs_on_mesh(self, ngqpt, qshift):
+        """
+        Reconstruct the phonon frequencies on the full q-mesh from the q-points in self using the symmetries
+        of the structure. Return array of shape [num_branches, n0, n1, n2] (C order, points in the unit cell).
+        """
+        if ngqpt is None:
+            if not self.qpoints.is_mpmesh:
+                raise ValueError("The tetrahedron method requires a Monkhorst-Pack mesh. Use ngqpt")
+            ngqpt, shifts = self.qpoints.mpdivs_shifts
+            if shifts is not None:
+                if len(shifts) != 1:
+                    raise ValueError("The tetrahedron method does not support multiple shifts.")
+                qshift = shifts[0]
+
+        ngqpt = np.array(ngqpt, dtype=np.int)
+        bz = kmesh_from_mpdivs(ngqpt, qshift, pbc=False, order="unit_cell")
+        bz2ibz = map_bz2ibz(bz, self.qpoints.frac_coords, self.structure.spacegroup, ngqpt, qshift).bz2ibz
+        if np.any(bz2ibz == -1):
+            raise ValueError("Cannot reconstruct the q-mesh %s from the q-points in the PhononBands" % str(ngqpt))
+
+        return np.reshape(self.phfreqs[bz2ibz].T, (self.num_branches,) + tuple(ngqpt))
+
     def create_xyz_vib(self, iqpt, filename, pre_factor=200, do_real=True, scale_matrix=None, max_supercell=None):
         """
         Create vibration XYZ file for visualization of phonons.
@@ -1207,9 +1231,10 @@ class PhononDos(Function1D):
         fig = plt.gcf()
         return fig
 
-    def get_harmonic_thermo(self, tstart, tstop, num=50):
+    def get_harmonic_thermo(self, tstart, tstop, num=50, max_size=2**22):
         """
         Compute thermodinamic properties from the phonon DOS within the harmonic approximation.
+        All the temperatures are computed at once (in chunks of at most max_size elements).
 
         tstart: The starting value (in Kelvin) of the temperature mesh.
         tstop: The end value (in Kelvin) of the mesh.
@@ -1217,9 +1242,6 @@ class PhononDos(Function1D):
         """
         tmesh = np.linspace(tstart, tstop, num=num)
 
-        coth = lambda x: 1.0 / np.tanh(x)
-        csch2 = lambda x: 1.0 / (np.sinh(x) ** 2)
-
         # Boltzmann constant in Ha/K
         kb_HaK = 8.617343e-5 / Ha_to_eV
 
@@ -1231,23 +1253,26 @@ class PhononDos(Function1D):
         w =  self.mesh[i:] * eV_to_Ha
         gw = self.values[i:] * Ha_to_eV
 
-        from scipy.integrate import cumtrapz
-        def integrate(values):
-            return cumtrapz(values, x=w)[-1]
+        # Weights of the trapezoidal rule so that the integrals become matrix-vector products.
+        dw = np.diff(w)
+        trapz_weights = 0.5 * (np.append(dw, 0) + np.insert(dw, 0, 0)) * gw
 
-        #w, gw = w[i:], gw[i:]
         # TODO
         # Check for possible numerical instabilities when w ~ 0 or negative
         # Prefactors are missing!
         df, de, cv, s = map(np.empty, 4 * (len(tmesh),))
-        for i, temp in enumerate(tmesh):
-            # Equations in Xavier's paper.
-            kt = kb_HaK * temp
+        chunk = max(1, max_size // max(1, len(w)))
+        for start in range(0, len(tmesh), chunk):
+            stop = start + chunk
+            # Equations in Xavier's paper. Arrays of shape [nt, nw]
+            kt = kb_HaK * tmesh[start:stop, None]
             wd2kt = w / (2 * kt)
-            df[i] = kt * integrate(np.log(2 * np.sinh(wd2kt)) * gw)
-            de[i] = integrate(w * coth(wd2kt) * gw)
-            cv[i] = integrate(wd2kt * wd2kt * csch2(wd2kt) * gw)
-            s[i] = integrate((wd2kt * coth(wd2kt) - np.log(2 * np.sinh(wd2kt))) * gw)
+            log2sinh = np.log(2 * np.sinh(wd2kt))
+            coth = 1.0 / np.tanh(wd2kt)
+            df[start:stop] = kt[:, 0] * np.dot(log2sinh, trapz_weights)
+            de[start:stop] = np.dot(w * coth, trapz_weights)
+            cv[start:stop] = np.dot(wd2kt ** 2 / np.sinh(wd2kt) ** 2, trapz_weights)
+            s[start:stop] = np.dot(wd2kt * coth - log2sinh, trapz_weights)
 
         locvars = locals()
         return HarmonicThermo(**{name: Function1D(tmesh, locvars[name]) for name in ("df", "de", "cv", "s")})
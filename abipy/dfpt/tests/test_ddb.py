@@ -54,6 +54,39 @@ class DdbTest(AbipyTest):
             with self.assertRaises(ddb.AnaddbError):
                 ddb.anaget_phbst_and_phdos_files()
 
+    def test_block_index(self):
+        """Testing the index of the DDB blocks and the decoding of the data."""
+        ddb = DdbFile(os.path.join(test_dir, "AlAs_444_nobecs_DDB"), read_blocks=True)
+        idx = ddb.block_index
+        assert ddb.nblocks == 8 and len(ddb.blocks) == 8
+        assert np.all(idx.dord == 2) and np.all(idx.nelements[1:] == 36)
+        assert np.all(idx.qpts == ddb.qpoints.frac_coords)
+        # Gamma contains phonon and electric field perturbations.
+        assert idx.pertmask[0] == ddb.PERT_PHONON | ddb.PERT_EFIELD
+        assert np.all(idx.pertmask[1:] == ddb.PERT_PHONON)
+
+        data = ddb.get_block_data(1)
+        assert data.shape == (36, 6)
+        assert np.all(data[:, :4] >= 1) and np.all(data[:, [1, 3]] <= len(ddb.structure))
+
+        iblocks = ddb.find_block_indices([0.25, 0, 0])
+        assert list(iblocks) == [1]
+        assert ddb.get_block_for_qpoint([0.25, 0, 0]) == ddb.blocks[1]["data"]
+        assert ddb.get_block_for_qpoint([0.1, 0, 0]) is None
+        ddb.close()
+
+        # Index saved in the sidecar file.
+        with DdbFile(ddb.filepath, cache_index=True) as ddb:
+            path = ddb.index_path
+            assert os.path.exists(path)
+            try:
+                with DdbFile(ddb.filepath, cache_index=True) as other:
+                    for k in ("start", "stop", "nelements", "pertmask", "qpoints"):
+                        self.assert_equal(other.block_index[k], ddb.block_index[k])
+                    assert other.get_block_for_qpoint([0.25, 0, 0]) == ddb.get_block_for_qpoint([0.25, 0, 0])
+            finally:
+                os.remove(path)
+
     def test_alas_ddb_444_nobecs(self):
         """Testing DDB for AlAs on a 4x4x4x q-mesh without Born effective charges."""
         ddb = DdbFile(os.path.join(test_dir, "AlAs_444_nobecs_DDB"))
@@ -103,6 +136,46 @@ class DdbTest(AbipyTest):
 
         ddb.close()
 
+    def test_zno_gamma_phbands_without_anaddb(self):
+        """Testing phonons, Born effective charges and dielectric tensor computed without anaddb."""
+        with DdbFile(os.path.join(test_dir, "ZnO_gamma_becs_DDB")) as ddb:
+            emacro, becs = ddb.get_emacro_and_becs(chneut=1)
+            self.assert_almost_equal(becs.becs.sum(axis=0), np.zeros((3, 3)))
+            assert becs.becs[0, 2, 2] > 0 and becs.becs[2, 2, 2] < 0
+
+            phbands = ddb.get_phbands_at_qpoints(asr=2, chneut=1, lo_to_splitting=True)
+            assert phbands.phfreqs.shape == (1, 12) and phbands.phdispl_cart.shape == (1, 12, 12)
+            # Acoustic modes are zero once the ASR is imposed.
+            self.assert_almost_equal(phbands.phfreqs[0, :3], 0, decimal=5)
+            assert np.all(phbands.phfreqs[0, 3:] > 0)
+
+            # The LO modes are above the highest TO mode.
+            nonanal = phbands.non_anal_ph
+            assert nonanal.phfreqs.shape == (3, 12)
+            assert np.all(nonanal.phfreqs[:, -1] > phbands.phfreqs[0, -1])
+
+            # Incomplete block at Gamma.
+            d2cart, blkflg = ddb._get_gamma_d2cart()
+            blkflg = blkflg.copy()
+            blkflg[0, 1] = False
+            ddb._get_gamma_d2cart = lambda: (d2cart, blkflg)
+            with self.assertRaises(ddb.Error):
+                ddb.get_phbands_at_qpoints(asr=2)
+            with self.assertRaises(ddb.Error):
+                ddb.get_phbands_at_qpoints(asr=0, lo_to_splitting=True)
+
+        with DdbFile(os.path.join(test_dir, "AlAs_1qpt_DDB")) as ddb:
+            # ASR requires the block at Gamma.
+            with self.assertRaises(ddb.Error):
+                ddb.get_phbands_at_qpoints(asr=2)
+            # asr is checked before the block at Gamma.
+            with self.assertRaises(ValueError):
+                ddb.get_phbands_at_qpoints(asr=3)
+            phbands = ddb.get_phbands_at_qpoints(asr=0)
+            assert phbands.phfreqs.shape == (1, 6)
+            with self.assertRaises(ValueError):
+                ddb.get_phbands_at_qpoints(qpoints=[[0.1, 0, 0]], asr=0)
+
 if __name__ == "__main__": 
     import unittest
     unittest.main()
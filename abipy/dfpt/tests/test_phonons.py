@@ -8,6 +8,7 @@ import os
 
 from abipy.dfpt.phonons import PhononBands, PhononDos, InteratomicForceConstants
 from abipy.dfpt.ddb import DdbFile
+from abipy.core.kpoints import KpointList, kmesh_from_mpdivs, map_bz2ibz
 from abipy.core.testing import *
 
 test_dir = os.path.join(os.path.dirname(__file__), "..", "..", 'test_files')
@@ -39,6 +40,39 @@ class PhononBandsTest(AbipyTest):
         #dos = phbands.get_phdos()
         #print(dos)
 
+    def test_phdos_methods(self):
+        """Testing get_phdos with the gaussian and the tetrahedron method on a q-mesh."""
+        with DdbFile(os.path.join(test_dir, "AlAs_444_nobecs_DDB")) as ddb:
+            phbands = ddb.get_phbands_at_qpoints(asr=2)
+
+        # Weights of the q-points in the IBZ of the 4x4x4 q-mesh.
+        ngqpt = [4, 4, 4]
+        frac_coords = phbands.qpoints.frac_coords
+        bz = kmesh_from_mpdivs(ngqpt, [0, 0, 0])
+        bz2ibz = map_bz2ibz(bz, frac_coords, phbands.structure.spacegroup, ngqpt, [0, 0, 0]).bz2ibz
+        assert np.all(bz2ibz >= 0)
+        weights = np.bincount(bz2ibz, minlength=len(frac_coords)) / len(bz)
+        phbands.qpoints = KpointList(phbands.structure.lattice.reciprocal_lattice, frac_coords, weights=weights)
+
+        # The DOS is normalized to 3 * natom.
+        natom3 = 3 * len(phbands.structure)
+        gauss_dos = phbands.get_phdos(method="gaussian")
+        self.assert_almost_equal(gauss_dos.idos.values[-1], natom3, decimal=1)
+
+        tetra_dos = phbands.get_phdos(method="tetra", ngqpt=ngqpt)
+        self.assert_equal(tetra_dos.mesh, gauss_dos.mesh)
+        self.assert_almost_equal(tetra_dos.idos.values[-1], natom3, decimal=1)
+        assert np.all(tetra_dos.values >= 0)
+
+        # The divisions of the mesh are required if the q-points are not a MP mesh.
+        with self.assertRaises(ValueError):
+            phbands.get_phdos(method="tetra")
+        # Cannot reconstruct a mesh that is not commensurate with the q-points.
+        with self.assertRaises(ValueError):
+            phbands.get_phdos(method="tetra", ngqpt=[3, 3, 3])
+        with self.assertRaises(ValueError):
+            phbands.get_phdos(method="foo")
+
 
 class PhononDosTest(AbipyTest):
 
@@ -56,6 +90,22 @@ class PhononDosTest(AbipyTest):
         if self.has_matplotlib():
             dos.plot(show=False)
 
+    def test_harmonic_thermo(self):
+        """Testing vectorized harmonic thermodynamics."""
+        # Debye-like DOS normalized to 3 modes (energies in eV).
+        mesh = np.linspace(0, 0.05, num=2001)
+        values = 9 * mesh ** 2 / 0.05 ** 3
+        dos = PhononDos(mesh=mesh, values=values)
+
+        h = dos.get_harmonic_thermo(10, 3000, num=30)
+        h_chunked = dos.get_harmonic_thermo(10, 3000, num=30, max_size=5000)
+        for name in ("df", "de", "cv", "s"):
+            self.assert_almost_equal(h[name].values, h_chunked[name].values)
+
+        # Dulong-Petit limit: cv --> 3 kb per atom at high temperature.
+        self.assert_almost_equal(h.cv.values[-1], 3, decimal=2)
+        assert np.all(np.diff(h.cv.values) > 0)
+
 
 class InteratomicForceConstantsTest(AbipyTest):
 
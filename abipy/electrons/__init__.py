@@ -1,6 +1,34 @@
 """This module provides classes and functions for the analysis of electronic properties."""
-from .ebands import *
-from .gsr import *
-from .gw import *
-from .bse import *
-from .scissors import *
+from abipy.tools.lazyimport import install_lazy_attributes
+
+# The submodules are imported when one of their objects is accessed for the first time (PEP 562).
+# Registry: name --> submodule defining the object.
+_LAZY_ATTRS = {
+    # ebands
+    "ElectronBands": ".ebands",
+    "ElectronDos": ".ebands",
+    "frame_from_ebands": ".ebands",
+    "ElectronBandsPlotter": ".ebands",
+    "ElectronDosPlotter": ".ebands",
+    # gsr
+    "GsrFile": ".gsr",
+    "GsrPlotter": ".gsr",
+    # gw
+    "QPState": ".gw",
+    "SigresFile": ".gw",
+    "SigresPlotter": ".gw",
+    # bse
+    "DielectricTensor": ".bse",
+    "DielectricFunction": ".bse",
+    "MdfFile": ".bse",
+    "MdfReader": ".bse",
+    "MdfPlotter": ".bse",
+    # scissors
+    "Scissors": ".scissors",
+    "ScissorsBuilder": ".scissors",
+}
+
+# The submodules are accessible as attributes of the package.
+_LAZY_MODULES = {"ebands": ".ebands", "gsr": ".gsr", "gw": ".gw", "bse": ".bse", "scissors": ".scissors"}
+
+install_lazy_attributes(globals(), attrs=_LAZY_ATTRS, modules=_LAZY_MODULES)
@@ -23,10 +23,10 @@ from pymatgen.util.plotting_utils import add_fig_kwargs, get_ax_fig_plt
 from pymatgen.serializers.json_coders import pmg_serialize
 from abipy.core.func1d import Function1D
 from abipy.core.mixins import NotebookWriter
-from abipy.core.kpoints import Kpoint, KpointList, Kpath, IrredZone, KpointsReaderMixin, kmesh_from_mpdivs
+from abipy.core.kpoints import Kpoint, KpointList, Kpath, IrredZone, KpointsReaderMixin, kmesh_from_mpdivs, map_bz2ibz
 from abipy.core.structure import Structure
 from abipy.iotools import ETSF_Reader, Visualizer, bxsf_write
-from abipy.tools import gaussian
+from abipy.tools import gaussian, gaussian_sum, gaussian_sum_hist, linear_tetra_dos
 
 
 import logging
@@ -1166,6 +1166,9 @@ class ElectronBands(object):
 
         Args:
             method: String defining the method for the computation of the DOS.
+                "gaussian": Sum of gaussians truncated at 6 standard deviations.
+                "histogram": Histogram of the eigenvalues convolved with a gaussian (faster).
+                "tetra": Linear tetrahedron method (requires a Monkhorst-Pack mesh, width is not used).
             step: Energy step (eV) of the linear mesh.
             width: Standard deviation (eV) of the gaussian.
             eminmax: Min and max energy (eV) for the frequency mesh.
@@ -1196,19 +1199,50 @@ class ElectronBands(object):
         mesh, step = np.linspace(e_min, e_max, num=nw, endpoint=True, retstep=True)
         dos = np.zeros((self.nsppol, nw))
 
-        if method == "gaussian":
+        if method in ("gaussian", "histogram"):
+            gsum = gaussian_sum if method == "gaussian" else gaussian_sum_hist
+            kweights = np.array([k.weight for k in self.kpoints])
             for spin in self.spins:
-                for k, kpoint in enumerate(self.kpoints):
-                    weight = kpoint.weight
-                    for band in range(self.nband_sk[spin,k]):
-                        e = self.eigens[spin,k,band]
-                        dos[spin] += weight * gaussian(mesh, width, center=e)
+                # Bands with band >= nband_sk[spin, k] are not included.
+                nband_k = np.reshape(self.nband_sk, (self.nsppol, self.nkpt))[spin]
+                mask = np.arange(self.mband) < nband_k[:, None]
+                weights = np.broadcast_to(kweights[:, None], mask.shape)
+                dos[spin] = gsum(mesh, self.eigens[spin][mask], width, weights=weights[mask])
+
+        elif method == "tetra":
+            dos = self._get_tetra_dos(mesh)
 
         else:
             raise ValueError("Method %s is not supported" % method)
 
         return ElectronDos(mesh, dos, self.nelect)
 
+    def _get_tetra_dos(self, mesh):
+        """
+        Compute the DOS on mesh with the linear tetrahedron method. Return array of shape [nsppol, len(mesh)].
+        """
+        errors = []; eapp = errors.append
+        if np.any(self.nband_sk != self.mband):
+            eapp("The number of bands in nband must be constant")
+        if not self.kpoints.is_ibz or not self.kpoints.is_mpmesh:
+            eapp("The tetrahedron method requires a Monkhorst-Pack mesh in the IBZ.")
+        else:
+            mpdivs, shifts = self.kpoints.mpdivs_shifts
+            if shifts is not None and len(shifts) != 1:
+                eapp("The tetrahedron method does not support multiple shifts.")
+        if errors:
+            raise ValueError("\n".join(errors))
+
+        if shifts is None: shifts = [0, 0, 0]
+        ebands3d = EBands3D(self.structure, ibz_arr=self.kpoints.frac_coords, ene_ibz=self.eigens,
+                            ndivs=mpdivs, shifts=shifts, pbc=False, order="unit_cell")
+
+        # Eigenvalues on the full mesh [nsppol, nband, n0, n1, n2] in C order.
+        emesh_sbk = ebands3d.get_emesh_sbk()
+        emesh_sbk.shape = (self.nsppol, self.nband) + tuple(mpdivs)
+
+        return np.array([linear_tetra_dos(mesh, emesh_sbk[spin]) for spin in self.spins])
+
     def get_ejdos(self, spin, valence, conduction, method="gaussian", step=0.1, width=0.2, mesh=None):
         """
         Compute the join density of states at q==0
@@ -1262,17 +1296,18 @@ class ElectronBands(object):
         # Normalize the occupation factors.
         full = 2.0 if self.nsppol == 1 else 1.0
 
-        if method == "gaussian":
-            for k, kpoint in enumerate(self.kpoints):
-                weight = kpoint.weight
-                for c in conduction:
-                    ec = self.eigens[spin,k,c]
-                    fc = 1.0 - self.occfacts[spin,k,c] / full
-                    for v in valence:
-                        ev = self.eigens[spin,k,v]
-                        fv = self.occfacts[spin,k,v] / full
-                        fact = weight * fv * fc
-                        jdos += fact * gaussian(mesh, width, center=ec-ev)
+        if method in ("gaussian", "histogram"):
+            gsum = gaussian_sum if method == "gaussian" else gaussian_sum_hist
+            kweights = np.array([k.weight for k in self.kpoints])
+            valence = list(valence)
+            ev = self.eigens[spin][:, valence]
+            fv = self.occfacts[spin][:, valence] / full
+            # Loop over conduction bands, all (k, v) transitions are treated at once.
+            for c in conduction:
+                ec = self.eigens[spin,:,c]
+                fc = 1.0 - self.occfacts[spin,:,c] / full
+                weights = (kweights * fc)[:, None] * fv
+                jdos += gsum(mesh, ec[:, None] - ev, width, weights=weights)
 
         else:
             raise ValueError("Method %s is not supported" % method)
@@ -1357,18 +1392,12 @@ class ElectronBands(object):
         qp_energies = np.zeros(self.shape)
 
         # Calculate quasi-particle energies with the scissors operator.
+        # Bands >= nband_sk are not corrected.
+        nband_sk = np.reshape(self.nband_sk, (self.nsppol, self.nkpt))
         for spin in self.spins:
-            sciss = scissors[spin]
-            for k in self.kidxs:
-                for band in range(self.nband_sk[spin,k]):
-                    e0 = self.eigens[spin,k,band]
-                    try:
-                        qp_ene = e0 + sciss.apply(e0)
-                    except sciss.Error:
-                        raise
-
-                    # Update the energy.
-                    qp_energies[spin,k,band] = qp_ene
+            mask = np.arange(self.mband) < nband_sk[spin][:, None]
+            e0 = self.eigens[spin][mask]
+            qp_energies[spin][mask] = e0 + scissors[spin].apply(e0)
 
         # Apply the scissors to the Fermi level as well.
         # NB: This should be ok for semiconductors in which fermie == CBM (abinit convention)
@@ -2403,13 +2432,9 @@ class EBands3D(object):
         # Compute the full list of k-points according to order.
         self.bz_arr = kmesh_from_mpdivs(self.ndivs, shifts, pbc=pbc, order=order)
 
-        # Compute the mapping bz --> ibz
-        try:
-            from abipy.extensions.klib import map_bz2ibz
-            self.bz2ibz = map_bz2ibz(structure, self.bz_arr, self.ibz_arr)
-        except ImportError:
-            # This is really slow
-            self.bz2ibz = self.slow_map_bz2ibz(structure, self.bz_arr, self.ibz_arr)
+        # Compute the mapping bz --> ibz and the symmetry operations: k_bz = S k_ibz + G
+        bzmap = map_bz2ibz(self.bz_arr, self.ibz_arr, structure.spacegroup, self.ndivs, self.shifts)
+        self.bz2ibz, self.bz2isym, self.bz2timrev = bzmap
 
         if np.any(self.bz2ibz == -1):
             #for ik_bz, ik_ibz in enumerate(self.bz2ibz):
@@ -2431,54 +2456,18 @@ class EBands3D(object):
         """Number of point in the full bz."""
         return len(self.bz_arr)
 
-    @staticmethod
-    def slow_map_bz2ibz(structure, bz, ibz):
-        #print("bz",bz)
-        #print("ibz",ibz)
-        bz2ibz = -np.ones(len(bz), dtype=np.int)
-        from abipy.core.kpoints import issamek
-
-        for ik_bz, kbz in enumerate(bz):
-            #print("kbz",kbz)
-            found = False
-            for ik_ibz, kibz in enumerate(ibz):
-                #print("kibz",kibz)
-                if found: break
-                for symmop in structure.spacegroup:
-                    krot = symmop.rotate_k(kibz)
-                    if issamek(krot, kbz):
-                        bz2ibz[ik_bz] = ik_ibz
-                        found = True
-                        break
-
-        return bz2ibz
-
     def get_emesh_sbk(self):
         """
         Returns a numpy array of shape [nsppol, nband, len_bz] with the eigevanalues in the full zone.
         """
-        emesh_sbk = np.empty((self.nsppol, self.nband, self.len_bz))
-        for spin in self.spins:
-            for band in self.bands:
-                #emesh_sbk[spin, band, :] = self.ene_ibz[spin, self.bz2ibz, band]
-                emesh_sbk[spin, band, :] = self.get_emesh_k(spin, band)
-
-        return emesh_sbk
+        # e_{Sk} = e_{k}
+        return np.ascontiguousarray(np.transpose(self.ene_ibz[:, self.bz2ibz, :], (0, 2, 1)))
 
     def get_emesh_k(self, spin, band):
         """
         Return a `ndarray` with shape [len_bz] with the energies in the full zone for given spin and band.
         """
-        emesh_k = np.empty(self.len_bz)
-
-        ene_ibz = self.ene_ibz[spin,:,band]
-        # e_{Sk} = e_{k}
-        for ik_bz in range(self.len_bz):
-           ik_ibz = self.bz2ibz[ik_bz]
-           #print(ik_bz, ">>>", ik_ibz)
-           emesh_k[ik_bz] = self.ene_ibz[spin,ik_ibz,band]
-
-        return emesh_k
+        return self.ene_ibz[spin, self.bz2ibz, band]
 
     #def plane_cut(self, values_ibz):
     #    """
@@ -2,6 +2,7 @@
 """Classes for the analysis of fatbands and PJDOS."""
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import os
 import traceback
 import numpy as np
 
@@ -14,6 +15,10 @@ from pymatgen.util.plotting_utils import add_fig_kwargs, get_ax_fig_plt
 from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter
 from abipy.electrons.ebands import ElectronsReader
 from abipy.tools import gaussian
+from abipy.tools.iotools import sidecar_path, remove_stale_sidecars
+
+import logging
+logger = logging.getLogger(__name__)
 
 
 class FatBandsFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter):
@@ -52,13 +57,18 @@ class FatBandsFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWrite
     linewidth = 0.1
     linecolor = "grey"
 
+    # If True, the PJDOS computed by the integrators are saved in a hidden npz file
+    # in the same directory as the FATBANDS file and reused in the next runs.
+    cache_pjdos = False
+
     @classmethod
     def from_file(cls, filepath):
         """Initialize the object from a Netcdf file"""
         return cls(filepath)
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, cache_pjdos=None):
         super(FatBandsFile, self).__init__(filepath)
+        if cache_pjdos is not None: self.cache_pjdos = cache_pjdos
         self.reader = r = ElectronsReader(filepath)
 
         # Initialize the electron bands from file
@@ -1127,31 +1137,89 @@ class _DosIntegrator(object):
     #    """Array [natom, nsppol, lmax**2]"""
 
     @lazy_property
-    def symbols_lso(self):
+    def cache_path(self):
+        """
+        Path of the npz file used to cache the PJDOS. None if caching is disabled.
+        The name depends on the FATBANDS file (path, size, modification time) and on the integration parameters.
+        The files written before the last modification of the FATBANDS file are removed when a new file is saved.
+        """
+        if not self.fbfile.cache_pjdos: return None
+        return sidecar_path(self.fbfile.filepath, "PJDOS", self.method, self.step, self.width)
+
+    @lazy_property
+    def walm_dos(self):
         """
+        Site-, l- and m-resolved PJDOS. Array of shape [natom, mbesslang**2, nsppol, nw].
+        The results are read from the cache file if available.
+        """
+        path = self.cache_path
+        if path is not None and os.path.exists(path):
+            try:
+                with np.load(path) as d:
+                    if np.array_equal(d["mesh"], self.mesh):
+                        return d["walm_dos"]
+            except Exception:
+                logger.warning("Ignoring corrupted PJDOS cache file: %s" % path)
+
+        walm_dos = self._compute_walm_dos()
+
+        if path is not None:
+            try:
+                remove_stale_sidecars(self.fbfile.filepath, "PJDOS")
+                np.savez(path, mesh=self.mesh, walm_dos=walm_dos)
+            except (IOError, OSError):
+                pass
+
+        return walm_dos
+
+    def _compute_walm_dos(self, max_size=2**24):
+        """
+        Contract the `walm_sbk` weights with the broadening matrix
+        :math:`w_k G(\omega - e_{bk})` computed in blocks of k-points with at most max_size elements.
         """
         fbfile, ebands = self.fbfile, self.fbfile.ebands
+        if self.method != "gaussian":
+            raise ValueError("Method %s is not supported" % self.method)
+
+        nw, mband, nkpt = len(self.mesh), fbfile.mband, fbfile.nkpt
+        kweights = np.array([kpoint.weight for kpoint in ebands.kpoints])
+        nband_sk = np.reshape(ebands.nband_sk, (fbfile.nsppol, nkpt))
+
+        walm_dos = np.zeros((fbfile.natom, fbfile.mbesslang**2, fbfile.nsppol, nw))
+        kchunk = max(1, max_size // (mband * nw))
+        for spin in range(fbfile.nsppol):
+            for start in range(0, nkpt, kchunk):
+                ks = slice(start, start + kchunk)
+                # Broadening matrix [nk, mband, nw]. Bands >= nband_sk do not contribute.
+                gmat = gaussian(self.mesh, self.width, center=ebands.eigens[spin, ks, :, None])
+                gmat *= kweights[ks, None, None] * (np.arange(mband) < nband_sk[spin, ks, None])[..., None]
+                walm_dos[:, :, spin] += np.tensordot(fbfile.walm_sbk[:, :, spin, :, ks], gmat, axes=([2, 3], [1, 0]))
+
+        return walm_dos
+
+    def get_site_lso(self, iatom):
+        """
+        Return l-decomposed PJDOS for atom index `iatom`. Array of shape [lsize, nsppol, nw].
+        """
+        fbfile = self.fbfile
+        lso = np.zeros((fbfile.lsize, fbfile.nsppol, len(self.mesh)))
+        for l in range(fbfile.lmax_atom[iatom]+1):
+            lso[l] = self.walm_dos[iatom, l**2:(l+1)**2].sum(axis=0)
+
+        return lso
+
+    @lazy_property
+    def symbols_lso(self):
+        """
+        OrderedDict mapping chemical symbol to the l-decomposed PJDOS for this type
+        of atom. Array of shape [lsize, nsppol, nw].
+        """
+        fbfile = self.fbfile
 
         # Compute l-decomposed PJDOS for each type of atom.
         symbols_lso = OrderedDict()
-        if self.method == "gaussian":
-
-            for symbol in fbfile.symbols:
-                lmax = fbfile.lmax_symbol[symbol]
-                wlsbk = fbfile.get_wl_symbol(symbol)
-                lso = np.zeros((fbfile.lsize, fbfile.nsppol, len(self.mesh)))
-                for spin in range(fbfile.nsppol):
-                    for k, kpoint in enumerate(ebands.kpoints):
-                        weight = kpoint.weight
-                        for band in range(ebands.nband_sk[spin, k]):
-                            e = ebands.eigens[spin, k, band]
-                            for l in range(lmax+1):
-                                lso[l, spin] += wlsbk[l, spin, band, k] *\
-                                                weight * gaussian(self.mesh, self.width, center=e)
-                symbols_lso[symbol] = lso
-
-        else:
-            raise ValueError("Method %s is not supported" % self.method)
+        for symbol in fbfile.symbols:
+            symbols_lso[symbol] = sum(self.get_site_lso(iat) for iat in fbfile.symbol2indices[symbol])
 
         return symbols_lso
 
@@ -1174,8 +1242,9 @@ class _DosIntegrator(object):
         for (l, spin), dvals in dls.items():
             arr = np.zeros((nsymb, len(self.mesh)))
             for isymb, symbol in enumerate(fbfile.symbols):
-                arr[isymb] = dvals[symbol]
-            ls_stackdos[(l, spin)] = ar.cumsum(axis=0)
+                # Types with lmax_symbol < l do not contribute.
+                if symbol in dvals: arr[isymb] = dvals[symbol]
+            ls_stackdos[(l, spin)] = arr.cumsum(axis=0)
 
         return ls_stackdos
 
@@ -6,7 +6,7 @@ import sys
 import copy
 import numpy as np
 
-from collections import namedtuple, OrderedDict, Iterable, defaultdict
+from collections import namedtuple, OrderedDict, Iterable, Sequence, defaultdict
 from monty.string import list_strings, is_string, marquee
 from monty.collections import AttrDict
 from monty.functools import lazy_property
@@ -17,8 +17,7 @@ from six.moves import cStringIO
 from abipy.core.func1d import Function1D
 from abipy.core.kpoints import Kpoint, KpointList
 from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter
-from abipy.iotools import ETSF_Reader
-from abipy.electrons.ebands import ElectronBands
+from abipy.electrons.ebands import ElectronsReader
 from abipy.electrons.scissors import Scissors
 
 import logging
@@ -148,12 +147,119 @@ class QPState(namedtuple("QPState", "spin kpoint band e0 qpe qpe_diago vxcme sig
             return _TIPS
 
 
-class QPList(list):
-    """A list of quasiparticle corrections for a given spin."""
+class QPList(Sequence):
+    """
+    A list of quasiparticle corrections for a given spin.
+
+    The data is stored in a struct-of-arrays: one numpy array for each field of :class:`QPState`.
+    The k-points are stored as integer indices (kidx) in a list of :class:`Kpoint` objects.
+    :class:`QPState` objects are built on the fly when the list is indexed or iterated.
+    """
     def __init__(self, *args, **kwargs):
-        super(QPList, self).__init__(*args)
+        """
+        Args:
+            Optional iterable with :class:`QPState` objects.
+            is_e0sorted: True if the QP states are sorted by e0.
+        """
+        qps = list(args[0]) if args else []
         self.is_e0sorted = kwargs.get("is_e0sorted", False)
 
+        # Map kpoint objects to kidx. Note that we use id to avoid calling Kpoint.__eq__
+        kpoints, kid2idx = [], {}
+        for qp in qps:
+            if id(qp.kpoint) not in kid2idx:
+                kid2idx[id(qp.kpoint)] = len(kpoints)
+                kpoints.append(qp.kpoint)
+        self._kpoints = kpoints
+
+        self._columns = OrderedDict()
+        for field in QPState._fields:
+            if field == "kpoint":
+                self._columns["kidx"] = np.array([kid2idx[id(qp.kpoint)] for qp in qps], dtype=np.int)
+            else:
+                self._columns[field] = np.array([getattr(qp, field) for qp in qps])
+
+    @classmethod
+    def from_columns(cls, kpoints, columns, is_e0sorted=False):
+        """
+        Build the object from arrays.
+
+        Args:
+            kpoints: List of :class:`Kpoint` objects.
+            columns: dict mapping the name of the fields of :class:`QPState` to arrays.
+                The kpoint field is replaced by `kidx`, the index of the k-point in kpoints.
+            is_e0sorted: True if the QP states are sorted by e0.
+        """
+        new = cls(is_e0sorted=is_e0sorted)
+        new._kpoints = list(kpoints)
+        for key in new._columns:
+            new._columns[key] = np.asarray(columns[key])
+
+        return new
+
+    def _new_with_rows(self, rows, is_e0sorted=False):
+        """Return new :class:`QPList` with the rows selected by rows (slice, list of indices or mask)."""
+        return self.__class__.from_columns(self._kpoints, {k: v[rows] for k, v in self._columns.items()},
+                                           is_e0sorted=is_e0sorted)
+
+    def __len__(self):
+        return len(self._columns["kidx"])
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, np.integer)):
+            return self._new_with_rows(index)
+
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("QPList index out of range")
+
+        d = {k: v[index].item() for k, v in self._columns.items()}
+        d["kpoint"] = self._kpoints[d.pop("kidx")]
+        return QPState(**d)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def _map_kpoints(self, kpoints):
+        """
+        Map kpoints onto the k-points of self. Return array with the index
+        of the first k-point of self equal to kpoints[j] (-1 if not found).
+        """
+        kmap = -np.ones(len(kpoints), dtype=np.int)
+        for j, kpoint in enumerate(kpoints):
+            for i, k in enumerate(self._kpoints):
+                if k == kpoint:
+                    kmap[j] = i
+                    break
+
+        return kmap
+
+    def __add__(self, other):
+        """
+        Concatenate two :class:`QPList` objects.
+        The k-points of other that are already in self are mapped onto the k-points of self.
+        """
+        kmap = self._map_kpoints(other._kpoints)
+        new = np.nonzero(kmap < 0)[0]
+        kmap[new] = len(self._kpoints) + np.arange(len(new))
+
+        columns = {k: np.concatenate((v, other._columns[k])) for k, v in self._columns.items()}
+        columns["kidx"] = np.concatenate((self._columns["kidx"], kmap[other._columns["kidx"]]))
+        return self.__class__.from_columns(self._kpoints + [other._kpoints[j] for j in new], columns)
+
+    def __eq__(self, other):
+        if not isinstance(other, QPList) or len(self) != len(other): return False
+        for k, v in self._columns.items():
+            if k != "kidx" and np.any(v != other._columns[k]): return False
+
+        # Compare the k-points once for each pair of indices.
+        kpairs = set(zip(self._columns["kidx"], other._columns["kidx"]))
+        return all(self._kpoints[i] == other._kpoints[j] for i, j in kpairs)
+
+    def __ne__(self, other):
+        return not self == other
+
     def __repr__(self):
         return "<%s at %s, len=%d>" % (self.__class__.__name__, id(self), len(self))
 
@@ -169,29 +275,51 @@ class QPList(list):
 
     def copy(self):
         """Copy of self."""
-        return self.__class__([qp.copy() for qp in self], is_e0sorted=self.is_e0sorted)
+        return self.__class__.from_columns([copy.copy(k) for k in self._kpoints],
+                                           {k: v.copy() for k, v in self._columns.items()},
+                                           is_e0sorted=self.is_e0sorted)
 
     def sort_by_e0(self):
         """Return a new object with the E0 energies sorted in ascending order."""
-        return QPList(sorted(self, key=lambda qp: qp.e0), is_e0sorted=True)
+        return self._new_with_rows(np.argsort(self._columns["e0"], kind="mergesort"), is_e0sorted=True)
 
     def get_e0mesh(self):
         """Return the E0 energies."""
         if not self.is_e0sorted:
             raise ValueError("QPState corrections are not sorted. Use sort_by_e0")
 
-        return np.array([qp.e0 for qp in self])
+        return self._columns["e0"].copy()
 
     def get_field(self, field):
         """`ndarray` containing the values of field."""
-        return np.array([getattr(qp, field) for qp in self])
+        if field == "qpeme0":
+            return self._columns["qpe"] - self._columns["e0"]
+        elif field == "kpoint":
+            kpoints = np.empty(len(self._kpoints), dtype=object)
+            for i, kpoint in enumerate(self._kpoints):
+                kpoints[i] = kpoint
+            return kpoints[self._columns["kidx"]]
+        else:
+            return self._columns[field].copy()
+
+    def get_kpoint_indices(self, kpoints):
+        """
+        Return `ndarray` with the index of the k-point of each QP state in kpoints.
+        kpoints.index is called only once per k-point.
+        """
+        kinds = np.array([kpoints.index(k) for k in self._kpoints], dtype=np.int)
+        return kinds[self._columns["kidx"]] if len(kinds) else np.array([], dtype=np.int)
 
     def get_value(self, skb_tup, field):
         """Return the value of field for the given spin kp band tuple, None if not found"""
-        for qp in self:
-            if qp.skb == skb_tup:
-                return getattr(qp, field)
-        return None
+        spin, kpoint, band = skb_tup
+        kmatch = np.array([k == kpoint for k in self._kpoints], dtype=bool)
+        if not np.any(kmatch): return None
+        rows = np.nonzero((self._columns["spin"] == spin) & (self._columns["band"] == band) &
+                          kmatch[self._columns["kidx"]])[0]
+        if not len(rows): return None
+
+        return getattr(self[rows[0]], field)
 
     def get_qpenes(self):
         """Return an array with the :class:`QPState` energies."""
@@ -201,6 +329,11 @@ class QPList(list):
         """Return an arrays with the :class:`QPState` corrections."""
         return self.get_field("qpeme0")
 
+    def to_dataframe(self):
+        """Return pandas DataFrame with one row for each QP state."""
+        import pandas as pd
+        return pd.DataFrame(OrderedDict([(field, self.get_field(field)) for field in QPState.get_fields()]))
+
     def to_table(self):
         """Return a table (list of list of strings)."""
         header = QPState.get_fields(exclude=["spin", "kpoint"])
@@ -307,8 +440,8 @@ class QPList(list):
             # Build the scissors operator.
             scissors = qplist_spin[0].build_scissors(domains)
 
-            # Compute list of interpolated QP energies.
-            qp_enes = [scissors.apply(e0) for e0 in ks_energies]
+            # Compute the interpolated QP energies.
+            qp_enes = scissors.apply(ks_energies)
         """
         # Sort QP corrections according to the initial KS energy.
         qps = self.sort_by_e0()
@@ -372,7 +505,7 @@ class QPList(list):
             for dom in domains[:]:
                 plt.plot(2*[dom[0]], [min(qpcorrs), max(qpcorrs)])
                 plt.plot(2*[dom[1]], [min(qpcorrs), max(qpcorrs)])
-            intp_qpc = [sciss.apply(e0) for e0 in e0mesh]
+            intp_qpc = sciss.apply(e0mesh)
             plt.plot(e0mesh, intp_qpc, label="scissor")
             plt.legend(bbox_to_anchor=(0.9, 0.2))
             plt.show()
@@ -387,17 +520,28 @@ class QPList(list):
         Raise:
             ValueError if merge cannot be done.
         """
-        skb0_list = [qp.skb for qp in self]
-        for qp in other:
-            if qp.skb in skb0_list:
-                raise ValueError("Found duplicated (s,b,k) indexes: %s" % str(qp.skb))
+        # Map the k-points of self and other onto the first equal k-point of self (-1 if not found)
+        # and compare integer keys built from the (spin, kpoint, band) indices.
+        smap = self._map_kpoints(self._kpoints)
+        kmap = self._map_kpoints(other._kpoints)
+
+        nk = len(self._kpoints) + 1
+        nb = 1 + max([0] + [qps._columns["band"].max() for qps in (self, other) if len(qps)])
+
+        def skb_keys(spins, kinds, bands):
+            return (spins * nk + kinds + 1) * nb + bands
+
+        keys0 = skb_keys(self._columns["spin"], smap[self._columns["kidx"]], self._columns["band"])
+        keys1 = skb_keys(other._columns["spin"], kmap[other._columns["kidx"]], other._columns["band"])
+        dups = np.in1d(keys1, keys0)
+        if np.any(dups):
+            qp = other[np.nonzero(dups)[0][0]]
+            raise ValueError("Found duplicated (s,b,k) indexes: %s" % str(qp.skb))
 
         if copy:
-            qps = self.copy() + other.copy()
+            return self.copy() + other.copy()
         else:
-            qps = self + other
-
-        return self.__class__(qps)
+            return self + other
 
 
 class Sigmaw(object):
@@ -849,7 +993,7 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         # Keep a reference to the SigresReader.
         self.reader = reader = SigresReader(self.filepath)
 
-        self._structure = reader.read_structure()
+        self._structure = reader.structure
         self.gwcalctyp = reader.gwcalctyp
         self.ibz = reader.ibz
         self.gwkpoints = reader.gwkpoints
@@ -865,29 +1009,18 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
 
         self._ebands = ebands = reader.ks_bands
 
+        # Add QPState markers to the KS band structure.
+        # Note that only the (small) arrays with the QP results are read here.
         qplist_spin = self.qplist_spin
 
-        # Add QPState markers to the KS band structure.
         # Each marker is a list of tuple(x,y,value)
+        x = np.concatenate([qps.get_kpoint_indices(ebands.kpoints) for qps in qplist_spin])
+        y = np.concatenate([qps.get_field("e0") for qps in qplist_spin])
         for qpattr in QPState.get_fields(exclude=("spin", "band", "kpoint",)):
-            x, y, s = [], [], []
-
-            for spin in range(self.nsppol):
-                for qp in qplist_spin[spin]:
-                    ik = self.ebands.kpoints.index(qp.kpoint)
-                    x.append(ik)
-                    y.append(qp.e0)
-                    size = getattr(qp, qpattr)
-                    # Handle complex quantities
-                    if np.iscomplex(size): size = size.real
-                    s.append(size)
-
+            # Handle complex quantities
+            s = np.concatenate([qps.get_field(qpattr).real for qps in qplist_spin])
             ebands.set_marker(qpattr, (x, y, s))
 
-        # TODO handle the case in which nkptgw < nkibz
-        self.qpgaps = reader.read_qpgaps()
-        self.qpenes = reader.read_qpenes()
-
     @lazy_property
     def params(self):
         """AttrDict dictionary with the GW convergence parameters, e.g. ecuteps"""
@@ -939,15 +1072,27 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         """ndarray with shape [nsppol, nkibz] in eV"""
         return self.reader.read_qpgaps()
 
+    @lazy_property
+    def qpenes(self):
+        """Complex ndarray with the QP energies. shape [nsppol, nkibz, nbnds] in eV"""
+        return self.reader.read_qpenes()
+
     def get_qpgap(self, spin, kpoint):
         k = self.reader.kpt2fileindex(kpoint)
         return self.qpgaps[spin, k]
 
     def get_sigmaw(self, spin, kpoint, band):
-        wmesh, sigxc_values = self.reader.read_sigmaw(spin, kpoint, band)
-        wmesh, spf_values = self.reader.read_spfunc(spin, kpoint, band)
+        """Return :class:`Sigmaw` object for the given (spin, kpoint, band)."""
+        return self.get_sigmaw_list([spin], [kpoint], [band])[0]
 
-        return Sigmaw(spin, kpoint, band, wmesh, sigxc_values, spf_values)
+    def get_sigmaw_list(self, spins, kpoints, bands):
+        """
+        Return list of :class:`Sigmaw` objects for the states specified by the
+        sequences spins, kpoints, bands. Data is read from file in a single pass.
+        """
+        wmesh, sigxc_values, spf_values = self.reader.read_sigmaw_states(spins, kpoints, bands)
+        return [Sigmaw(spin, kpoint, band, wmesh, sigxc_values[i], spf_values[i])
+                for i, (spin, kpoint, band) in enumerate(zip(spins, kpoints, bands))]
 
     def get_spfunc(self, spin, kpoint, band):
         wmesh, spf_values = self.reader.read_spfunc(spin, kpoint, band)
@@ -977,8 +1122,8 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
 
         ax, fig, plt = get_ax_fig_plt(ax)
 
-        for band in bands:
-            sigw = self.get_sigmaw(spin, kpoint, band)
+        sigw_list = self.get_sigmaw_list(len(bands) * [spin], len(bands) * [kpoint], bands)
+        for band, sigw in zip(bands, sigw_list):
             label = "skb = %s, %s, %s" % (spin, kpoint, band)
             sigw.plot_ax(ax, label="$A(\omega)$:" + label, **kwargs)
 
@@ -1059,7 +1204,7 @@ class SigresFile(AbinitNcFile, Has_Structure, Has_ElectronBands, NotebookWriter)
         return self._write_nb_nbpath(nb, nbpath)
 
 
-class SigresReader(ETSF_Reader):
+class SigresReader(ElectronsReader):
     """This object provides method to read data from the SIGRES file produced ABINIT.
     # See 70gw/m_sigma_results.F90
 
@@ -1208,11 +1353,12 @@ class SigresReader(ETSF_Reader):
     ! Frequencies used to evaluate the Derivative of Sigma.
     """
     def __init__(self, path):
-        self.ks_bands = ElectronBands.from_file(path)
-        self.nsppol = self.ks_bands.nsppol
-
         super(SigresReader, self).__init__(path)
 
+        # The KS band structure is read from the same file handle.
+        self.ks_bands = self.read_ebands()
+        self.nsppol = self.ks_bands.nsppol
+
         try:
             self.nomega_r = self.read_dimvalue("nomega_r")
         except self.Error:
@@ -1221,7 +1367,7 @@ class SigresReader(ETSF_Reader):
         #self.nomega_i = self.read_dim("nomega_i")
 
         # Save important quantities needed to simplify the API.
-        self.structure = self.read_structure()
+        self.structure = self.ks_bands.structure
 
         self.gwcalctyp = self.read_value("gwcalctyp")
         self.usepawu = self.read_value("usepawu")
@@ -1245,37 +1391,42 @@ class SigresReader(ETSF_Reader):
         self.min_gwbstop = np.min(self.gwbstop_sk)
         self.max_gwbstop = np.max(self.gwbstop_sk)
 
-        self._egw = self.read_value("egw", cmode="c")
-
-        # Read and save important matrix elements.
-        # All these arrays are dimensioned
-        # vxcme(b1gw:b2gw,nkibz,nsppol*nsig_ab))
-        self._vxcme = self.read_value("vxcme")
-        self._sigxme = self.read_value("sigxme")
+        # The arrays with the QP results are read on demand (see lazy properties below)
+        # The self-energy as function of frequency and eigvec_qp are read by slices when needed.
+        #self._mlda_to_qp
 
-        self._hhartree = self.read_value("hhartree", cmode="c")
+    @lazy_property
+    def _egw(self):
+        """QP energies (complex) [nsppol, nkibz, nbnds]"""
+        return self.read_value("egw", cmode="c")
 
-        self._vUme = self.read_value("vUme")
-        #if self.usepawu == 0: self._vUme.fill(0.0)
+    # Matrix elements. All these arrays are dimensioned
+    # vxcme(b1gw:b2gw,nkibz,nsppol*nsig_ab))
 
-        # Complex arrays
-        self._sigcmee0 = self.read_value("sigcmee0", cmode="c")
-        self._ze0 = self.read_value("ze0", cmode="c")
+    @lazy_property
+    def _vxcme(self):
+        return self.read_value("vxcme")
 
-        # Frequencies for the spectral function.
-        if self.has_spfunc:
-            self._omega_r = self.read_value("omega_r")
+    @lazy_property
+    def _sigxme(self):
+        return self.read_value("sigxme")
 
-            self._sigcme = self.read_value("sigcme", cmode="c")
-            self._sigxcme = self.read_value("sigxcme", cmode="c")
+    @lazy_property
+    def _vUme(self):
+        return self.read_value("vUme")
 
-        # Self-consistent case
-        self._en_qp_diago = self.read_value("en_qp_diago")
+    @lazy_property
+    def _sigcmee0(self):
+        return self.read_value("sigcmee0", cmode="c")
 
-        # <KS|QPState>
-        self._eigvec_qp = self.read_value("eigvec_qp", cmode="c")
+    @lazy_property
+    def _ze0(self):
+        return self.read_value("ze0", cmode="c")
 
-        #self._mlda_to_qp
+    @lazy_property
+    def _en_qp_diago(self):
+        """QP energies obtained by diagonalizing the self-energy (self-consistent case)."""
+        return self.read_value("en_qp_diago")
 
     #def is_selfconsistent(self, mode):
     #    return self.gwcalctyp
@@ -1321,25 +1472,44 @@ class SigresReader(ETSF_Reader):
         return self.read_value("kptgw")
 
     def read_allqps(self):
-        qps_spin = self.nsppol * [None]
-
-        for spin in range(self.nsppol):
-            qps = []
-            for gwkpoint in self.gwkpoints:
-                ik = self.gwkpt2seqindex(gwkpoint)
-                bands = range(self.gwbstart_sk[spin,ik], self.gwbstop_sk[spin,ik])
-                for band in bands:
-                    qps.append(self.read_qp(spin, gwkpoint, band))
-
-            qps_spin[spin] = QPList(qps)
-
-        return tuple(qps_spin)
+        """Read all the QP states. Return tuple of :class:`QPList` objects indexed by spin."""
+        return tuple(self._read_qplist(spin, range(len(self.gwkpoints))) for spin in range(self.nsppol))
 
     def read_qplist_sk(self, spin, kpoint):
-        ik = self.gwkpt2seqindex(kpoint)
-        bstart, bstop = self.gwbstart_sk[spin, ik], self.gwbstop_sk[spin, ik]
+        """Read the QP states for given spin and kpoint. Return :class:`QPList`."""
+        return self._read_qplist(spin, [self.gwkpt2seqindex(kpoint)])
+
+    def _read_qplist(self, spin, gwk_inds):
+        """
+        Build :class:`QPList` with the QP states for given spin and list of GW k-point indices.
+        The columns are extracted from the arrays stored in self with fancy indexing.
+        """
+        gwk_inds = np.array(gwk_inds, dtype=np.int)
+        bstart, bstop = self.gwbstart_sk[spin, gwk_inds], self.gwbstop_sk[spin, gwk_inds]
+        nbs = bstop - bstart
+
+        # Row --> (ik_gw, band) with bands ordered as in read_qp.
+        kidx = np.repeat(np.arange(len(gwk_inds)), nbs)
+        bands = np.repeat(bstart, nbs) + np.arange(nbs.sum()) - np.repeat(np.cumsum(nbs) - nbs, nbs)
+        kpoints = [self.gwkpoints[ik] for ik in gwk_inds]
+        ik_file = np.array([self.kpt2fileindex(k) for k in kpoints], dtype=np.int)[kidx]
+        ib_file = bands - np.repeat(bstart, nbs)
+
+        columns = dict(
+            spin=np.full(len(bands), spin, dtype=np.int),
+            kidx=kidx,
+            band=bands,
+            e0=self.ks_bands.eigens[spin, ik_file, bands],
+            qpe=self._egw[spin, ik_file, bands],
+            qpe_diago=self._en_qp_diago[spin, ik_file, bands],
+            vxcme=self._vxcme[spin, ik_file, ib_file],
+            sigxme=self._sigxme[spin, ik_file, ib_file],
+            sigcmee0=self._sigcmee0[spin, ik_file, ib_file],
+            vUme=self._vUme[spin, ik_file, ib_file],
+            ze0=self._ze0[spin, ik_file, ib_file],
+        )
 
-        return QPList([self.read_qp(spin, kpoint, band) for band in range(bstart, bstop)])
+        return QPList.from_columns(kpoints, columns)
 
     #def read_qpene(self, spin, kpoint, band)
 
@@ -1373,35 +1543,59 @@ class SigresReader(ETSF_Reader):
 
     def read_sigmaw(self, spin, kpoint, band):
         """Returns the real and the imaginary part of the self energy."""
-        if not self.has_spfunc:
-            raise ValueError("%s does not contain spectral function data" % self.path)
-
-        ik = self.kpt2fileindex(kpoint)
-
-        return self._omega_r, self._sigxcme[spin,:,ik,band]
+        wmesh, sigxc_values, _ = self.read_sigmaw_states([spin], [kpoint], [band])
+        return wmesh, sigxc_values[0]
 
     def read_spfunc(self, spin, kpoint, band):
+        """Returns the spectral function. See read_sigmaw_states."""
+        wmesh, _, spfunc_values = self.read_sigmaw_states([spin], [kpoint], [band])
+        return wmesh, spfunc_values[0]
+
+    def read_sigmaw_states(self, spins, kpoints, bands):
         """
-        Returns the spectral function.
+        Read Sigma_xc(omega) and compute the spectral function A(omega) for a list of states.
+        Only the hyperslabs containing the k-points and the bands of the states are read from file.
 
          one/pi * ABS(AIMAG(Sr%sigcme(ib,ikibz,io,is))) /
          ( (REAL(Sr%omega_r(io)-Sr%hhartree(ib,ib,ikibz,is)-Sr%sigxcme(ib,ikibz,io,is)))**2 &
         +(AIMAG(Sr%sigcme(ib,ikibz,io,is)))**2) / Ha_eV,&
+
+        Args:
+            spins, kpoints, bands: Sequences of the same length with the spin index,
+                the k-point (:class:`Kpoint` or index) and the band index of each state.
+
+        Returns:
+            (wmesh, sigxc_values, spfunc_values) where sigxc_values and spfunc_values
+            are arrays of shape [nstates, nomega_r].
         """
         if not self.has_spfunc:
             raise ValueError("%s does not contain spectral function data" % self.path)
 
-        ik = self.kpt2fileindex(kpoint)
-        ib = band - self.gwbstart_sk[spin, self.gwkpt2seqindex(kpoint)]
+        spins, bands = np.array(spins, dtype=np.int), np.array(bands, dtype=np.int)
+        ik_file = np.array([self.kpt2fileindex(k) for k in kpoints], dtype=np.int)
+        ik_gw = np.array([self.gwkpt2seqindex(k) for k in kpoints], dtype=np.int)
+        if not len(spins) == len(ik_file) == len(bands):
+            raise ValueError("spins, kpoints and bands must have the same length")
+        ib = bands - self.gwbstart_sk[spins, ik_gw]
+
+        wmesh = self.read_value("omega_r")
+        sigxc_values = np.empty((len(spins), len(wmesh)), dtype=np.complex)
+        sigc_values = np.empty((len(spins), len(wmesh)), dtype=np.complex)
+        hdiag = np.empty(len(spins))
 
-        aim_sigc = np.abs(self._sigcme[spin,:,ik,ib].imag)
+        for spin in np.unique(spins):
+            # Read the block spanned by the k-points and the bands of the states and select the states.
+            sel = spins == spin
+            kinds, kinv = np.unique(ik_file[sel], return_inverse=True)
+            binds, binv = np.unique(ib[sel], return_inverse=True)
+            sigxc_values[sel] = self.read_value_slab("sigxcme", (spin, slice(None), kinds, binds), cmode="c")[:, kinv, binv].T
+            sigc_values[sel] = self.read_value_slab("sigcme", (spin, slice(None), kinds, binds), cmode="c")[:, kinv, binv].T
+            hdiag[sel] = self.read_value_slab("hhartree", (spin, kinds, binds, binds), cmode="c")[kinv, binv, binv].real
 
-        den = np.zeros(self.nomega_r)
-        for (io, omega) in enumerate(self._omega_r):
-            den[io] = (omega - self._hhartree[spin,ik,ib,ib].real - self._sigxcme[spin,io,ik,ib].real) ** 2 + \
-                self._sigcme[spin,io,ik,ib].imag ** 2
+        den = (wmesh - hdiag[:, None] - sigxc_values.real) ** 2 + sigc_values.imag ** 2
+        spfunc_values = 1. / np.pi * np.abs(sigc_values.imag) / den
 
-        return self._omega_r, 1./np.pi * (aim_sigc/den)
+        return wmesh, sigxc_values, spfunc_values
 
     def read_eigvec_qp(self, spin, kpoint, band=None):
         """
@@ -1409,9 +1603,9 @@ class SigresReader(ETSF_Reader):
         """
         ik = self.kpt2fileindex(kpoint)
         if band is not None:
-            return self._eigvec_qp[spin,ik,:,band]
+            return self.read_value_slab("eigvec_qp", (spin, ik, slice(None), band), cmode="c")
         else:
-            return self._eigvec_qp[spin,ik,:,:]
+            return self.read_value_slab("eigvec_qp", (spin, ik), cmode="c")
 
     def read_params(self):
         """
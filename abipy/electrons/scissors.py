@@ -66,23 +66,25 @@ class Scissors(object):
         if bounds is not None:
             blow, bhigh = bounds[0][0], bounds[0][1]
 
+        # NB: The constants are computed here so that errors in bounds are detected
+        # at construction time and not when func_low, func_high are called.
         if blow.lower() == "c":
             try:
-                self.func_low = lambda x: float(bounds[0][1])
+                fx_low = float(bounds[0][1])
             except:
                 x_low = self.domains[0,0]
-                fx_low = func_list[0](x_low)
-                self.func_low = lambda x: fx_low
+                fx_low = float(func_list[0](x_low))
+            self.func_low = lambda x: fx_low
         else:
             raise NotImplementedError("Only constant boundaries are implemented")
 
         if bhigh.lower() == "c":
             try:
-                self.func_high = lambda x: float(bounds[1][1])
+                fx_high = float(bounds[1][1])
             except:
-                x_high = self.domains[1, -1]
-                fx_high = func_list[-1](x_high)
-                self.func_high = lambda x: fx_high
+                x_high = self.domains[-1, 1]
+                fx_high = float(func_list[-1](x_high))
+            self.func_high = lambda x: fx_high
         else:
             raise NotImplementedError("Only constant boundaries are implemented")
 
@@ -90,32 +92,41 @@ class Scissors(object):
         self.out_bounds = np.zeros(3, np.int)
 
     def apply(self, eig):
-        """Correct the eigenvalue eig (eV units)."""
-        # Get the list of domains.
+        """
+        Correct the eigenvalue eig (eV units).
+
+        eig can be a scalar or an array-like object. In the latter case, the domains are assigned
+        with np.searchsorted and each function is called once with all the eigenvalues in its domain.
+        The number of points below and above the domains is accumulated in self.out_bounds.
+        """
+        eigs = np.asarray(eig, dtype=np.float)
+        flat = eigs.ravel()
         domains = self.domains
 
-        if eig < domains[0,0]:
-            # Eig is below the first point of the first domain.
-            # Call func_low
-            print("left ", eig, " < ", domains[0,0])
-            self.out_bounds[0] += 1
-            return self.func_low(eig)
+        # Eigenvalues below the first point of the first domain --> func_low
+        # Eigenvalues above the last point of the last domain --> func_high
+        low, high = flat < domains[0,0], flat > domains[-1,1]
+
+        # Index of the first domain whose upper bound is >= eig.
+        # eig is inside the domain if it's >= lower bound else it falls in a hole.
+        idx = np.minimum(np.searchsorted(domains[:,1], flat, side="left"), len(domains) - 1)
+        inside = ~low & ~high & (flat >= domains[idx, 0])
+        holes = ~low & ~high & ~inside
+        if np.any(holes):
+            self.out_bounds[2] += np.count_nonzero(holes)
+            raise self.Error("Cannot find location of eigenvalues %s in domains:\n%s" % (flat[holes][:10], domains))
 
-        if eig > domains[-1,1]:
-            # Eig is above the last point of the last domain.
-            # Call func_high
-            print("right ", eig, " > ", domains[-1,1])
-            self.out_bounds[1] += 1
-            return self.func_high(eig)
+        self.out_bounds[0] += np.count_nonzero(low)
+        self.out_bounds[1] += np.count_nonzero(high)
 
-        # eig is inside the domains: find the domain
-        # and call the corresponding function.
-        for idx, dms in enumerate(domains):
-            if dms[1] >= eig >= dms[0]:
-                return self.func_list[idx](eig)
+        values = np.empty(flat.shape)
+        if np.any(low): values[low] = self.func_low(flat[low])
+        if np.any(high): values[high] = self.func_high(flat[high])
+        for i, func in enumerate(self.func_list):
+            indom = inside & (idx == i)
+            if np.any(indom): values[indom] = func(flat[indom])
 
-        self.out_bounds[2] += 1
-        raise self.Error("Cannot find location of eigenvalue %s in domains:\n%s" % (eig, domains))
+        return values.reshape(eigs.shape) if eigs.ndim else float(values[0])
 
 
 class ScissorsBuilder(object):
@@ -292,7 +303,7 @@ class ScissorsBuilder(object):
 
             ax.scatter(e0mesh, qpcorrs, label="Input QP corrections, spin %s" % spin)
             scissors = self._scissors_spin[spin]
-            intp_qpc = [scissors.apply(e0) for e0 in e0mesh]
+            intp_qpc = scissors.apply(e0mesh)
             ax.plot(e0mesh, intp_qpc, label="Scissors operator, spin %s" % spin)
 
         ax.grid(True)
@@ -71,6 +71,15 @@ class ElectronBandsTest(AbipyTest):
 
         self.serialize_with_pickle(dos, protocols=[-1], test_eq=False)
 
+        # Histogram and tetrahedron methods.
+        hist_dos = gs_bands.get_edos(method="histogram")
+        self.assert_almost_equal(hist_dos.tot_dos.values, dos.tot_dos.values, decimal=3)
+        tetra_dos = gs_bands.get_edos(method="tetra", step=0.05)
+        imu = tetra_dos.tot_idos.find_mesh_index(mu)
+        self.assert_almost_equal(tetra_dos.tot_idos[imu][1], 8, decimal=1)
+        with self.assertRaises(ValueError):
+            gs_bands.get_edos(method="foo")
+
         # Test plot methods
         #gs_bands.boxplot()
 
@@ -0,0 +1,148 @@
+"""Tests for electrons.fatbands module"""
+from __future__ import print_function, division
+
+import os
+import shutil
+import tempfile
+import numpy as np
+
+from collections import OrderedDict
+from monty.collections import AttrDict
+from abipy.tools import gaussian
+from abipy.electrons.fatbands import FatBandsFile, _DosIntegrator
+from abipy.core.testing import *
+
+
+class _FakeEbands(object):
+    """Minimal replacement for ElectronBands used by _DosIntegrator."""
+
+    def __init__(self, eigens, nband_sk, kweights):
+        self.eigens, self.nband_sk = eigens, nband_sk
+        self.kpoints = [AttrDict(weight=w) for w in kweights]
+
+    def get_edos(self, method="gaussian", step=0.1, width=0.2):
+        mesh = np.arange(self.eigens.min() - 1, self.eigens.max() + 1, step)
+        return AttrDict(spin_dos=[AttrDict(mesh=mesh)])
+
+
+def _make_fbfile(filepath, cache_pjdos=False):
+    """
+    Build an object with the attributes of :class:`FatBandsFile` used by _DosIntegrator.
+    Two atoms of type "Si" (lmax=1) and one atom of type "O" (lmax=2).
+    """
+    rng = np.random.RandomState(0)
+    natom, mbesslang, nsppol, mband, nkpt = 3, 3, 2, 5, 7
+    lmax_atom = np.array([1, 2, 1])
+    nband_sk = rng.randint(3, mband + 1, size=(nsppol, nkpt))
+    ebands = _FakeEbands(np.sort(rng.uniform(-3, 3, size=(nsppol, nkpt, mband)), axis=-1),
+                         nband_sk, rng.uniform(size=nkpt))
+
+    return AttrDict(
+        filepath=filepath, cache_pjdos=cache_pjdos, ebands=ebands,
+        natom=natom, mbesslang=mbesslang, nsppol=nsppol, mband=mband, nkpt=nkpt,
+        walm_sbk=rng.uniform(size=(natom, mbesslang**2, nsppol, mband, nkpt)),
+        lmax_atom=lmax_atom, lsize=lmax_atom.max() + 1, symbols=["Si", "O"],
+        symbol2indices=OrderedDict([("Si", np.array([0, 2])), ("O", np.array([1]))]),
+        lmax_symbol=OrderedDict([("Si", 1), ("O", 2)]),
+    )
+
+
+class DosIntegratorTest(AbipyTest):
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.filepath = os.path.join(self.workdir, "out_FATBANDS.nc")
+        with open(self.filepath, "wt") as fh:
+            fh.write("FATBANDS")
+
+    def tearDown(self):
+        shutil.rmtree(self.workdir)
+
+    def test_walm_dos(self):
+        """Testing PJDOS computed by _DosIntegrator."""
+        fbfile = _make_fbfile(self.filepath)
+        intg = _DosIntegrator(fbfile, "gaussian", 0.1, 0.2)
+        assert intg.cache_path is None
+        mesh, ebands = intg.mesh, fbfile.ebands
+
+        # Compare with the explicit loop over (spin, k, band).
+        ref = np.zeros((fbfile.natom, fbfile.mbesslang**2, fbfile.nsppol, len(mesh)))
+        for spin in range(fbfile.nsppol):
+            for ik, kpoint in enumerate(ebands.kpoints):
+                for band in range(ebands.nband_sk[spin, ik]):
+                    g = kpoint.weight * gaussian(mesh, 0.2, center=ebands.eigens[spin, ik, band])
+                    ref[:, :, spin] += fbfile.walm_sbk[:, :, spin, band, ik, None] * g
+
+        self.assert_almost_equal(intg.walm_dos, ref)
+        # Small blocks of k-points give the same result.
+        self.assert_almost_equal(intg._compute_walm_dos(max_size=1), ref)
+
+        # l-decomposed PJDOS.
+        lso = intg.get_site_lso(1)
+        assert lso.shape == (fbfile.lsize, fbfile.nsppol, len(mesh))
+        self.assert_almost_equal(lso[1], ref[1, 1:4].sum(axis=0))
+        self.assert_almost_equal(lso[2], ref[1, 4:9].sum(axis=0))
+        lso = intg.get_site_lso(0)
+        assert np.all(lso[2] == 0)
+        self.assert_almost_equal(lso[0], ref[0, 0])
+
+        symbols_lso = intg.symbols_lso
+        assert list(symbols_lso.keys()) == ["Si", "O"]
+        self.assert_almost_equal(symbols_lso["Si"], intg.get_site_lso(0) + intg.get_site_lso(2))
+        self.assert_almost_equal(symbols_lso["O"], intg.get_site_lso(1))
+
+        # Stacked DOS.
+        stack = intg.ls_stackdos
+        assert len(stack) == 3 * fbfile.nsppol
+        self.assert_almost_equal(stack[(0, 1)][1], symbols_lso["Si"][0, 1] + symbols_lso["O"][0, 1])
+        self.assert_almost_equal(stack[(2, 0)][0], 0)
+        self.assert_almost_equal(stack[(2, 0)][1], symbols_lso["O"][2, 0])
+
+    def test_pjdos_cache(self):
+        """Testing the on-disk cache of the PJDOS."""
+        # The cache is disabled by default.
+        assert not FatBandsFile.cache_pjdos
+
+        fbfile = _make_fbfile(self.filepath, cache_pjdos=True)
+        intg = _DosIntegrator(fbfile, "gaussian", 0.1, 0.2)
+        path = intg.cache_path
+        assert os.path.dirname(path) == self.workdir and os.path.basename(path).startswith(".")
+
+        # Miss: the PJDOS is computed and saved.
+        assert not os.path.exists(path)
+        walm_dos = intg.walm_dos
+        assert os.path.exists(path)
+
+        # Hit: the PJDOS is read from file.
+        intg = _DosIntegrator(fbfile, "gaussian", 0.1, 0.2)
+        def fail(*args, **kwargs): raise RuntimeError("PJDOS should be read from the cache")
+        intg._compute_walm_dos = fail
+        assert intg.cache_path == path
+        self.assert_equal(intg.walm_dos, walm_dos)
+
+        # Different integration parameters use another file.
+        other = _DosIntegrator(fbfile, "gaussian", 0.1, 0.3)
+        assert other.cache_path != path
+        other.walm_dos
+        assert os.path.exists(other.cache_path) and os.path.exists(path)
+
+        # Modifying the FATBANDS file invalidates the cache and the old files are removed.
+        with open(self.filepath, "at") as fh:
+            fh.write("modified")
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(self.filepath, (mtime, mtime))
+        intg = _DosIntegrator(fbfile, "gaussian", 0.1, 0.2)
+        assert intg.cache_path != path
+        self.assert_equal(intg.walm_dos, walm_dos)
+        assert os.path.exists(intg.cache_path)
+        assert sorted(os.listdir(self.workdir)) == [os.path.basename(intg.cache_path), "out_FATBANDS.nc"]
+
+        # Corrupted files are ignored.
+        with open(intg.cache_path, "wt") as fh:
+            fh.write("garbage")
+        self.assert_equal(_DosIntegrator(fbfile, "gaussian", 0.1, 0.2).walm_dos, walm_dos)
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
@@ -7,7 +7,7 @@ import abipy.data as data
 
 from abipy.abilab import abiopen
 from abipy.electrons.gw import *
-from abipy.electrons.gw import SigresReader
+from abipy.electrons.gw import SigresReader, QPList
 from abipy.core.testing import *
 
 class TestQPList(AbipyTest):
@@ -46,6 +46,26 @@ class TestQPList(AbipyTest):
         for qp in other_qplist:
             self.assertTrue(qp in qpl_merge)
 
+        # Columnar access.
+        self.assert_equal(qpl_merge.get_field("e0"), [qp.e0 for qp in qpl_merge])
+        self.assert_equal(qpl_merge.get_field("qpeme0"), [qp.qpeme0 for qp in qpl_merge])
+        self.assert_equal(qpl_merge.get_kpoint_indices(self.sigres.ibz),
+                          [self.sigres.ibz.index(qp.kpoint) for qp in qpl_merge])
+        self.assertEqual(list(qpl_merge[len(qplist):]), list(other_qplist))
+        self.assertEqual(QPList(list(qpl_merge)), qpl_merge)
+        df = qpl_merge.to_dataframe()
+        self.assertEqual(len(df), len(qpl_merge))
+        self.assert_equal(df["band"].values, [qp.band for qp in qpl_merge])
+
+        # Chained merges: the k-points of the merged lists are not duplicated.
+        kpoint = self.sigres.gwkpoints[0]
+        qpl_a, qpl_b = qplist[:1], QPList([qplist[1]._replace(kpoint=kpoint.copy())])
+        qpl_ab = qpl_a.merge(qpl_b)
+        assert len(qpl_ab._kpoints) == 1 and qpl_ab == qplist[:2]
+        with self.assertRaises(ValueError):
+            qpl_ab.merge(QPList([qplist[1]._replace(kpoint=kpoint.copy())]))
+        assert len(qpl_ab.merge(qplist[2:]).merge(other_qplist)) == len(qplist) + len(other_qplist)
+
         # Test QPState object.
         qp = qplist[0]
         print(qp)
@@ -92,6 +112,23 @@ class TestSigresFile(AbipyTest):
 
         self.assert_almost_equal(sigres.qpgaps, np.reshape(qpgaps, (1,6)))
 
+    def test_sigmaw_states(self):
+        """Test batched reading of Sigma(omega) and A(omega)."""
+        sigres = abiopen(data.ref_file("al_g0w0_spfunc/al_g0w0_sigmaw_SIGRES.nc"))
+        kpoint = sigres.gwkpoints[0]
+        bands = list(range(sigres.min_gwbstart, sigres.max_gwbstop))
+        sigw_list = sigres.get_sigmaw_list(len(bands) * [0], len(bands) * [kpoint], bands)
+        assert len(sigw_list) == len(bands)
+
+        wmesh, sigxc_values, spfunc_values = sigres.reader.read_sigmaw_states(
+            len(bands) * [0], len(bands) * [kpoint], bands)
+        assert sigxc_values.shape == spfunc_values.shape == (len(bands), len(wmesh))
+
+        for band, sigw in zip(bands, sigw_list):
+            spfunc = sigres.get_spfunc(0, kpoint, band)
+            self.assert_almost_equal(sigw.spfunc.values, spfunc.values)
+            assert np.all(spfunc.values >= 0)
+
 
 if __name__ == "__main__":
     import unittest
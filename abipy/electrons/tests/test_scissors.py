@@ -0,0 +1,43 @@
+"""Tests for electrons.scissors module"""
+from __future__ import print_function, division
+
+import numpy as np
+
+from abipy.electrons.scissors import Scissors
+from abipy.core.testing import *
+
+
+class ScissorsTest(AbipyTest):
+
+    def test_apply(self):
+        """Testing Scissors.apply with scalars and arrays."""
+        func_list = [lambda x: 0.1 * x, lambda x: np.sin(x), lambda x: 0.2 + 0 * x]
+        # Hole between 5 and 6.
+        domains = [[-10, 0], [0, 5], [6, 12]]
+        scissors = Scissors(func_list, domains, residues=[0, 0, 0])
+
+        # Points inside the domains, on the edges and out of range.
+        eigs = np.array([-12, -10, -5, 0, 2.5, 5, 6, 9, 12, 14, 20])
+        values = scissors.apply(eigs.reshape(1, -1, 1))
+        assert values.shape == (1, len(eigs), 1)
+        ref = [scissors.apply(float(e)) for e in eigs]
+        assert all(isinstance(v, float) for v in ref)
+        self.assert_almost_equal(values.ravel(), ref)
+
+        # The first domain whose upper bound is >= eig is used.
+        self.assert_almost_equal(ref[1:9], [-1.0, -0.5, 0.0, np.sin(2.5), np.sin(5), 0.2, 0.2, 0.2])
+
+        # Out-of-range values: the functions are evaluated at the edges of the first and last domain.
+        self.assert_almost_equal(ref[0], 0.1 * -10)
+        self.assert_almost_equal(ref[-2:], [0.2, 0.2])
+        self.assert_equal(scissors.out_bounds, [2, 4, 0])
+
+        # Eigenvalues in the hole.
+        with self.assertRaises(scissors.Error):
+            scissors.apply([1.0, 5.5])
+        assert scissors.out_bounds[2] == 1
+
+
+if __name__ == "__main__":
+    import unittest
+    unittest.main()
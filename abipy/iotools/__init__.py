@@ -16,3 +16,21 @@ class ETSF_Reader(ionc.ETSF_Reader):
     def read_structure(self):
         from abipy.core.structure import Structure
         return Structure.from_file(self.path)
+
+    def read_value_slab(self, varname, index, cmode=None):
+        """
+        Read the hyperslab `index` of variable `varname` without loading the full array in memory.
+        Integer sequences in index are applied independently to each dimension (netcdf4 orthogonal indexing).
+
+        Args:
+            varname: Name of the variable.
+            index: Tuple with the indices of the hyperslab.
+            cmode: If cmode == "c", the last dimension of the variable contains the real and the imaginary part
+                and a complex array is returned. In this case, index should not include the last dimension.
+        """
+        var = self.read_variable(varname)
+        if cmode == "c":
+            data = var[tuple(index) + (slice(None),)]
+            return data[..., 0] + 1j * data[..., 1]
+        else:
+            return var[index]
@@ -0,0 +1,261 @@
+# coding: utf-8
+"""
+Scalable indexer of directory trees.
+The tree is scanned with `os.scandir` by a pool of threads (one directory per task)
+and the results can be saved in a manifest so that a later scan only lists the
+directories whose modification time changed.
+"""
+from __future__ import print_function, division, unicode_literals, absolute_import
+
+import os
+import json
+import time
+
+from collections import OrderedDict, namedtuple, deque
+from monty.dev import get_ncpus
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        # py2k: use the backport if available.
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+
+__all__ = [
+    "SuffixMatcher",
+    "FileEntry",
+    "index_tree",
+]
+
+
+class SuffixMatcher(object):
+    """
+    Precompiled lookup table used to find the suffix of a filename in a list of suffixes.
+    The suffixes are grouped by length so that the cost does not depend on the number of suffixes.
+    If several suffixes match, the first one in the list is returned.
+
+    Usage example:
+
+    .. code-block:: python
+
+        matcher = SuffixMatcher(["GSR.nc", "DDB"])
+        assert matcher("out_GSR.nc") == "GSR.nc" and matcher("foo.txt") is None
+    """
+    def __init__(self, suffixes):
+        self.suffixes = list(suffixes)
+        tables = OrderedDict()
+        for priority, suffix in enumerate(self.suffixes):
+            tables.setdefault(len(suffix), {}).setdefault(suffix, priority)
+        self._tables = list(tables.items())
+
+    @property
+    def signature(self):
+        """String used to check whether a manifest has been produced with the same matcher."""
+        return "SuffixMatcher:" + "|".join(self.suffixes)
+
+    def __call__(self, filename):
+        """Return the suffix of filename. None if no suffix matches."""
+        best = None
+        for length, table in self._tables:
+            priority = table.get(filename[-length:])
+            if priority is not None and (best is None or priority < best):
+                best = priority
+
+        return None if best is None else self.suffixes[best]
+
+
+FileEntry = namedtuple("FileEntry", "path type size mtime")
+"""
+Entry of the index: path of the file, type returned by the matcher, size in bytes and modification time.
+"""
+
+
+def _scan_dir(dirpath, matcher):
+    """
+    List the content of dirpath. Return (files, subdirs) where files is a list
+    of [name, type, size, mtime] for the files accepted by matcher.
+    Symbolic links to directories are not followed (same behaviour as `os.walk`).
+    """
+    files, subdirs = [], []
+    if scandir is not None:
+        for entry in scandir(dirpath):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+                ftype = matcher(entry.name)
+                if ftype is None: continue
+                stat = entry.stat()
+            except OSError:
+                # Broken links or files removed while scanning.
+                continue
+            files.append([entry.name, ftype, stat.st_size, stat.st_mtime])
+    else:
+        for name in os.listdir(dirpath):
+            path = os.path.join(dirpath, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                subdirs.append(name)
+                continue
+            ftype = matcher(name)
+            if ftype is None: continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append([name, ftype, stat.st_size, stat.st_mtime])
+
+    return files, subdirs
+
+
+def _matcher_signature(matcher):
+    """String identifying matcher."""
+    signature = getattr(matcher, "signature", None)
+    if signature is not None: return signature
+    return "%s.%s" % (getattr(matcher, "__module__", ""), getattr(matcher, "__name__", repr(matcher)))
+
+
+def _read_manifest(path, top, signature):
+    """
+    Read the manifest. Return (dirs, scan_time). dirs is empty if the file does not exist
+    or it has been produced for a different directory or matcher.
+    """
+    try:
+        with open(path, "rt") as fh:
+            data = json.load(fh)
+    except (IOError, OSError, ValueError):
+        return {}, None
+
+    if data.get("top") != top or data.get("signature") != signature: return {}, None
+    return data["dirs"], data["scan_time"]
+
+
+def _write_manifest(path, top, signature, dirs, scan_time):
+    """Write the manifest to path (atomically)."""
+    data = dict(top=top, signature=signature, scan_time=scan_time, dirs=dirs)
+    tmp_path = "%s.%d.tmp" % (path, os.getpid())
+    with open(tmp_path, "wt") as fh:
+        json.dump(data, fh)
+    os.rename(tmp_path, path)
+
+
+def index_tree(top, matcher, recurse=True, nthreads=None, manifest=None):
+    """
+    Index the files accepted by matcher in directory `top`.
+
+    The directories are scanned with `os.scandir` by a pool of threads (listing a directory on a
+    parallel filesystem is dominated by latency so threads are enough). If manifest is not None,
+    the index is saved to this JSON file. The directories whose modification time did not change
+    since the previous scan are not listed again: their content is taken from the manifest
+    (note that the size and mtime of the files in these directories are not updated).
+    Directories that cannot be listed (e.g. permission denied or removed during the scan)
+    are skipped as in `os.walk`.
+
+    Args:
+        top: Root directory.
+        matcher: Callable receiving the basename of the file and returning the type
+            of the file (e.g. the extension) or None if the file should be ignored.
+            See :class:`SuffixMatcher`.
+        recurse: False if only the files in `top` should be indexed.
+        nthreads: Number of threads. Default: 4 times the number of CPUs.
+        manifest: Path of the manifest file. None if no manifest should be used.
+
+    Return:
+        List of :class:`FileEntry` sorted by path.
+    """
+    top = os.path.abspath(top)
+    signature = _matcher_signature(matcher)
+    old_dirs, old_time = {}, None
+    if manifest is not None:
+        old_dirs, old_time = _read_manifest(manifest, top, signature)
+
+    scan_time = time.time()
+    dirs, errors = {}, []
+
+    def do_work(relpath):
+        """Scan one directory, store the results and return the list of subdirectories."""
+        dirpath = os.path.join(top, relpath) if relpath else top
+        try:
+            mtime = os.stat(dirpath).st_mtime
+            old = old_dirs.get(relpath)
+            # Directories modified during the previous scan (mtime resolution can be 1 s) are always listed.
+            if old is not None and old["mtime"] == mtime and mtime < old_time - 2:
+                files, subdirs = old["files"], old["subdirs"]
+            else:
+                files, subdirs = _scan_dir(dirpath, matcher)
+        except OSError:
+            # Unreadable or removed directory: skip it as os.walk does.
+            # It is not saved in the manifest so that it is listed again at the next scan.
+            return []
+
+        dirs[relpath] = dict(mtime=mtime, files=files, subdirs=subdirs)
+        if not recurse: return []
+        return [os.path.join(relpath, d) for d in subdirs]
+
+    if nthreads is None: nthreads = 4 * get_ncpus()
+    if nthreads <= 1 or not recurse:
+        # Sequential version
+        todo = deque([""])
+        while todo:
+            todo.extend(do_work(todo.popleft()))
+
+    else:
+        from threading import Thread
+        try:
+            from Queue import Queue # py2k
+        except ImportError:
+            from queue import Queue # py3k
+
+        q = Queue()
+
+        def worker():
+            while True:
+                relpath = q.get()
+                if relpath is None:
+                    # Sentinel: stop the thread.
+                    q.task_done()
+                    break
+                try:
+                    for subdir in do_work(relpath):
+                        q.put(subdir)
+                except Exception as exc:
+                    errors.append(exc)
+                finally:
+                    q.task_done()
+
+        threads = []
+        for i in range(nthreads):
+            t = Thread(target=worker)
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+        q.put("")
+        # block until all the directories have been scanned.
+        q.join()
+
+        # Stop the workers.
+        for t in threads:
+            q.put(None)
+        for t in threads:
+            t.join()
+
+    if errors: raise errors[0]
+
+    if manifest is not None:
+        # Keep the subdirectories of the previous scan if only top has been listed.
+        mdirs = dirs
+        if not recurse:
+            mdirs = dict(old_dirs)
+            mdirs.update(dirs)
+        _write_manifest(manifest, top, signature, mdirs, scan_time)
+
+    entries = []
+    for relpath, d in dirs.items():
+        dirpath = os.path.join(top, relpath) if relpath else top
+        entries.extend(FileEntry(os.path.join(dirpath, name), ftype, size, mtime)
+                       for name, ftype, size, mtime in d["files"])
+
+    return sorted(entries)
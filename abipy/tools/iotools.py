@@ -3,6 +3,7 @@
 from __future__ import print_function, division, unicode_literals, absolute_import
 
 import os
+import hashlib
 import tempfile
 
 from subprocess import call
@@ -66,6 +67,56 @@ def write_temp_file(src, suffix='', prefix='tmp', dir=None, text=True):
     return fname, f
 
 
+def sidecar_path(filepath, tag, *args):
+    """
+    Return the path of the hidden npz file used to cache data derived from `filepath`
+    e.g. `.out_DDB_INDEX_<digest>.npz` in the same directory as `filepath`.
+    The digest depends on the path, size and modification time of the file and on args
+    so that a new path is returned when the file is modified. None if the file does not exist.
+    """
+    filepath = os.path.abspath(filepath)
+    try:
+        stat = os.stat(filepath)
+    except OSError:
+        return None
+
+    key = repr((filepath, stat.st_size, stat.st_mtime) + tuple(args))
+    digest = hashlib.md5(key.encode("utf-8")).hexdigest()[:16]
+    dirname, basename = os.path.split(filepath)
+    return os.path.join(dirname, ".%s_%s_%s.npz" % (basename, tag, digest))
+
+
+def remove_stale_sidecars(filepath, tag):
+    """
+    Remove the files produced by :func:`sidecar_path` with the given tag that are older than `filepath`
+    i.e. the files written before the last modification of `filepath` that will never be used again.
+    Files associated to other arguments of :func:`sidecar_path` are kept if they are still valid.
+    Return the list of removed paths.
+    """
+    filepath = os.path.abspath(filepath)
+    dirname, basename = os.path.split(filepath)
+    try:
+        mtime = os.stat(filepath).st_mtime
+        names = os.listdir(dirname)
+    except OSError:
+        return []
+
+    prefix = ".%s_%s_" % (basename, tag)
+    removed = []
+    for name in names:
+        # The digest has 16 characters.
+        if not (name.startswith(prefix) and name.endswith(".npz") and len(name) == len(prefix) + 20): continue
+        path = os.path.join(dirname, name)
+        try:
+            if os.stat(path).st_mtime < mtime:
+                os.remove(path)
+                removed.append(path)
+        except OSError:
+            pass
+
+    return removed
+
+
 def raw_input_ext(prompt='', ps2='... '):
     """Similar to raw_input(), but accepts extended lines if input ends with \\."""
     # Fix py2.x
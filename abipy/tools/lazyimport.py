@@ -0,0 +1,103 @@
+# coding: utf-8
+"""
+Lazy loading of module attributes (PEP 562).
+The names exported by a module are declared in a registry and the modules
+defining them are imported only when the names are accessed for the first time.
+"""
+from __future__ import print_function, division, unicode_literals, absolute_import
+
+import sys
+import importlib
+
+
+__all__ = [
+    "install_lazy_attributes",
+    "import_object",
+]
+
+
+def import_object(spec, package=None):
+    """
+    Import and return the object specified by the string `module:name`.
+    If spec does not contain `:`, the module is returned. Relative module names are resolved with `package`.
+    """
+    modname, _, name = spec.partition(":")
+    module = importlib.import_module(modname, package=package)
+    return getattr(module, name) if name else module
+
+
+def install_lazy_attributes(namespace, attrs=None, modules=None, star_modules=(), optional=()):
+    """
+    Add the `__getattr__` and `__dir__` functions used by PEP 562 to the module whose global
+    namespace is `namespace` so that the names in the registries are imported on first access.
+    `__all__` is computed on demand so that `from module import *` imports all the names.
+    On python < 3.7 module `__getattr__` is not supported and all the names are imported immediately.
+
+    Args:
+        namespace: Dictionary with the global namespace of the module (`globals()`).
+        attrs: Dictionary mapping the name of the attribute to the module defining it.
+            Relative module names (e.g. ".ebands") are resolved with respect to the package of the module.
+        modules: Dictionary mapping the name of the attribute to a module (the attribute is the module).
+        star_modules: List of modules whose public names are exported as in `from module import *`.
+            They are imported (last module first) when a name that is not in the registries is requested.
+        optional: Names that may be missing (e.g. with older versions of the dependencies).
+    """
+    attrs, modules = dict(attrs or {}), dict(modules or {})
+    star_modules = list(star_modules)
+    modname = namespace["__name__"]
+    package = namespace.get("__package__") or modname.rpartition(".")[0]
+
+    def star_names(module):
+        names = getattr(module, "__all__", None)
+        if names is None: names = [n for n in dir(module) if not n.startswith("_")]
+        return names
+
+    def __getattr__(name):
+        if name in attrs:
+            try:
+                value = getattr(importlib.import_module(attrs[name], package=package), name)
+            except (ImportError, AttributeError):
+                if name not in optional: raise
+                raise AttributeError("module %r has no attribute %r" % (modname, name))
+        elif name in modules:
+            value = importlib.import_module(modules[name], package=package)
+        elif name == "__all__":
+            # Used by `from module import *`: import everything.
+            value = [n for n in list(namespace.keys()) + list(attrs.keys()) + list(modules.keys())
+                     if not n.startswith("_")]
+            for smod in star_modules:
+                value.extend(star_names(importlib.import_module(smod, package=package)))
+            value = [n for n in sorted(set(value)) if n not in optional or hasattr(sys.modules[modname], n)]
+        elif name.startswith("_"):
+            # Don't import the star modules when tools look for special attributes (e.g. __wrapped__).
+            raise AttributeError("module %r has no attribute %r" % (modname, name))
+        else:
+            # Later star imports override the previous ones.
+            for smod in reversed(star_modules):
+                module = importlib.import_module(smod, package=package)
+                if name in star_names(module):
+                    value = getattr(module, name)
+                    break
+            else:
+                raise AttributeError("module %r has no attribute %r" % (modname, name))
+
+        namespace[name] = value
+        return value
+
+    def __dir__():
+        return sorted(set(list(namespace.keys()) + list(attrs.keys()) + list(modules.keys())))
+
+    if sys.version_info >= (3, 7):
+        namespace["__getattr__"] = __getattr__
+        namespace["__dir__"] = __dir__
+        return
+
+    # Old python: import everything now.
+    for smod in star_modules:
+        module = importlib.import_module(smod, package=package)
+        namespace.update((n, getattr(module, n)) for n in star_names(module))
+    for name in list(attrs.keys()) + list(modules.keys()):
+        try:
+            __getattr__(name)
+        except AttributeError:
+            if name not in optional: raise
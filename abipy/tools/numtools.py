@@ -2,6 +2,7 @@
 """Numeric tools."""
 from __future__ import print_function, division, unicode_literals, absolute_import
 
+import itertools
 import numpy as np
 import bisect as bs
 
@@ -165,6 +166,155 @@ def gaussian(x, width, center=0.0, height=None):
 
     return height * np.exp(-((x - center) / width) ** 2 / 2.)
 
+
+def gaussian_sum(mesh, centers, width, weights=None, nsigma=6.0, max_size=2**22):
+    """
+    Compute :math:`\\sum_i w_i G(x - c_i)` on the given mesh where G is a normalized gaussian.
+
+    The gaussians are evaluated in chunks with broadcasting so that the temporary arrays
+    contain at most max_size elements. If the mesh is uniform, each gaussian is truncated
+    to nsigma standard deviations around its center.
+
+    Args:
+        mesh: array-like with the points of the mesh.
+        centers: array-like with the centers of the gaussians.
+        width: Standard deviation of the gaussians.
+        weights: Weights of the gaussians (array broadcastable to centers). None if all weights are one.
+        nsigma: Gaussians are set to zero at distances larger than nsigma * width (uniform mesh only).
+        max_size: Max number of elements in the temporary arrays.
+    """
+    mesh = np.asarray(mesh, dtype=np.float)
+    centers = np.asarray(centers)
+    weights = np.ones(centers.size) if weights is None else np.ravel(np.broadcast_to(weights, centers.shape))
+    centers = centers.ravel()
+    nw, nc = len(mesh), len(centers)
+    out = np.zeros(nw)
+    if nw == 0 or nc == 0: return out
+
+    height = 1.0 / (width * np.sqrt(2 * np.pi))
+    step = is_uniform_mesh(mesh)
+    m = int(np.ceil(nsigma * width / step)) if step else nw
+
+    if 2 * m + 1 < nw:
+        # Truncated gaussians on a uniform mesh: [chunk, 2m+1] matrices.
+        offsets = np.arange(-m, m + 1)
+        chunk = max(1, max_size // len(offsets))
+        for start in range(0, nc, chunk):
+            c, w = centers[start:start+chunk], weights[start:start+chunk]
+            inds = np.rint((c - mesh[0]) / step).astype(np.int)[:, None] + offsets
+            vals = w[:, None] * height * np.exp(-0.5 * ((mesh[0] + inds * step - c[:, None]) / width) ** 2)
+            inside = (inds >= 0) & (inds < nw)
+            out += np.bincount(inds[inside], weights=vals[inside], minlength=nw)
+    else:
+        # Full gaussians: [chunk, nw] matrices.
+        chunk = max(1, max_size // nw)
+        for start in range(0, nc, chunk):
+            c, w = centers[start:start+chunk], weights[start:start+chunk]
+            out += np.dot(w, height * np.exp(-0.5 * ((mesh - c[:, None]) / width) ** 2))
+
+    return out
+
+
+def gaussian_sum_hist(mesh, centers, width, weights=None, nsigma=6.0):
+    """
+    Fast version of :func:`gaussian_sum` for uniform meshes.
+    The weights are first accumulated on the mesh with linear interpolation (histogram)
+    and the histogram is then convolved with the gaussian.
+    The error with respect to :func:`gaussian_sum` is of order (step / width) ** 2.
+
+    Raises:
+        ValueError if the mesh is not uniform.
+    """
+    mesh = np.asarray(mesh, dtype=np.float)
+    centers = np.asarray(centers)
+    weights = np.ones(centers.size) if weights is None else np.ravel(np.broadcast_to(weights, centers.shape))
+    centers = centers.ravel()
+    step = is_uniform_mesh(mesh)
+    if not step:
+        raise ValueError("gaussian_sum_hist requires a uniform mesh.")
+
+    # Extend the mesh by m points on each side so that the tails are correctly accounted for.
+    nw = len(mesh)
+    m = int(np.ceil(nsigma * width / step))
+    npts = nw + 2 * m
+    x = (centers - mesh[0]) / step + m
+    ix = np.floor(x).astype(np.int)
+    frac = x - ix
+    hist = np.zeros(npts + 1)
+    inside = (ix >= 0) & (ix < npts)
+    hist += np.bincount(ix[inside], weights=(1 - frac[inside]) * weights[inside], minlength=npts + 1)
+    hist += np.bincount(ix[inside] + 1, weights=frac[inside] * weights[inside], minlength=npts + 1)
+
+    kernel = gaussian(np.arange(-m, m + 1) * step, width)
+    return np.convolve(hist[:npts], kernel, mode="valid")
+
+
+# Decomposition of the subcell in 6 tetrahedra sharing the main diagonal 0-7.
+# The vertices of the subcell are labelled with 4*i + 2*j + k where i, j, k in [0, 1].
+_TETRA_VERTICES = np.array([[0, 1, 3, 7], [0, 1, 5, 7], [0, 2, 3, 7],
+                            [0, 2, 6, 7], [0, 4, 5, 7], [0, 4, 6, 7]])
+
+
+def linear_tetra_dos(mesh, emesh, max_size=2**22):
+    """
+    Compute the DOS with the linear tetrahedron method (without Bloechl corrections).
+
+    Args:
+        mesh: Energy mesh (array-like).
+        emesh: Energies on the homogeneous k-mesh. Array of shape [nband, n0, n1, n2].
+        max_size: Max number of (tetrahedron, energy) pairs treated at once.
+
+    Returns:
+        `ndarray` with the DOS on the mesh summed over bands. Each band is normalized to one.
+    """
+    mesh = np.asarray(mesh, dtype=np.float)
+    emesh = np.asarray(emesh)
+    nband, nk = emesh.shape[0], np.prod(emesh.shape[1:])
+
+    # Energies at the 8 vertices of the subcells: [nband, 8, nk]
+    corners = np.empty((nband, 8, nk))
+    for i, j, k in itertools.product(range(2), range(2), range(2)):
+        corners[:, 4*i + 2*j + k] = np.roll(emesh, shift=(-i, -j, -k), axis=(1, 2, 3)).reshape(nband, nk)
+
+    # Sorted energies at the vertices of the tetrahedra: [nband * 6 * nk, 4]
+    etet = np.sort(np.transpose(corners[:, _TETRA_VERTICES], (0, 1, 3, 2)).reshape(-1, 4), axis=1)
+    wtet = 1.0 / (6 * nk)
+
+    # Range of mesh points inside [e1, e4] for each tetrahedron.
+    lo = np.searchsorted(mesh, etet[:, 0], side="left")
+    cnt = np.searchsorted(mesh, etet[:, 3], side="left") - lo
+
+    dos = np.zeros(len(mesh))
+    chunk = max(1, max_size // max(1, cnt.max()))
+    for start in range(0, len(etet), chunk):
+        c = cnt[start:start+chunk]
+        itet = np.repeat(np.arange(len(c)), c)
+        ipts = lo[start:start+chunk][itet] + np.arange(len(itet)) - np.repeat(np.cumsum(c) - c, c)
+        w = mesh[ipts]
+        e1, e2, e3, e4 = etet[start:start+chunk][itet].T
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            g1 = 3 * (w - e1) ** 2 / ((e2 - e1) * (e3 - e1) * (e4 - e1))
+            g2 = (3 * (e2 - e1) + 6 * (w - e2) - 3 * (e3 - e1 + e4 - e2) * (w - e2) ** 2 / ((e3 - e2) * (e4 - e2))) \
+                 / ((e3 - e1) * (e4 - e1))
+            g3 = 3 * (e4 - w) ** 2 / ((e4 - e1) * (e4 - e2) * (e4 - e3))
+        g = np.where(w < e2, g1, np.where(w < e3, g2, g3))
+
+        dos += np.bincount(ipts, weights=wtet * g, minlength=len(mesh))
+
+    return dos
+
+
+def is_uniform_mesh(mesh, rtol=1e-6):
+    """
+    Return the step of the mesh if the mesh is uniform (at least two points) else 0.
+    """
+    mesh = np.asarray(mesh)
+    if len(mesh) < 2: return 0
+    step = (mesh[-1] - mesh[0]) / (len(mesh) - 1)
+    if step <= 0 or np.any(np.abs(np.diff(mesh) - step) > rtol * step): return 0
+    return step
+
 #=====================================
 # === Data Interpolation/Smoothing ===
 #=====================================
@@ -0,0 +1,91 @@
+from __future__ import print_function, division
+
+import os
+import tempfile
+import threading
+
+from abipy.tools.dirindex import *
+from abipy.tools import dirindex
+from abipy.core.testing import *
+
+
+class TestDirIndex(AbipyTest):
+    """Test dirindex."""
+
+    def test_suffix_matcher(self):
+        """test SuffixMatcher"""
+        matcher = SuffixMatcher(["GSR.nc", "DDB", "R.nc"])
+        assert matcher("out_GSR.nc") == "GSR.nc"
+        assert matcher("out_SIGR.nc") == "R.nc"
+        assert matcher("out_DDB") == "DDB"
+        assert matcher("DDB") == "DDB"
+        assert matcher("out_WFK.nc") is None and matcher("") is None
+        # First suffix in the list wins.
+        assert SuffixMatcher(["R.nc", "GSR.nc"])("out_GSR.nc") == "R.nc"
+
+    def test_index_tree(self):
+        """test index_tree"""
+        top = tempfile.mkdtemp()
+        ref_paths = []
+        for dirname in ("", "w0", os.path.join("w0", "t0"), os.path.join("w1", "t0", "outdata")):
+            dirpath = os.path.join(top, dirname)
+            if not os.path.exists(dirpath): os.makedirs(dirpath)
+            for basename in ("out_GSR.nc", "out_WFK.nc", "run.log"):
+                path = os.path.join(dirpath, basename)
+                with open(path, "wt") as fh:
+                    fh.write(basename)
+                if basename.endswith("GSR.nc"): ref_paths.append(path)
+
+        matcher = SuffixMatcher(["GSR.nc"])
+        for nthreads in (1, 4):
+            entries = index_tree(top, matcher, nthreads=nthreads)
+            assert [e.path for e in entries] == sorted(ref_paths)
+            assert all(e.type == "GSR.nc" and e.size == len("out_GSR.nc") for e in entries)
+
+        entries = index_tree(top, matcher, recurse=False)
+        assert [e.path for e in entries] == [os.path.join(top, "out_GSR.nc")]
+
+        # Use the manifest.
+        manifest = os.path.join(tempfile.mkdtemp(), "manifest.json")
+        entries = index_tree(top, matcher, manifest=manifest)
+        assert os.path.exists(manifest)
+        assert index_tree(top, matcher, manifest=manifest) == entries
+
+        # New files are detected because the mtime of the directory changes.
+        new_path = os.path.join(top, "w0", "new_GSR.nc")
+        with open(new_path, "wt") as fh:
+            fh.write("new")
+        assert new_path in [e.path for e in index_tree(top, matcher, manifest=manifest)]
+
+        # Worker threads are stopped at the end of the scan.
+        nthreads = threading.active_count()
+        for i in range(3):
+            index_tree(top, matcher, nthreads=8)
+        assert threading.active_count() == nthreads
+
+    def test_unreadable_dir(self):
+        """test index_tree with directories that cannot be listed"""
+        top = tempfile.mkdtemp()
+        for dirname in ("ok", "bad", os.path.join("bad", "sub")):
+            os.makedirs(os.path.join(top, dirname))
+            with open(os.path.join(top, dirname, "out_GSR.nc"), "wt") as fh:
+                fh.write("GSR")
+
+        bad_dir = os.path.join(top, "bad")
+        scan_dir = dirindex._scan_dir
+
+        def failing_scan_dir(dirpath, matcher):
+            if dirpath == bad_dir: raise OSError("Permission denied: %s" % dirpath)
+            return scan_dir(dirpath, matcher)
+
+        dirindex._scan_dir = failing_scan_dir
+        try:
+            for nthreads in (1, 4):
+                entries = index_tree(top, SuffixMatcher(["GSR.nc"]), nthreads=nthreads)
+                assert [e.path for e in entries] == [os.path.join(top, "ok", "out_GSR.nc")]
+        finally:
+            dirindex._scan_dir = scan_dir
+
+        # The directory is listed once it becomes readable.
+        entries = index_tree(top, SuffixMatcher(["GSR.nc"]), nthreads=1)
+        assert len(entries) == 3
@@ -0,0 +1,73 @@
+from __future__ import print_function, division
+
+import os
+import sys
+import tempfile
+import unittest
+import subprocess
+
+from abipy.tools.lazyimport import *
+from abipy.core.testing import *
+
+
+_PKG_INIT = """
+from abipy.tools.lazyimport import install_lazy_attributes
+install_lazy_attributes(globals(), attrs={"Foo": ".foo", "Missing": ".nonexistent"},
+                        modules={"bar": ".bar"}, star_modules=[".bar"], optional=["Missing"])
+"""
+
+
+class TestLazyImport(AbipyTest):
+    """Test lazyimport."""
+
+    def test_import_object(self):
+        """test import_object"""
+        assert import_object("os.path:join") is os.path.join
+        assert import_object("os.path") is os.path
+
+    def test_install_lazy_attributes(self):
+        """test install_lazy_attributes"""
+        top = tempfile.mkdtemp()
+        pkgdir = os.path.join(top, "lazypkg_test")
+        os.makedirs(pkgdir)
+        for basename, text in [("__init__.py", _PKG_INIT),
+                               ("foo.py", "class Foo(object): pass\n"),
+                               ("bar.py", "__all__ = ['baz']\ndef baz(): return 1\ndef hidden(): pass\n")]:
+            with open(os.path.join(pkgdir, basename), "wt") as fh:
+                fh.write(text)
+
+        sys.path.insert(0, top)
+        try:
+            import lazypkg_test as pkg
+            if sys.version_info >= (3, 7):
+                # Nothing is imported before the first access.
+                assert "lazypkg_test.foo" not in sys.modules and "lazypkg_test.bar" not in sys.modules
+
+            assert pkg.Foo.__name__ == "Foo" and "lazypkg_test.foo" in sys.modules
+            assert pkg.baz() == 1 and pkg.bar.baz is pkg.baz
+            assert "Foo" in dir(pkg) and "bar" in dir(pkg)
+            assert not hasattr(pkg, "hidden") and not hasattr(pkg, "Missing")
+            with self.assertRaises(AttributeError):
+                pkg.__wrapped__
+
+            ns = {}
+            exec("from lazypkg_test import *", ns)
+            assert "Foo" in ns and "baz" in ns and "Missing" not in ns
+        finally:
+            sys.path.remove(top)
+
+    def test_abilab_import_time(self):
+        """Check that import abipy.abilab does not import the heavy modules."""
+        if sys.version_info < (3, 7):
+            raise unittest.SkipTest("Lazy imports require python >= 3.7")
+
+        # Fails if one of these modules is added to the eager imports of abilab.
+        # Note that abipy.core is still imported by abipy/__init__.py.
+        heavy = ["abipy.abio.robots", "abipy.abio.factories", "abipy.abio.inputs", "abipy.electrons.ebands",
+                 "abipy.electrons.gw", "abipy.electrons.bse", "abipy.dfpt.phonons", "abipy.dfpt.ddb",
+                 "abipy.waves", "abipy.tools.notebooks"]
+        script = ("import sys, time\nt = time.time()\nimport abipy.abilab\nt = time.time() - t\n"
+                  "print(t)\nprint(' '.join(m for m in %s if m in sys.modules))" % str(heavy))
+        out = subprocess.check_output([sys.executable, "-c", script]).decode("utf-8").splitlines()
+        print("import abipy.abilab: %s s" % out[0])
+        assert not out[1], "Modules imported by abipy.abilab: %s" % out[1]
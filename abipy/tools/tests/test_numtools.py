@@ -47,6 +47,29 @@ class TestTools(AbipyTest):
             self.assertTrue(np.all(view[...,0,0] == view[...,-1,-1]))
             self.assertTrue(np.all(view[...,0,0,0] == view[...,-1,-1,-1]))
 
+    def test_gaussian_sum(self):
+        """test gaussian_sum and gaussian_sum_hist"""
+        mesh = np.linspace(-5, 5, num=501)
+        centers = np.random.uniform(-6, 6, size=300)
+        weights = np.random.uniform(0, 1, size=300)
+        ref = sum(w * gaussian(mesh, 0.2, center=c) for c, w in zip(centers, weights))
+
+        self.assert_almost_equal(gaussian_sum(mesh, centers, 0.2, weights=weights, max_size=1000), ref)
+        self.assert_almost_equal(gaussian_sum(mesh[::-1], centers, 0.2, weights=weights), ref[::-1])
+        # The error of the histogram is of order (step / width) ** 2 relative to the DOS.
+        assert np.abs(gaussian_sum_hist(mesh, centers, 0.2, weights=weights) - ref).max() < 1e-2 * ref.max()
+
+        # Multidimensional centers with broadcastable weights.
+        centers2d, weights2d = centers.reshape(30, 10), weights[::10, None]
+        ref2d = sum(w * gaussian(mesh, 0.2, center=c) for c, w in zip(centers, np.repeat(weights[::10], 10)))
+        self.assert_almost_equal(gaussian_sum(mesh, centers2d, 0.2, weights=weights2d), ref2d)
+        assert np.abs(gaussian_sum_hist(mesh, centers2d, 0.2, weights=weights2d) - ref2d).max() < 1e-2 * ref2d.max()
+
+        self.assert_almost_equal(is_uniform_mesh(mesh), mesh[1] - mesh[0])
+        assert not is_uniform_mesh(mesh ** 3)
+        with self.assertRaises(ValueError):
+            gaussian_sum_hist(mesh ** 3, centers, 0.2)
+
 
 if __name__ == "__main__":
    import unittest
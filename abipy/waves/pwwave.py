@@ -15,6 +15,7 @@ from abipy.core.kpoints import Kpoint
 
 __all__ = [
     "PWWaveFunction",
+    "PWWaveBlock",
 ]
 
 
@@ -387,16 +388,9 @@ class PWWaveFunction(WaveFunction):
         #rot_istwfk = istwfk(rot_kpt)
 
         if not np.allclose(symmop.tau, np.zeros(3)):
-            rot_ug = np.empty_like(self.ug)
-            rot_gvecs = rot_gsphere.gvecs
-            rot_kpt = rot_gsphere.kpoint.frac_coords
-
-            ug = self._ug
-            #phase = np.exp(-2j * np.pi * (np.dot(rot_gvecs + rot_kpt, symmop.tau)))
-            for ig in range(self.npw):
-                rot_ug[:, ig] = ug[:, ig] * np.exp(-2j * np.pi * (np.dot(rot_gvecs[ig] + rot_kpt, symmop.tau)))
+            rot_ug = self.ug * self.gsphere.rotation_phases([symmop])[0]
         else:
-            rot_ug = self.ug.copy() 
+            rot_ug = self.ug.copy()
                                                                                                                  
         # Invert the collinear spin if we have an AFM operation
         rot_spin = self.spin
@@ -409,6 +403,275 @@ class PWWaveFunction(WaveFunction):
         return new
 
 
+class PWWaveBlock(object):
+    """
+    Block of plane-wave wavefunctions with the same spin and k-point.
+
+    The Fourier components are stored in a contiguous array ug[nband, nspinor, npw]
+    so that the G-sphere --> FFT mesh transfer and the FFTs are performed
+    with a single call for all the bands in the block.
+
+    Usage example:
+
+    .. code-block:: python
+
+        block = wfk.get_waves(spin=0, kpoint=0, bands=range(4))
+        # Overlap matrix <u_i|u_j>
+        smat = block.braket(block)
+        # Sum_i |u_i(r)|^2
+        rho = block.sum_ur2()
+    """
+    def __init__(self, nspinor, spin, bands, gsphere, ug):
+        """
+        Args:
+            nspinor: number of spinorial components.
+            spin: spin index.
+            bands: List of band indices (>=0)
+            gsphere :class:`GSphere` instance.
+            ug: 3D array containing u[nband, nspinor, G] for G in gsphere.
+        """
+        self.nspinor, self.spin = nspinor, spin
+        self.bands = np.array(bands, dtype=np.int).ravel()
+
+        self._ug = np.ascontiguousarray(ug)
+        # Sanity check.
+        assert self._ug.shape == (len(self.bands), nspinor, gsphere.npw)
+        self._gsphere = gsphere
+
+    def __len__(self):
+        return len(self.bands)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        """Return the :class:`PWWaveFunction` associated to the i-th band of the block."""
+        wave = PWWaveFunction(self.nspinor, self.spin, self.bands[i], self.gsphere, self._ug[i])
+        if hasattr(self, "_mesh"): wave.set_mesh(self.mesh)
+        return wave
+
+    def __repr__(self):
+        return str(self)
+
+    def __str__(self):
+        return self.tostring()
+
+    def tostring(self, prtvol=0):
+        """String representation."""
+        lines = ["%s: nspinor = %d, spin = %d, bands = %s " % (
+            self.__class__.__name__, self.nspinor, self.spin, list(self.bands))]
+        app = lines.append
+        app(self.gsphere.tostring(prtvol))
+        if hasattr(self, "_mesh"):
+            app(self.mesh.tostring(prtvol))
+
+        return "\n".join(lines)
+
+    @property
+    def shape(self):
+        """Shape of ug i.e. (nband, nspinor, npw)"""
+        return self._ug.shape
+
+    @property
+    def gsphere(self):
+        """:class:`GSphere` object"""
+        return self._gsphere
+
+    @property
+    def kpoint(self):
+        """:class:`Kpoint` object"""
+        return self.gsphere.kpoint
+
+    @property
+    def npw(self):
+        """Number of G-vectors."""
+        return len(self.gsphere)
+
+    @property
+    def ug(self):
+        """Periodic part of the wavefunctions in G-space. Array of shape [nband, nspinor, npw]."""
+        return self._ug
+
+    @property
+    def mesh(self):
+        """The mesh used for the FFT."""
+        return self._mesh
+
+    def set_mesh(self, mesh):
+        """Set the FFT mesh. :math:`u(r)` is computed on this box."""
+        assert isinstance(mesh, Mesh3D)
+        self._mesh = mesh
+        self.delete_ur()
+
+    def delete_ur(self):
+        """Delete _u(r) (if it has been computed)."""
+        try:
+            del self._ur
+        except AttributeError:
+            pass
+
+    def ug_mesh(self, mesh=None):
+        """
+        Returns u(G) on the FFT mesh. Array of shape [nband, nspinor, nx, ny, nz].
+
+        Args:
+            mesh: :class:`Mesh3d` object. If mesh is None, self.mesh is used.
+        """
+        mesh = self.mesh if mesh is None else mesh
+        return self.gsphere.tofftmesh(mesh, self.ug)
+
+    def fft_ug(self, mesh=None):
+        """
+        Performs the FFT transform of :math:`u(g)` on mesh for all the bands in the block.
+
+        Args:
+            mesh: :class:`Mesh3d` object. If mesh is None, self.mesh is used.
+
+        Returns:
+            :math:`u(r)` on the real space FFT box. Array of shape [nband, nspinor, nx, ny, nz].
+        """
+        mesh = self.mesh if mesh is None else mesh
+        return mesh.fft_g2r(self.ug_mesh(mesh), fg_ishifted=False)
+
+    @property
+    def ur(self):
+        """Periodic part of the wavefunctions in real space [nband, nspinor, nx, ny, nz]."""
+        try:
+            return self._ur
+        except AttributeError:
+            self._ur = self.fft_ug()
+            return self._ur
+
+    @property
+    def ur2(self):
+        """Return :math:`||u(r)||^2` summed over spinors. Array of shape [nband, nx, ny, nz]."""
+        ur = self.ur
+        return np.sum(ur.real ** 2 + ur.imag ** 2, axis=1)
+
+    def sum_ur2(self, weights=None):
+        """
+        Return :math:`\sum_i w_i ||u_i(r)||^2` on the FFT mesh.
+
+        Args:
+            weights: Weights associated to the bands. If None, all the weights are set to one.
+        """
+        ur2 = self.ur2
+        if weights is None:
+            return ur2.sum(axis=0)
+        else:
+            return np.tensordot(np.asarray(weights), ur2, axes=(0, 0))
+
+    def norm2(self, space="g"):
+        """Return :math:`||\psi||^2` computed in G- or r-space for all bands in the block."""
+        space = space.lower()
+
+        if space == "g":
+            ug = self.ug
+            return np.sum(ug.real ** 2 + ug.imag ** 2, axis=(1, 2))
+
+        elif space == "r":
+            return np.real(self.mesh.integrate(self.ur2))
+
+        else:
+            raise ValueError("Wrong space: %s" % space)
+
+    def braket(self, other, space="g"):
+        """
+        Returns the matrix of scalar products <u_i|u_j> where u_i belongs to self and u_j to other.
+
+        Args:
+            other: Other block of waves (right-hand side)
+            space:  Integration space. Possible values ["g", "gsphere", "r"]
+                if "g" or "r" the scalar product is computed in G- or R-space on the FFT box.
+                if space="gsphere" the integration is done on the G-sphere. Note that
+                this option assumes that self and other have the same list of G-vectors.
+
+        Returns:
+            Complex array of shape [len(self), len(other)]
+        """
+        space = space.lower()
+
+        if space == "g":
+            bra = self.ug_mesh(self.mesh)
+            ket = other.gsphere.tofftmesh(self.mesh, other.ug)
+            fact = 1.0
+
+        elif space == "gsphere":
+            bra, ket, fact = self.ug, other.ug, 1.0
+
+        elif space == "r":
+            bra, ket, fact = self.ur, other.ur, self.mesh.dv
+
+        else:
+            raise ValueError("Wrong space: %s" % space)
+
+        bra = np.reshape(bra, (len(self), -1))
+        ket = np.reshape(ket, (len(other), -1))
+        return np.dot(bra.conj(), ket.T) * fact
+
+    def rotate(self, symmop, mesh=None):
+        """
+        Rotate all the waves in the block by the symmetry operation symmop.
+
+        Args:
+            symmop: :class:`Symmetry` operation
+            mesh: mesh for the FFT, if None the mesh of self is used.
+
+        Returns:
+            New :class:`PWWaveBlock` object.
+        """
+        if self.nspinor != 1:
+            raise ValueError("Spinor rotation not available yet.")
+
+        return self.rotate_symmops([symmop], mesh=mesh)[0]
+
+    def rotate_symmops(self, symmops, mesh=None):
+        """
+        Rotate the block by all the operations in symmops (e.g. :class:`SpaceGroup` or :class:`LittleGroup`).
+        The phase factors are computed for all operations at once.
+
+        Returns:
+            List of :class:`PWWaveBlock` objects, one for each operation.
+        """
+        if self.nspinor != 1:
+            raise ValueError("Spinor rotation not available yet.")
+
+        mesh = mesh if mesh is not None else self.mesh
+        # rot_ug[isym, band, spinor, G]
+        rot_ug = self.ug[np.newaxis] * self.gsphere.rotation_phases(symmops)[:, np.newaxis, np.newaxis, :]
+
+        new_blocks = []
+        for isym, symmop in enumerate(symmops):
+            # Invert the collinear spin if we have an AFM operation
+            rot_spin = self.spin if symmop.is_fm else (self.spin + 1) % 2
+            new = self.__class__(self.nspinor, rot_spin, self.bands, self.gsphere.rotate(symmop), rot_ug[isym])
+            new.set_mesh(mesh)
+            new_blocks.append(new)
+
+        return new_blocks
+
+    def braket_symmops(self, symmops):
+        """
+        Compute the matrix elements <u_i|R u_j> for all the operations R in symmops
+        with a single pass over the block. The FFT box of self.mesh is used.
+
+        Returns:
+            Complex array of shape [nsym, nband, nband].
+        """
+        if self.nspinor != 1:
+            raise ValueError("Spinor rotation not available yet.")
+
+        # R u_j has coefficients u_j(G) * phase(R, G) at S(G): gather <u_i| at these points of the box.
+        rot_inds = self.gsphere.rotated_fft_indices(symmops, self.mesh)
+        phases = self.gsphere.rotation_phases(symmops)
+
+        bra = np.reshape(self.ug_mesh(self.mesh), (len(self), self.nspinor, self.mesh.size))
+        bra = bra[:, :, rot_inds].conj()
+
+        return np.einsum("ipag,jpg,ag->aij", bra, self.ug, phases)
+
+
 class PAW_Wavefunction(WaveFunction):
     """
     All the methods that are related to the all-electron representation should start with ae.
@@ -59,6 +59,75 @@ class TestWFKFile(AbipyTest):
             if self.which("xcrysden") is not None:
                 wave.export_ur2(".xsf", structure)
 
+            wfk.close()
+
+    def test_wave_block(self):
+        """Block of wavefunctions with batched FFTs."""
+        for path in data.WFK_NCFILES:
+            wfk = WfkFile(path)
+            spin, k = 0, 1
+            bands = [0, 2, 3]
+            waves = wfk.get_waves(spin, k, bands=bands)
+            print(waves)
+            assert len(waves) == 3 and waves.shape == (3, wfk.nspinor, wfk.npwarr[k])
+            assert len(wfk.get_waves(spin, k)) == wfk.nband_sk[spin, k]
+
+            single = [wfk.get_wave(spin, k, band) for band in bands]
+            for i, wave in enumerate(waves):
+                assert wave == single[i]
+
+            # Norms and overlap matrix.
+            self.assert_almost_equal(waves.norm2(space="g"), np.ones(3))
+            self.assert_almost_equal(waves.norm2(space="r") / wfk.structure.volume, np.ones(3))
+            for space in ["g", "gsphere", "r"]:
+                smat = waves.braket(waves, space=space)
+                if space == "r": smat = smat / wfk.structure.volume
+                self.assert_almost_equal(smat, np.eye(3))
+
+            # Batched FFT
+            for i, wave in enumerate(single):
+                self.assert_almost_equal(waves.ur[i], wave.mesh.reshape(wave.ur))
+            self.assert_almost_equal(waves.sum_ur2(), sum(wave.ur2 for wave in single))
+
+            with self.assertRaises(ValueError):
+                wfk.get_waves(spin, k, bands=[wfk.nband_sk[spin, k]])
+
+            # Rotate the block with all the operations of the space group.
+            symmops = wfk.structure.spacegroup.fm_symmops[:8]
+            dmats = waves.braket_symmops(symmops)
+            assert dmats.shape == (len(symmops), 3, 3)
+            for isym, rot_waves in enumerate(waves.rotate_symmops(symmops)):
+                self.assert_almost_equal(dmats[isym], waves.braket(rot_waves))
+                self.assert_almost_equal(rot_waves.ug[1], single[1].rotate(symmops[isym]).ug)
+
+            wfk.close()
+
+    def test_lazy_reader(self):
+        """Lazy and eager readers of WFK files should give the same coefficients."""
+        for path in data.WFK_NCFILES:
+            eager = WfkFile(path, lazy=False)
+            lazy = WfkFile(path)
+            cached = WfkFile(path, cache_size=2)
+            assert not eager.reader.lazy and lazy.reader.lazy
+
+            for k in range(eager.nkpt):
+                self.assert_equal(lazy.gspheres[k].gvecs, eager.gspheres[k].gvecs)
+                for band in (0, eager.nband_sk[0, k] - 1):
+                    ref = eager.get_wave(0, k, band)
+                    assert lazy.get_wave(0, k, band) == ref
+                    assert cached.get_wave(0, k, band) == ref
+
+                ug_sk = cached.reader.read_ug_sk(0, k)
+                assert ug_sk.shape == (eager.nband_sk[0, k], eager.nspinor, eager.npwarr[k])
+
+            # Only the last two (spin, k) blocks are kept in memory.
+            assert list(cached.reader._ug_cache.keys()) == [(0, eager.nkpt - 2), (0, eager.nkpt - 1)]
+            cached.reader.clear_cache()
+            assert not cached.reader._ug_cache
+
+            for wfk in (eager, lazy, cached):
+                wfk.close()
+
 
 if __name__ == "__main__":
    import unittest
@@ -5,12 +5,13 @@ from __future__ import print_function, division, unicode_literals, absolute_impo
 import six
 import numpy as np
 
+from collections import OrderedDict
 from monty.functools import lazy_property
 from abipy.core import Mesh3D, GSphere, Structure
 from abipy.core.mixins import AbinitNcFile, Has_Structure, Has_ElectronBands
 from abipy.iotools import ETSF_Reader, Visualizer
 from abipy.electrons.ebands import ElectronsReader
-from abipy.waves.pwwave import PWWaveFunction
+from abipy.waves.pwwave import PWWaveFunction, PWWaveBlock
 
 __all__ = [
     "WfkFile",
@@ -48,14 +49,27 @@ class WfkFile(AbinitNcFile, Has_Structure, Has_ElectronBands):
 
         # Get a wavefunction.
         wave = wfk.get_wave(spin=0, kpoint=[0,0,0], band=0)
+
+        # Get the first four bands as a block of wavefunctions.
+        waves = wfk.get_waves(spin=0, kpoint=[0,0,0], bands=range(4))
+
+    By default, the wavefunction coefficients are read from file on demand.
+    Use ``WfkFile(path, lazy=False)`` to load the full block in memory at once.
     """
-    def __init__(self, filepath):
+    def __init__(self, filepath, lazy=True, cache_size=0):
         """
         Initialize the object from a Netcdf file.
+
+        Args:
+            filepath: Path to the netcdf file.
+            lazy: If True, the wavefunction coefficients are read on demand from file
+                instead of being stored in memory when the file is opened.
+            cache_size: Maximum number of (spin, k) blocks of coefficients kept in memory
+                in lazy mode. 0 disables the cache. See :class:`WFK_Reader`.
         """
         super(WfkFile, self).__init__(filepath)
 
-        self.reader = reader = WFK_Reader(filepath)
+        self.reader = reader = WFK_Reader(filepath, lazy=lazy, cache_size=cache_size)
 
         # Read the electron bands
         self._ebands = reader.read_ebands()
@@ -160,6 +174,34 @@ class WfkFile(AbinitNcFile, Has_Structure, Has_ElectronBands):
 
         return wave
 
+    def get_waves(self, spin, kpoint, bands=None):
+        """
+        Read and return a block of wavefunctions with the given spin and kpoint.
+
+        Args:
+            spin: spin index. Must be in (0, 1)
+            kpoint: Either :class:`Kpoint` instance or integer giving the sequential index in the IBZ (C-convention).
+            bands: List of band indices. None to read all the bands at this (spin, kpoint).
+
+            returns:
+                :class:`PWWaveBlock` instance.
+        """
+        k = self.kindex(kpoint)
+        if spin not in range(self.nsppol) or k not in range(self.nkpt):
+            raise ValueError("Wrong (spin, kpt) indices")
+
+        nband = self.nband_sk[spin, k]
+        bands = np.arange(nband) if bands is None else np.array(bands, dtype=np.int).ravel()
+        if np.any(bands < 0) or np.any(bands >= nband):
+            raise ValueError("Wrong band indices: %s" % str(bands))
+
+        ug_block = self.reader.read_ug_sk(spin, k, bands=bands)
+
+        waves = PWWaveBlock(self.nspinor, spin, bands, self.gspheres[k], ug_block)
+        waves.set_mesh(self.fft_mesh)
+
+        return waves
+
     def export_ur2(self, filepath, spin, kpoint, band, visu=None):
         """
         Export :math:`|u(r)|^2` on file filename.
@@ -209,10 +251,10 @@ class WfkFile(AbinitNcFile, Has_Structure, Has_ElectronBands):
         # Find the set of degenerate states at the given spin and k-point.
         deg_ebands = self.ebands.degeneracies(spin, k, bands_range, tol_ediff=tol_ediff)
 
-        # Create list of tuples (energy, waves) for each degenerate set.
+        # Create list of tuples (energy, block of waves) for each degenerate set.
         deg_ewaves = []
         for e, bands in deg_ebands:
-            deg_ewaves.append((e, [self.get_wave(spin, k, band) for band in bands]))
+            deg_ewaves.append((e, self.get_waves(spin, k, bands=bands)))
 
         print("degeneracies detected:", deg_ebands)
         #print(deg_ewaves)
@@ -227,10 +269,24 @@ class WfkFile(AbinitNcFile, Has_Structure, Has_ElectronBands):
 
 
 class WFK_Reader(ElectronsReader):
-    """This object reads data from the WFK file."""
+    """
+    This object reads data from the WFK file.
+
+    In lazy mode, the wavefunction coefficients are not stored in memory.
+    Each call to `read_ug` reads only the hyperslab associated to the (spin, k, band) state.
+    If cache_size > 0, the reader reads the full set of bands for a given (spin, k)
+    and keeps the `cache_size` most recently used blocks in a LRU cache.
+    """
+
+    def __init__(self, filepath, lazy=True, cache_size=0):
+        """
+        Initialize the object from a filename.
 
-    def __init__(self, filepath):
-        """Initialize the object from a filename."""
+        Args:
+            filepath: Path to the netcdf file.
+            lazy: True if the wavefunction coefficients should be read on demand.
+            cache_size: Maximum number of (spin, k) blocks kept in memory (used only if lazy).
+        """
         super(WFK_Reader, self).__init__(filepath)
 
         self.kpoints = self.read_kpoints()
@@ -250,15 +306,34 @@ class WFK_Reader(ElectronsReader):
         self.istwfk = self.read_value("istwfk")
         self.npwarr = self.read_value("number_of_coefficients")
 
-        # Gvectors
-        self._kg = self.read_value("reduced_coordinates_of_plane_waves")
+        if self.cplex_ug != 2:
+            raise NotImplementedError("cplex_ug != 2 is not supported")
 
-        # Wavefunctions (complex array)
-        # TODO use variables to avoid storing the full block.
-        if self.cplex_ug == 2:
-            self.ug_block = self.read_value("coefficients_of_wavefunctions", cmode="c")
-        else:
-            raise NotImplementedError("")
+        self.lazy = bool(lazy)
+        self.cache_size = int(cache_size)
+        self._ug_cache = OrderedDict()
+
+        if not self.lazy:
+            # Load the full block of wavefunctions in memory.
+            self.ug_block
+
+    @lazy_property
+    def _kg(self):
+        """G-vectors for all k-points. Array of shape [nkpt, mpw, 3]."""
+        return self.read_value("reduced_coordinates_of_plane_waves")
+
+    @lazy_property
+    def ug_block(self):
+        """
+        Full block of wavefunction coefficients [nsppol, nkpt, mband, nspinor, mpw].
+        Accessing this property reads all the coefficients stored in the file.
+        """
+        return self.read_value("coefficients_of_wavefunctions", cmode="c")
+
+    @lazy_property
+    def _ug_var(self):
+        """Netcdf variable with the wavefunction coefficients."""
+        return self.read_variable("coefficients_of_wavefunctions")
 
     @lazy_property
     def basis_set(self):
@@ -297,14 +372,72 @@ class WFK_Reader(ElectronsReader):
         """
         k = self.kindex(kpoint)
         npw_k, istwfk = self.npwarr[k], self.istwfk[k]
+        if self.lazy and "_kg" not in self.__dict__:
+            gvecs = self.read_variable("reduced_coordinates_of_plane_waves")[k, :npw_k, :]
+            return np.array(gvecs), istwfk
+
         return self._kg[k, :npw_k, :], istwfk
 
     def read_ug(self, spin, kpoint, band):
         """Read the Fourier components of the wavefunction."""
         k = self.kindex(kpoint)
-        npw_k, istwfk = self.npwarr[k], self.istwfk[k]
-        # TODO use variables to avoid storing the full block.
-        return self.ug_block[spin, k, band, :, :npw_k]
+        npw_k = self.npwarr[k]
+
+        if not self.lazy:
+            return self.ug_block[spin, k, band, :, :npw_k]
+
+        if self.cache_size > 0:
+            return self.read_ug_sk(spin, k)[band]
+
+        # Read only the hyperslab associated to this state.
+        return _tocomplex(self._ug_var[spin, k, band, :, :npw_k, :])
+
+    def read_ug_sk(self, spin, kpoint, bands=None):
+        """
+        Read the Fourier components of the bands for the given spin and k-point.
+
+        Args:
+            bands: List of band indices. None to read all the bands.
+
+        Returns:
+            Complex array of shape [nband, nspinor, npw_k].
+        """
+        k = self.kindex(kpoint)
+        npw_k, nband = self.npwarr[k], self.nband_sk[spin, k]
+
+        if not self.lazy:
+            ug_sk = self.ug_block[spin, k, :nband, :, :npw_k]
+            return ug_sk if bands is None else ug_sk[bands]
+
+        key = (spin, k)
+        if bands is not None and self.cache_size == 0:
+            # Read the smallest slab containing the bands.
+            bands = np.array(bands, dtype=np.int).ravel()
+            bstart, bstop = bands.min(), bands.max() + 1
+            return _tocomplex(self._ug_var[spin, k, bstart:bstop, :, :npw_k, :])[bands - bstart]
+
+        try:
+            ug_sk = self._ug_cache.pop(key)
+        except KeyError:
+            ug_sk = _tocomplex(self._ug_var[spin, k, :nband, :, :npw_k, :])
+
+        if self.cache_size > 0:
+            # Reinsert the block so that it becomes the most recently used one.
+            self._ug_cache[key] = ug_sk
+            while len(self._ug_cache) > self.cache_size:
+                self._ug_cache.popitem(last=False)
+
+        return ug_sk if bands is None else ug_sk[bands]
+
+    def clear_cache(self):
+        """Remove the (spin, k) blocks stored in the cache."""
+        self._ug_cache.clear()
+
+
+def _tocomplex(data):
+    """Build complex array from array of real numbers with last dimension == 2."""
+    data = np.asarray(data)
+    return data[..., 0] + 1j * data[..., 1]
 
 
 class DmatsError(Exception):
@@ -411,13 +544,8 @@ class DMatrices(object):
         ltk_symmops = ltk.symmops[:8]
 
         for idg, (e, waves) in enumerate(deg_ewaves):
-            nb = len(waves)
-            for isym, symmop in enumerate(ltk_symmops):
-                for (ii, wave) in enumerate(waves):
-                    rot_wave = wave.rotate(symmop)
-                    prod = wave.braket(rot_wave)
-                    # Update the entry
-                    dmats[idg][isym,ii,ii] = prod
+            # Compute <u_i|R u_j> for all the states in the degenerate subset and all the operations.
+            dmats[idg][:len(ltk_symmops)] = waves.braket_symmops(ltk_symmops)
             print("idg", idg, "shape", dmats[idg].shape)
 
         self.dmats = dmats